@@ -0,0 +1,151 @@
+# benchmarks/chunk_order.py
+"""
+Out-of-order ingest with and without chunk-aware ordering.
+
+A seeded dataset spanning many chunks is shuffled (as a backfill or a replay of
+several sources would arrive) and loaded with binary COPY, one commit per batch,
+into an empty sensors table:
+  • time_ordered   the generator order: the reference for in-order data
+  • shuffled       as it arrives: every batch touches every chunk
+  • chunk_ordered  each batch sorted by (chunk, id, time), one COPY per chunk
+  • precreated     chunk_ordered, with the chunks created before the load
+                   (the pre-creation time is reported separately)
+Reported per case: rows/s, seconds and the speedup over `shuffled`.
+"""
+
+import datetime as dt
+import json
+import platform
+import time
+
+import numpy as np
+
+from utils.batch import SensorBatch
+from utils.chunks import chunk_interval, chunk_ordered, precreate_chunks
+from utils.commit_policy import CommitPolicy
+from utils.db import get_connection
+from utils.generator import generate_array_batches
+from utils.sinks import PostgresCopySink
+from benchmarks.common import slices, truncate_sensors
+
+CASES = ("time_ordered", "shuffled", "chunk_ordered", "precreated")
+
+
+def _dataset(weeks: int, devices: int, step_sec: int, seed: int) -> SensorBatch:
+    end = dt.datetime(2025, 1, 1, tzinfo=dt.timezone.utc)
+    return SensorBatch.concat(
+        list(
+            generate_array_batches(
+                start=end - dt.timedelta(weeks=weeks),
+                end=end,
+                step_sec=step_sec,
+                devices=devices,
+                batch_size=100_000,
+                jitter_frac=0.3,
+                seed=seed,
+            )
+        )
+    )
+
+
+def run_case(
+    name: str, ordered: SensorBatch, shuffled: SensorBatch, batch_size: int
+) -> dict:
+    """Load one case into an empty sensors table and return its metrics."""
+    with get_connection() as conn:
+        truncate_sensors(conn)
+        interval = chunk_interval(conn)
+
+        precreate_s = 0.0
+        if name == "precreated":
+            t0 = time.perf_counter()
+            chunks = precreate_chunks(
+                conn,
+                ordered.time.min().item().replace(tzinfo=dt.timezone.utc),
+                ordered.time.max().item().replace(tzinfo=dt.timezone.utc),
+                interval=interval,
+            )
+            precreate_s = time.perf_counter() - t0
+            print(f"   🧱 Pre-created {chunks} chunks in {precreate_s:.2f}s")
+
+        data = ordered if name == "time_ordered" else shuffled
+        batches = slices(data, batch_size)
+        if name in ("chunk_ordered", "precreated"):
+            batches = chunk_ordered(batches, interval)
+
+        # One commit per input batch, whatever the stage splits it into
+        sink = PostgresCopySink(
+            fmt="binary", conn=conn, policy=CommitPolicy(max_rows=batch_size)
+        )
+        t0 = time.perf_counter()
+        with sink:
+            for batch in batches:
+                sink.write(batch)
+        seconds = time.perf_counter() - t0
+
+    return {
+        "case": name,
+        "rows": len(data),
+        "seconds": round(seconds, 4),
+        "rows_per_s": round(len(data) / seconds) if seconds else 0,
+        "precreate_s": round(precreate_s, 4),
+        "chunk_interval": str(interval),
+    }
+
+
+def run(
+    cases=CASES,
+    weeks: int = 26,
+    devices: int = 20,
+    step_sec: int = 60,
+    batch_size: int = 100_000,
+    seed: int = 42,
+    out: str | None = "bench_chunk_order.json",
+) -> dict:
+    """Run the cases, print rows/s and speedups, write the JSON report to `out`."""
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        raise ValueError(f"Unknown cases {sorted(unknown)}, use {list(CASES)}")
+
+    ordered = _dataset(weeks, devices, step_sec, seed)
+    shuffled = ordered[np.random.default_rng(seed).permutation(len(ordered))]
+    print(f"\n🧬 Dataset: {len(ordered):,} rows ({weeks} weeks, {devices} devices)")
+
+    report = {
+        "meta": {
+            "created": dt.datetime.now(dt.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "rows": len(ordered),
+            "weeks": weeks,
+            "devices": devices,
+            "batch_size": batch_size,
+            "seed": seed,
+        },
+        "runs": [],
+    }
+
+    for name in cases:
+        print(f"\n🏁 {name} ...")
+        report["runs"].append(run_case(name, ordered, shuffled, batch_size))
+
+    base = next((r for r in report["runs"] if r["case"] == "shuffled"), None)
+    for r in report["runs"]:
+        if base and base["rows_per_s"]:
+            r["speedup"] = round(r["rows_per_s"] / base["rows_per_s"], 2)
+        speedup = f" | {r['speedup']}x vs shuffled" if "speedup" in r else ""
+        print(
+            f"📊 {r['case']:>13}: {r['rows_per_s']:>10,} rows/s "
+            f"in {r['seconds']:.2f}s{speedup}"
+        )
+
+    if out:
+        with open(out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report written to {out}")
+
+    return report
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,89 @@
+import datetime as dt
+from typing import Iterator, List, Sequence
+
+import psycopg
+
+from utils.batch import SensorBatch
+from utils.generator import generate_array_batches
+from utils.query_cache import invalidate
+
+# Linux clock ticks per second (USER_HZ). 100 on every mainstream kernel build,
+# including the timescaledb docker image.
+_CLK_TCK = 100
+
+
+def backend_cpu_seconds(cur) -> float | None:
+    """
+    CPU seconds (user + system) used so far by the server backend process of
+    this connection, read from /proc/<pid>/stat on the database server.
+
+    Needs a Linux server and a role allowed to call pg_read_file (superuser or
+    pg_read_server_files, which the workshop docker user is). Returns None if the
+    file cannot be read. Call it between transactions: on failure it rolls back.
+    """
+    try:
+        cur.execute("SELECT pg_read_file('/proc/' || pg_backend_pid() || '/stat')")
+        stat = cur.fetchone()[0]
+    except psycopg.Error:
+        cur.connection.rollback()
+        return None
+
+    # Fields after the "(comm)" part start at field 3 (state), see proc(5):
+    # utime is field 14 and stime is field 15.
+    fields = stat.rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / _CLK_TCK
+
+
+def truncate_sensors(conn) -> None:
+    """Start a benchmark run from an empty sensors table."""
+    with conn.cursor() as cur:
+        cur.execute("TRUNCATE sensors;")
+    conn.commit()
+    invalidate()
+
+
+def compare_runs(report: dict, baseline: dict, keys: Sequence[str]) -> List[dict]:
+    """
+    rows/s of every run in `report` next to the baseline run with the same `keys`
+    values. Runs missing from the baseline are skipped.
+    """
+    before = {tuple(r[k] for k in keys): r for r in baseline.get("runs", [])}
+    changes = []
+    for r in report["runs"]:
+        b = before.get(tuple(r[k] for k in keys))
+        if b is None or not b["rows_per_s"]:
+            continue
+        changes.append(
+            {
+                **{k: r[k] for k in keys},
+                "baseline_rows_per_s": b["rows_per_s"],
+                "rows_per_s": r["rows_per_s"],
+                "change_pct": round(100 * (r["rows_per_s"] / b["rows_per_s"] - 1), 1),
+            }
+        )
+    return changes
+
+
+def dataset(days: float, devices: int, step_sec: int, seed: int) -> SensorBatch:
+    """One seeded dataset in memory, so that generating it is not measured."""
+    end = dt.datetime(2025, 1, 1, tzinfo=dt.timezone.utc)
+    return SensorBatch.concat(
+        list(
+            generate_array_batches(
+                start=end - dt.timedelta(days=days),
+                end=end,
+                step_sec=step_sec,
+                devices=devices,
+                batch_size=100_000,
+                drift_per_day=0.01,
+                jitter_frac=0.3,
+                seed=seed,
+            )
+        )
+    )
+
+
+def slices(data: SensorBatch, batch_size: int) -> Iterator[SensorBatch]:
+    """Zero-copy batches of `batch_size` rows."""
+    for offset in range(0, len(data), batch_size):
+        yield data[offset : offset + batch_size]
@@ -0,0 +1,105 @@
+# benchmarks/copy_formats.py
+"""
+CSV vs binary COPY into the sensors hypertable.
+
+Both formats ingest the exact same seeded dataset, one COPY + commit per batch
+(like solutions/_04_ingest_copy). Reported per format:
+  • rows/s end-to-end (generate + encode + send + commit)
+  • client seconds spent encoding (CSV text formatting vs binary packing)
+  • server CPU seconds of the backend doing the COPY (parsing + inserting)
+"""
+
+import datetime as dt
+import time
+
+from utils.db import get_connection
+from utils.batch import SensorBatch
+from utils.generator import generate_array_batches
+from utils.ingest import COPY_CSV_SQL
+from utils.pgbinary import COPY_BINARY_SQL
+from benchmarks.common import backend_cpu_seconds, truncate_sensors
+
+FORMATS = {
+    "csv": (COPY_CSV_SQL, SensorBatch.to_csv),
+    "binary": (COPY_BINARY_SQL, SensorBatch.to_copy_binary),
+}
+
+
+def bench_format(
+    fmt: str,
+    *,
+    days: float = 10,
+    devices: int = 2,
+    step_sec: int = 1,
+    batch_size: int = 15_000,
+    seed: int = 42,
+) -> dict:
+    """Ingest the seeded dataset with one COPY format into an empty sensors table."""
+    copy_sql, encode = FORMATS[fmt]
+    end = dt.datetime(2025, 1, 1, tzinfo=dt.timezone.utc)
+    start = end - dt.timedelta(days=days)
+
+    with get_connection() as conn, conn.cursor() as cur:
+        truncate_sensors(conn)
+        cpu_before = backend_cpu_seconds(cur)
+        conn.commit()
+
+        rows = 0
+        encode_s = 0.0
+        t0 = time.perf_counter()
+        for batch in generate_array_batches(
+            start=start,
+            end=end,
+            step_sec=step_sec,
+            devices=devices,
+            batch_size=batch_size,
+            drift_per_day=0.01,
+            jitter_frac=0.3,
+            seed=seed,
+        ):
+            e0 = time.perf_counter()
+            buf = encode(batch)
+            encode_s += time.perf_counter() - e0
+
+            with cur.copy(copy_sql) as cp:
+                cp.write(buf)
+            conn.commit()
+            rows += len(batch)
+        seconds = time.perf_counter() - t0
+
+        cpu_after = backend_cpu_seconds(cur)
+        server_cpu_s = (
+            None if cpu_before is None or cpu_after is None else cpu_after - cpu_before
+        )
+
+    return {
+        "format": fmt,
+        "rows": rows,
+        "seconds": round(seconds, 4),
+        "rows_per_s": round(rows / seconds),
+        "client_encode_s": round(encode_s, 4),
+        "server_cpu_s": server_cpu_s,
+    }
+
+
+def run(days: float = 10, devices: int = 2, batch_size: int = 15_000) -> list[dict]:
+    """Benchmark CSV and binary COPY on the sensors hypertable and print a summary."""
+    results = []
+    for fmt in FORMATS:
+        print(f"\n🏁 COPY format={fmt} ...")
+        result = bench_format(fmt, days=days, devices=devices, batch_size=batch_size)
+        results.append(result)
+
+    print()
+    for r in results:
+        server = "n/a" if r["server_cpu_s"] is None else f"{r['server_cpu_s']:.2f}s"
+        print(
+            f"📊 {r['format']:>6}: {r['rows']:,} rows in {r['seconds']:.2f}s "
+            f"→ {r['rows_per_s']:,} rows/s | client encode {r['client_encode_s']:.2f}s "
+            f"| server CPU {server}"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,143 @@
+# benchmarks/copy_out.py
+"""
+Bulk reads of the sensors hypertable into NumPy columns.
+
+A seeded dataset is loaded into an empty sensors table (skip with load=False to
+read what is there) and the same time range is read back with:
+  • fetchall       SELECT + cursor.fetchall(): a tuple, a datetime and a float per
+                   row through the psycopg loaders, then converted to arrays
+  • server_cursor  utils.range_reader.read_range: named cursor, fetchmany blocks
+                   decoded into preallocated arrays (one query per sensor)
+  • copy_binary    utils.range_reader.copy_range: COPY ... TO STDOUT (FORMAT
+                   binary), decoded per 8 MB buffer with np.frombuffer
+Reported per case: rows, seconds, rows/s and the speedup over `fetchall`.
+"""
+
+import datetime as dt
+import json
+import platform
+import time
+
+import numpy as np
+import psycopg
+
+from utils.batch import SensorBatch
+from utils.commit_policy import CommitPolicy
+from utils.db import get_connection
+from utils.range_reader import copy_range, read_range
+from utils.sinks import PostgresCopySink
+from benchmarks.common import dataset, slices, truncate_sensors
+
+FETCHALL_SQL = """
+    SELECT id, time, value FROM sensors
+    WHERE time >= %s AND time < %s
+"""
+
+
+def read_fetchall(conn, start, end, ids) -> SensorBatch:
+    with conn.cursor() as cur:
+        cur.execute(FETCHALL_SQL, (start, end))
+        return SensorBatch.from_rows(cur.fetchall())
+
+
+def read_server_cursor(conn, start, end, ids) -> SensorBatch:
+    batches = []
+    for id in ids:
+        times, values = read_range(conn, id, start, end)
+        batches.append(SensorBatch(times, np.full(len(times), id), values))
+    return SensorBatch.concat(batches)
+
+
+def read_copy_binary(conn, start, end, ids) -> SensorBatch:
+    return copy_range(conn, start, end)
+
+
+CASES = {
+    "fetchall": read_fetchall,
+    "server_cursor": read_server_cursor,
+    "copy_binary": read_copy_binary,
+}
+
+
+def run_case(name: str, start, end, ids) -> dict:
+    """Read [start, end) with one case on a fresh connection and return its metrics."""
+    with get_connection() as conn:
+        t0 = time.perf_counter()
+        batch = CASES[name](conn, start, end, ids)
+        seconds = time.perf_counter() - t0
+        conn.commit()
+    return {
+        "case": name,
+        "rows": len(batch),
+        "seconds": round(seconds, 4),
+        "rows_per_s": round(len(batch) / seconds) if seconds else 0,
+        "array_mb": round(batch.nbytes / 2**20, 1),
+    }
+
+
+def run(
+    cases=tuple(CASES),
+    days: float = 10,
+    devices: int = 2,
+    seed: int = 42,
+    load: bool = True,
+    out: str | None = "bench_copy_out.json",
+) -> dict:
+    """Load the dataset (optional), run the cases, print and write the report."""
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        raise ValueError(f"Unknown cases {sorted(unknown)}, use {list(CASES)}")
+
+    end = dt.datetime(2025, 1, 1, tzinfo=dt.timezone.utc)
+    start = end - dt.timedelta(days=days)
+    ids = list(range(devices))  # the generator numbers devices from 0
+
+    if load:
+        data = dataset(days, devices, 1, seed)
+        print(f"\n🧬 Loading {len(data):,} rows ({days} days, {devices} devices) ...")
+        with get_connection() as conn:
+            truncate_sensors(conn)
+            sink = PostgresCopySink(
+                fmt="binary", conn=conn, policy=CommitPolicy(max_rows=1_000_000)
+            )
+            with sink:
+                for batch in slices(data, 100_000):
+                    sink.write(batch)
+
+    report = {
+        "meta": {
+            "created": dt.datetime.now(dt.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "psycopg": psycopg.__version__,
+            "platform": platform.platform(),
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "devices": devices,
+        },
+        "runs": [],
+    }
+
+    for name in cases:
+        print(f"\n🏁 {name} ...")
+        report["runs"].append(run_case(name, start, end, ids))
+
+    base = next((r for r in report["runs"] if r["case"] == "fetchall"), None)
+    for r in report["runs"]:
+        if base and base["rows_per_s"]:
+            r["speedup"] = round(r["rows_per_s"] / base["rows_per_s"], 2)
+        speedup = f" | {r['speedup']}x vs fetchall" if "speedup" in r else ""
+        print(
+            f"📊 {r['case']:>13}: {r['rows']:,} rows, {r['rows_per_s']:>10,} rows/s "
+            f"in {r['seconds']:.2f}s{speedup}"
+        )
+
+    if out:
+        with open(out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report written to {out}")
+
+    return report
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,124 @@
+# benchmarks/downsample_many.py
+"""
+Downsampling many sensors: one lttb query per sensor versus batched.
+
+A seeded dataset with `max(sensors)` devices is loaded into an empty sensors
+table (skip with load=False) and for every sensor count N the first N ids are
+downsampled to `resolution` points each with:
+  • loop        the current get_downsampled(): a pooled connection borrow and
+                an lttb query per sensor, one after the other
+  • grouped     utils.downsample.downsample_many(mode="grouped"): one statement,
+                lttb grouped by id and unnested
+  • concurrent  downsample_many(mode="concurrent"): the per-sensor queries on
+                `workers` pooled connections at once
+Reported per (N, case): seconds, points returned and the speedup over `loop`.
+"""
+
+import datetime as dt
+import json
+import platform
+import time
+
+from utils.commit_policy import CommitPolicy
+from utils.db import get_connection, pooled_connection
+from utils.downsample import downsample_many, downsample_one
+from utils.sinks import PostgresCopySink
+from benchmarks.common import dataset, slices, truncate_sensors
+
+
+def _loop(ids, start, end, resolution, workers):
+    series = {}
+    for id in ids:
+        with pooled_connection() as conn, conn.cursor() as cur:
+            series[id] = downsample_one(cur, id, start, end, resolution)
+    return series
+
+
+CASES = {
+    "loop": _loop,
+    "grouped": lambda *a: downsample_many(*a[:4], mode="grouped"),
+    "concurrent": lambda *a: downsample_many(*a[:4], mode="concurrent", workers=a[4]),
+}
+
+
+def run(
+    sensors=(8, 100),
+    cases=tuple(CASES),
+    days: float = 30,
+    step_sec: int = 60,
+    resolution: int = 300,
+    workers: int = 8,
+    seed: int = 42,
+    load: bool = True,
+    out: str | None = "bench_downsample.json",
+) -> dict:
+    """Load the dataset (optional), time every (sensor count, case), write the report."""
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        raise ValueError(f"Unknown cases {sorted(unknown)}, use {list(CASES)}")
+
+    end = dt.datetime(2025, 1, 1, tzinfo=dt.timezone.utc)
+    start = end - dt.timedelta(days=days)
+
+    if load:
+        data = dataset(days, max(sensors), step_sec, seed)
+        print(f"\n🧬 Loading {len(data):,} rows ({days} days, {max(sensors)} devices)")
+        with get_connection() as conn:
+            truncate_sensors(conn)
+            sink = PostgresCopySink(
+                fmt="binary", conn=conn, policy=CommitPolicy(max_rows=1_000_000)
+            )
+            with sink:
+                for batch in slices(data, 100_000):
+                    sink.write(batch)
+
+    report = {
+        "meta": {
+            "created": dt.datetime.now(dt.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "days": days,
+            "step_sec": step_sec,
+            "resolution": resolution,
+            "workers": workers,
+        },
+        "runs": [],
+    }
+
+    # Warm the pool so the first case does not pay for opening connections
+    downsample_many([0], start, start + dt.timedelta(seconds=1), mode="concurrent")
+
+    for n in sensors:
+        ids = list(range(n))  # the generator numbers devices from 0
+        base = None
+        for name in cases:
+            t0 = time.perf_counter()
+            series = CASES[name](ids, start, end, resolution, workers)
+            seconds = time.perf_counter() - t0
+            r = {
+                "sensors": n,
+                "case": name,
+                "seconds": round(seconds, 4),
+                "points": sum(len(values) for _, values in series.values()),
+            }
+            if name == "loop":
+                base = seconds
+            if base and seconds:
+                r["speedup"] = round(base / seconds, 2)
+            report["runs"].append(r)
+            speedup = f" | {r['speedup']}x vs loop" if "speedup" in r else ""
+            print(
+                f"📊 {n:>4} sensors {name:>10}: {seconds:.3f}s, "
+                f"{r['points']:,} points{speedup}"
+            )
+
+    if out:
+        with open(out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report written to {out}")
+
+    return report
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,283 @@
+# benchmarks/generator_micro.py
+"""
+Generator and encoder microbenchmark: no database involved.
+
+Every generator in utils/generator.py is driven into a null sink that only counts
+rows and bytes, for a grid of device counts, batch sizes and jitter. Reported per
+case:
+  • rows/s and bytes/s (bytes of the produced CSV text, binary buffer or arrays;
+    simulate_temp_sensor yields Python tuples and reports no bytes)
+  • allocations per row: bytes allocated per row (tracemalloc, in a separate
+    pass so tracing does not skew the timings), plus the peak traced memory
+
+Generators that have no batch size (generate_csv, simulate_temp_sensor) run once
+per device count and jitter. simulate_temp_sensor models one sensor without
+jitter, so it runs `devices` sensors back to back, once per device count, and
+reports no jitter.
+"""
+
+import datetime as dt
+import json
+import platform
+import random
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterable, Tuple
+
+import numpy as np
+
+from utils.batch import SensorBatch
+from utils.generator import (
+    generate_array_batches,
+    generate_copy_binary_batches,
+    generate_csv,
+    generate_csv_lines_batch,
+    simulate_temp_sensor,
+)
+from utils.pgbinary import COPY_BINARY_HEADER, COPY_BINARY_TRAILER, ROW_SIZE
+from benchmarks.common import compare_runs
+
+_START = dt.datetime(2025, 1, 1, tzinfo=dt.timezone.utc)
+_COPY_FRAMING = len(COPY_BINARY_HEADER) + len(COPY_BINARY_TRAILER)
+
+
+def _measure(item) -> Tuple[int, int]:
+    """(rows, bytes) of one generator output item."""
+    if isinstance(item, SensorBatch):
+        return len(item), item.nbytes
+    if isinstance(item, str):
+        return item.count("\n"), len(item)
+    if isinstance(item, bytes):
+        # A complete binary COPY buffer: header + fixed-size rows + trailer
+        return (len(item) - _COPY_FRAMING) // ROW_SIZE, len(item)
+    return 1, 0  # a (time, value) tuple, nothing encoded
+
+
+def null_sink(items: Iterable) -> Tuple[int, int]:
+    """Consume a generator and return (rows, bytes) without keeping anything."""
+    rows = nbytes = 0
+    for item in items:
+        r, b = _measure(item)
+        rows += r
+        nbytes += b
+    return rows, nbytes
+
+
+def _simulate(n, devices, jitter_frac, batch_size):
+    per_device = n // devices
+    for device in range(devices):
+        yield from simulate_temp_sensor(
+            _START,
+            _START + dt.timedelta(seconds=per_device - 1),
+            step_sec=1,
+            # Own generator: the global `random` state stays untouched
+            rng=random.Random(device),
+        )
+
+
+# name -> (factory(n, devices, jitter_frac, batch_size) -> iterable,
+#          uses batch_size, uses jitter_frac)
+GENERATORS: Dict[str, Tuple[Callable, bool, bool]] = {
+    "generate_csv": (
+        # Lazy, so the single string is built while the sink is measuring
+        lambda n, devices, jitter_frac, batch_size: (
+            generate_csv(n=n, start=_START, devices=devices, jitter_frac=jitter_frac)
+            for _ in range(1)
+        ),
+        False,
+        True,
+    ),
+    "csv_lines_python": (
+        lambda n, devices, jitter_frac, batch_size: generate_csv_lines_batch(
+            n=n,
+            start=_START,
+            devices=devices,
+            jitter_frac=jitter_frac,
+            batch_size=batch_size,
+        ),
+        True,
+        True,
+    ),
+    "csv_lines_numpy": (
+        lambda n, devices, jitter_frac, batch_size: generate_csv_lines_batch(
+            n=n,
+            start=_START,
+            devices=devices,
+            jitter_frac=jitter_frac,
+            batch_size=batch_size,
+            engine="numpy",
+        ),
+        True,
+        True,
+    ),
+    "array_batches": (
+        lambda n, devices, jitter_frac, batch_size: generate_array_batches(
+            n=n,
+            start=_START,
+            devices=devices,
+            jitter_frac=jitter_frac,
+            batch_size=batch_size,
+        ),
+        True,
+        True,
+    ),
+    "copy_binary": (
+        lambda n, devices, jitter_frac, batch_size: generate_copy_binary_batches(
+            n=n,
+            start=_START,
+            devices=devices,
+            jitter_frac=jitter_frac,
+            batch_size=batch_size,
+        ),
+        True,
+        True,
+    ),
+    "simulate_temp_sensor": (_simulate, False, False),
+}
+
+
+def _trace_allocations(items: Iterable) -> Tuple[int, int]:
+    """
+    (allocated bytes, peak traced bytes) while draining `items`. For every item,
+    the traced memory high-water mark above the level at which the item started
+    counts as allocated for it: temporaries freed before the item is yielded are
+    included, memory reused within the item is not counted twice.
+    """
+    tracemalloc.start()
+    try:
+        allocated = peak = 0
+        items = iter(items)
+        while True:
+            start, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            item = next(items, None)
+            if item is None:
+                break
+            _measure(item)
+            del item
+            _, item_peak = tracemalloc.get_traced_memory()
+            allocated += item_peak - start
+            peak = max(peak, item_peak)
+    finally:
+        tracemalloc.stop()
+    return allocated, peak
+
+
+def run_case(
+    name: str,
+    *,
+    n: int,
+    devices: int,
+    jitter_frac: float,
+    batch_size: int,
+    allocations: bool = True,
+) -> dict:
+    """Time one generator into the null sink, then trace its allocations."""
+    factory, _, _ = GENERATORS[name]
+
+    t0 = time.perf_counter()
+    rows, nbytes = null_sink(factory(n, devices, jitter_frac, batch_size))
+    seconds = time.perf_counter() - t0
+
+    result = {
+        "generator": name,
+        "devices": devices,
+        "batch_size": batch_size,
+        "jitter_frac": jitter_frac,
+        "rows": rows,
+        "bytes": nbytes,
+        "seconds": round(seconds, 4),
+        "rows_per_s": round(rows / seconds) if seconds else 0,
+        "bytes_per_s": round(nbytes / seconds) if seconds else 0,
+    }
+    if allocations:
+        allocated, peak = _trace_allocations(
+            factory(n, devices, jitter_frac, batch_size)
+        )
+        result["alloc_bytes_per_row"] = round(allocated / rows, 1) if rows else 0
+        result["peak_traced_mb"] = round(peak / 2**20, 2)
+    return result
+
+
+def run(
+    generators: Iterable[str] = tuple(GENERATORS),
+    devices: Iterable[int] = (2, 100),
+    batch_sizes: Iterable[int] = (1_000, 10_000),
+    jitters: Iterable[float] = (0.0, 0.3),
+    n: int = 100_000,
+    allocations: bool = True,
+    out: str | None = "bench_generator.json",
+    baseline: str | None = None,
+) -> dict:
+    """Run the generator grid into the null sink, print a summary, write JSON to `out`."""
+    unknown = set(generators) - set(GENERATORS)
+    if unknown:
+        raise ValueError(
+            f"Unknown generators {sorted(unknown)}, use {list(GENERATORS)}"
+        )
+
+    report = {
+        "meta": {
+            "created": dt.datetime.now(dt.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "rows": n,
+        },
+        "runs": [],
+    }
+
+    for name in generators:
+        _, batched, jittered = GENERATORS[name]
+        for device_count in devices:
+            for jitter in jitters if jittered else [None]:
+                for batch_size in batch_sizes if batched else [None]:
+                    r = run_case(
+                        name,
+                        n=n,
+                        devices=device_count,
+                        jitter_frac=jitter,
+                        batch_size=batch_size,
+                        allocations=allocations,
+                    )
+                    report["runs"].append(r)
+                    allocs = (
+                        f" | {r['alloc_bytes_per_row']} B/row allocated, "
+                        f"peak {r['peak_traced_mb']} MB"
+                        if allocations
+                        else ""
+                    )
+                    batch = f"{batch_size:,}" if batch_size else "-"
+                    jit = jitter if jitter is not None else "-"
+                    print(
+                        f"📊 {name:>20} devices={device_count:<4} batch={batch:>7} "
+                        f"jitter={jit:<4} {r['rows_per_s']:>11,} rows/s "
+                        f"{r['bytes_per_s'] / 2**20:>8.1f} MB/s{allocs}"
+                    )
+
+    if out:
+        with open(out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report written to {out}")
+
+    if baseline:
+        with open(baseline) as f:
+            changes = compare_runs(
+                report,
+                json.load(f),
+                ("generator", "devices", "batch_size", "jitter_frac"),
+            )
+        print(f"\n📐 Compared with {baseline}:")
+        for c in changes:
+            print(
+                f"   {c['generator']:>20} devices={c['devices']:<4} "
+                f"batch={c['batch_size'] or '-'} jitter={c['jitter_frac']} "
+                f"{c['baseline_rows_per_s']:>11,} → {c['rows_per_s']:>11,} rows/s "
+                f"({c['change_pct']:+.1f}%)"
+            )
+
+    return report
+
+
+if __name__ == "__main__":
+    run()
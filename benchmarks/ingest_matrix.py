@@ -0,0 +1,322 @@
+# benchmarks/ingest_matrix.py
+"""
+Ingest strategy matrix on the sensors hypertable.
+
+One seeded dataset is generated up front (so generation is not measured) and
+ingested once per (strategy, batch size, synchronous_commit) combination, each
+run starting from a truncated table. Every run commits once per `batch_size`
+rows. Reported per run:
+  • rows/s end-to-end (encode + send + commit)
+  • p50/p99 batch latency (seconds per committed batch)
+  • client CPU seconds of this process (all threads)
+  • peak RSS of this process during the run, above its RSS at the start of the
+    run (the dataset is already in memory then, so it is not counted)
+  • sensors table size after the run (hypertable_size)
+
+The `null` and `memory` strategies write to a utils.sinks NullSink (binary
+encoding only) and MemorySink instead of Postgres: a client-side ceiling that
+needs no database.
+
+The report is written as JSON; pass a previous report as `baseline` to print the
+rows/s change per run.
+"""
+
+import contextlib
+import datetime as dt
+import json
+import platform
+import threading
+import time
+from typing import Callable, Dict, Iterable, List
+
+import numpy as np
+import psutil
+import psycopg
+
+from utils.batch import SensorBatch
+from utils.db import get_connection
+from utils.ingest import COPY_SQL, insert_pipeline
+from utils.parallel_ingest import parallel_copy
+from utils.sinks import make_sink
+from benchmarks.common import compare_runs, dataset, slices, truncate_sensors
+
+EXECUTEMANY_SQL = """
+    INSERT INTO sensors (time, id, value) VALUES (%s, %s, %s)
+    ON CONFLICT DO NOTHING
+"""
+
+
+def _executemany(conn, batches, latencies, **_):
+    rows = 0
+    with conn.cursor() as cur:
+        for batch in batches:
+            t0 = time.perf_counter()
+            cur.executemany(EXECUTEMANY_SQL, batch.to_rows())
+            conn.commit()
+            latencies.append(time.perf_counter() - t0)
+            rows += len(batch)
+    return rows
+
+
+def _copy(fmt):
+    def strategy(conn, batches, latencies, **_):
+        rows = 0
+        with conn.cursor() as cur:
+            for batch in batches:
+                t0 = time.perf_counter()
+                with cur.copy(COPY_SQL[fmt]) as cp:
+                    cp.write(
+                        batch.to_copy_binary() if fmt == "binary" else batch.to_csv()
+                    )
+                conn.commit()
+                latencies.append(time.perf_counter() - t0)
+                rows += len(batch)
+        return rows
+
+    return strategy
+
+
+def _insert(mode):
+    def strategy(conn, batches, latencies, batch_size, **_):
+        return insert_pipeline(
+            conn,
+            batches,
+            mode=mode,
+            rows_per_statement=1000 if mode == "values" else batch_size,
+            commit_rows=batch_size,
+            on_commit=lambda rows, total, seconds: latencies.append(seconds),
+        )
+
+    return strategy
+
+
+def _parallel_copy(conn, batches, latencies, batch_size, sync_commit, workers, **_):
+    # The writers open their own connections; `conn` is only used for the report
+    report = parallel_copy(
+        batches,
+        workers=workers,
+        commit_rows=batch_size,
+        buffer_rows=min(batch_size, 10_000),
+        synchronous_commit=sync_commit,
+        on_commit=lambda rows, total, seconds: latencies.append(seconds),
+    )
+    return report["rows"]
+
+
+def _sink(spec):
+    def strategy(conn, batches, latencies, **_):
+        with make_sink(spec) as sink:
+            for batch in batches:
+                t0 = time.perf_counter()
+                sink.write(batch)
+                latencies.append(time.perf_counter() - t0)
+        return sink.rows
+
+    return strategy
+
+
+STRATEGIES: Dict[str, Callable] = {
+    "executemany": _executemany,
+    "multi_values": _insert("values"),
+    "unnest": _insert("unnest"),
+    "copy_csv": _copy("csv"),
+    "copy_binary": _copy("binary"),
+    "parallel_copy": _parallel_copy,
+    "null": _sink("null:binary"),
+    "memory": _sink("memory"),
+}
+
+# Strategies that never touch the sensors table
+NO_DATABASE = {"null", "memory"}
+
+
+class _PeakRss:
+    """
+    Samples this process' RSS on a background thread and keeps the maximum.
+    `growth` is the peak above the RSS sampled on entry.
+    """
+
+    def __init__(self, interval: float = 0.02):
+        self.interval = interval
+        self.baseline = self.peak = 0
+        self._proc = psutil.Process()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self._proc.memory_info().rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.baseline = self.peak = self._proc.memory_info().rss
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self._proc.memory_info().rss)
+
+    @property
+    def growth(self) -> int:
+        return self.peak - self.baseline
+
+
+def run_case(
+    strategy: str,
+    data: SensorBatch,
+    *,
+    batch_size: int,
+    sync_commit: bool | None,
+    workers: int = 4,
+) -> dict:
+    """
+    Ingest `data` into an empty sensors table with one strategy and return its
+    metrics. Strategies without a database take `sync_commit=None` and report it
+    as "n/a".
+    """
+    latencies: List[float] = []
+    proc = psutil.Process()
+    database = strategy not in NO_DATABASE
+
+    with get_connection() if database else contextlib.nullcontext() as conn:
+        if database:
+            truncate_sensors(conn)
+            conn.execute(f"SET synchronous_commit = {'on' if sync_commit else 'off'}")
+            conn.commit()
+
+        cpu0 = proc.cpu_times()
+        t0 = time.perf_counter()
+        with _PeakRss() as rss:
+            rows = STRATEGIES[strategy](
+                conn,
+                slices(data, batch_size),
+                latencies,
+                batch_size=batch_size,
+                sync_commit=sync_commit,
+                workers=workers,
+            )
+        seconds = time.perf_counter() - t0
+        cpu1 = proc.cpu_times()
+
+        table_bytes = 0
+        if database:
+            table_bytes = conn.execute("SELECT hypertable_size('sensors')").fetchone()[
+                0
+            ]
+            conn.commit()
+
+    p50, p99 = np.percentile(latencies, [50, 99]) if latencies else (0.0, 0.0)
+    return {
+        "strategy": strategy,
+        "batch_size": batch_size,
+        "synchronous_commit": sync_commit if database else "n/a",
+        "rows": rows,
+        "seconds": round(seconds, 4),
+        "rows_per_s": round(rows / seconds) if seconds else 0,
+        "batches": len(latencies),
+        "p50_batch_s": round(float(p50), 5),
+        "p99_batch_s": round(float(p99), 5),
+        "client_cpu_s": round((cpu1.user - cpu0.user) + (cpu1.system - cpu0.system), 4),
+        "peak_rss_mb": round(rss.growth / 2**20, 1),
+        "table_bytes": table_bytes,
+    }
+
+
+def _sync_label(sync_commit) -> str:
+    return {True: "on", False: "off"}.get(sync_commit, "n/a")
+
+
+def compare(report: dict, baseline: dict) -> List[dict]:
+    """rows/s of every run next to the matching run of a baseline report."""
+    return compare_runs(
+        report, baseline, ("strategy", "batch_size", "synchronous_commit")
+    )
+
+
+def run(
+    strategies: Iterable[str] = tuple(STRATEGIES),
+    batch_sizes: Iterable[int] = (1_000, 15_000),
+    sync_commits: Iterable[bool] = (True, False),
+    days: float = 1,
+    devices: int = 2,
+    step_sec: int = 1,
+    workers: int = 4,
+    seed: int = 42,
+    out: str | None = "bench_ingest.json",
+    baseline: str | None = None,
+) -> dict:
+    """Run the strategy matrix, print a summary and write the JSON report to `out`."""
+    unknown = set(strategies) - set(STRATEGIES)
+    if unknown:
+        raise ValueError(
+            f"Unknown strategies {sorted(unknown)}, use {list(STRATEGIES)}"
+        )
+
+    data = dataset(days, devices, step_sec, seed)
+    print(f"\n🧬 Dataset: {len(data):,} rows ({days} days, {devices} devices)")
+
+    report = {
+        "meta": {
+            "created": dt.datetime.now(dt.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "psycopg": psycopg.__version__,
+            "platform": platform.platform(),
+            "cpus": psutil.cpu_count(),
+            "days": days,
+            "devices": devices,
+            "step_sec": step_sec,
+            "rows": len(data),
+            "workers": workers,
+            "seed": seed,
+        },
+        "runs": [],
+    }
+
+    for strategy in strategies:
+        # synchronous_commit does not apply without a database: one run each
+        strategy_syncs = [None] if strategy in NO_DATABASE else sync_commits
+        for batch_size in batch_sizes:
+            for sync_commit in strategy_syncs:
+                sync = _sync_label(sync_commit)
+                print(
+                    f"\n🏁 {strategy} batch_size={batch_size:,} "
+                    f"synchronous_commit={sync} ..."
+                )
+                r = run_case(
+                    strategy,
+                    data,
+                    batch_size=batch_size,
+                    sync_commit=sync_commit,
+                    workers=workers,
+                )
+                report["runs"].append(r)
+                print(
+                    f"📊 {r['rows_per_s']:,} rows/s | p50 {r['p50_batch_s'] * 1000:.1f} ms "
+                    f"p99 {r['p99_batch_s'] * 1000:.1f} ms | CPU {r['client_cpu_s']:.2f}s "
+                    f"| RSS {r['peak_rss_mb']} MB | table {r['table_bytes'] / 2**20:.1f} MB"
+                )
+
+    if out:
+        with open(out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report written to {out}")
+
+    if baseline:
+        with open(baseline) as f:
+            changes = compare(report, json.load(f))
+        print(f"\n📐 Compared with {baseline}:")
+        for c in changes:
+            sync = _sync_label(c["synchronous_commit"])
+            print(
+                f"   {c['strategy']:>13} {c['batch_size']:>7,} sync={sync:<3} "
+                f"{c['baseline_rows_per_s']:>10,} → {c['rows_per_s']:>10,} rows/s "
+                f"({c['change_pct']:+.1f}%)"
+            )
+
+    return report
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,125 @@
+# benchmarks/merge_vs_copy.py
+"""
+Cost of idempotent loads: plain binary COPY into sensors versus the merge sink
+(binary COPY into a TEMP staging table, then INSERT ... ON CONFLICT (id, time)).
+
+One seeded dataset (10M+ rows by default) is loaded in this order:
+  • copy          plain COPY into an empty table (the baseline)
+  • merge         merge into an empty table: the price of safety on a first load
+  • merge_reload  the same data merged again: every row conflicts, nothing changes
+  • merge_update  reloaded with on_conflict="update": conflicts are compared and
+                  only changed values written (none here)
+Every case commits every `commit_rows` rows. Reported per case: rows/s, seconds,
+rows merged, slowdown relative to plain COPY and the table size afterwards.
+"""
+
+import datetime as dt
+import json
+import platform
+import time
+
+import psycopg
+
+from utils.commit_policy import CommitPolicy
+from utils.db import get_connection
+from utils.sinks import PostgresCopySink, PostgresMergeSink
+from benchmarks.common import dataset, slices, truncate_sensors
+
+# name -> (sink factory(policy, conn), truncate sensors first)
+CASES = {
+    "copy": (lambda **kw: PostgresCopySink(fmt="binary", **kw), True),
+    "merge": (lambda **kw: PostgresMergeSink(fmt="binary", **kw), True),
+    "merge_reload": (lambda **kw: PostgresMergeSink(fmt="binary", **kw), False),
+    "merge_update": (
+        lambda **kw: PostgresMergeSink(fmt="binary", on_conflict="update", **kw),
+        False,
+    ),
+}
+
+
+def run_case(name: str, data, *, batch_size: int, commit_rows: int) -> dict:
+    """Load `data` through one case's sink and return its metrics."""
+    factory, truncate = CASES[name]
+
+    with get_connection() as conn:
+        if truncate:
+            truncate_sensors(conn)
+        sink = factory(policy=CommitPolicy(max_rows=commit_rows), conn=conn)
+
+        t0 = time.perf_counter()
+        with sink:
+            for batch in slices(data, batch_size):
+                sink.write(batch)
+        seconds = time.perf_counter() - t0
+
+        table_bytes = conn.execute("SELECT hypertable_size('sensors')").fetchone()[0]
+        conn.commit()
+
+    return {
+        "case": name,
+        "rows": len(data),
+        "seconds": round(seconds, 4),
+        "rows_per_s": round(len(data) / seconds) if seconds else 0,
+        "merged": getattr(sink, "merged", len(data)),
+        "table_bytes": table_bytes,
+    }
+
+
+def run(
+    cases=tuple(CASES),
+    days: float = 58,
+    devices: int = 2,
+    step_sec: int = 1,
+    batch_size: int = 100_000,
+    commit_rows: int = 1_000_000,
+    seed: int = 42,
+    out: str | None = "bench_merge.json",
+) -> dict:
+    """Run the cases in order, print a summary and write the JSON report to `out`."""
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        raise ValueError(f"Unknown cases {sorted(unknown)}, use {list(CASES)}")
+
+    data = dataset(days, devices, step_sec, seed)
+    print(f"\n🧬 Dataset: {len(data):,} rows ({days} days, {devices} devices)")
+
+    report = {
+        "meta": {
+            "created": dt.datetime.now(dt.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "psycopg": psycopg.__version__,
+            "platform": platform.platform(),
+            "rows": len(data),
+            "batch_size": batch_size,
+            "commit_rows": commit_rows,
+            "seed": seed,
+        },
+        "runs": [],
+    }
+
+    baseline = None
+    for name in cases:
+        print(f"\n🏁 {name} ...")
+        r = run_case(name, data, batch_size=batch_size, commit_rows=commit_rows)
+        if name == "copy":
+            baseline = r["seconds"]
+        if baseline:
+            r["vs_copy"] = round(r["seconds"] / baseline, 2)
+        report["runs"].append(r)
+        vs_copy = f" | {r['vs_copy']}x the COPY time" if baseline else ""
+        print(
+            f"📊 {r['rows_per_s']:,} rows/s in {r['seconds']:.2f}s | "
+            f"{r['merged']:,} rows merged | table {r['table_bytes'] / 2**20:.1f} MB"
+            f"{vs_copy}"
+        )
+
+    if out:
+        with open(out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report written to {out}")
+
+    return report
+
+
+if __name__ == "__main__":
+    run()
@@ -3,11 +3,14 @@ import sys
 import typer
 import questionary
 from rich import print
+import inspect
 import multiprocessing
-from typing import List, Optional
+from contextlib import contextmanager
+from typing import Annotated, List, Literal, Optional
 
 import utils.monitor_inserts as mts
 from utils.decorators import time_execution
+from utils.sink_specs import SINK_SPECS
 
 import asyncio
 
@@ -16,6 +19,25 @@ print("python:", sys.version)
 
 app = typer.Typer(help="Timescale workshop CLI")
 
+# Options shared by the ingest commands (s3, s4, bonus-kaggle)
+CommitRows = Annotated[Optional[int], typer.Option(help="Commit every N rows")]
+CommitMb = Annotated[
+    Optional[float], typer.Option(help="Commit every N MB of encoded data")
+]
+CommitSeconds = Annotated[
+    Optional[float], typer.Option(help="Commit at least every N seconds")
+]
+Adaptive = Annotated[
+    bool,
+    typer.Option(
+        help="Tune rows per commit from the observed commit latency and rows/s"
+    ),
+]
+SinkSpec = Annotated[
+    Optional[str],
+    typer.Option(help="Write to another sink: " + ", ".join(SINK_SPECS)),
+]
+
 
 @app.command("welcome")
 @time_execution(sync=True, rank=False)
@@ -52,11 +74,16 @@ def task_2():
 def task_3():
     """Task 3: Ingest data using INSERT with insert monitoring"""
     from tasks._03_ingest_insert import task
+    from utils.query_cache import invalidate
 
     monitor_process = multiprocessing.Process(target=run_monitoring, daemon=True)
     monitor_process.start()
 
-    task.run()
+    try:
+        task.run()
+    finally:
+        # Your ingest code writes the history the query cache may hold
+        invalidate()
 
 
 @app.command("t4")
@@ -64,11 +91,16 @@ def task_3():
 def task_4():
     """Task 4: Ingest data using COPY with insert monitoring"""
     from tasks._04_ingest_copy import task
+    from utils.query_cache import invalidate
 
     monitor_process = multiprocessing.Process(target=run_monitoring, daemon=True)
     monitor_process.start()
 
-    task.run()
+    try:
+        task.run()
+    finally:
+        # Your ingest code writes the history the query cache may hold
+        invalidate()
 
 
 @app.command("t5")
@@ -161,30 +193,127 @@ def solution_2():
 
 @app.command("s3")
 @time_execution(sync=True)
-def solution_3():
+def solution_3(
+    action: str = typer.Argument("run", help="Action: run, run_pipeline, run_unnest"),
+    commit_rows: CommitRows = None,
+    commit_mb: CommitMb = None,
+    commit_seconds: CommitSeconds = None,
+    adaptive: Adaptive = False,
+    sink: SinkSpec = None,
+):
     """Solution 3: Ingest data using batch INSERT with insert monitoring"""
     from solutions._03_ingest_insert import task
 
-    monitor_process = multiprocessing.Process(target=run_monitoring, daemon=True)
-    monitor_process.start()
+    if not hasattr(task, action):
+        typer.echo(f"❌  Unknown action: {action}")
+        raise typer.Exit(code=1)
 
-    task.run()
+    policy = commit_policy(commit_rows, commit_mb, commit_seconds, adaptive)
+    target = ingest_sink(sink, policy)
+
+    if target is None or target.needs_database:
+        monitor_process = multiprocessing.Process(target=run_monitoring, daemon=True)
+        monitor_process.start()
+
+    typer.echo(f"▶️  Executing: {action}() ...")
+    run_action(task, action, policy=policy, sink=target)
 
 
 def run_monitoring():
     mts.run(target_tables=["public.sensors"])
 
 
+def commit_policy(commit_rows, commit_mb, commit_seconds, adaptive):
+    """CommitPolicy from the --commit-*/--adaptive options, None keeps the task default."""
+    if not (commit_rows or commit_mb or commit_seconds or adaptive):
+        return None
+    from utils.commit_policy import CommitPolicy
+
+    return CommitPolicy.from_options(
+        commit_rows, commit_mb, commit_seconds, adaptive, default_rows=15_000
+    )
+
+
+def ingest_sink(spec, policy):
+    """Sink from the --sink option, None keeps the task default (Postgres)."""
+    if not spec:
+        return None
+    from utils.sinks import make_sink
+
+    try:
+        return make_sink(spec, **({"policy": policy} if policy else {}))
+    except ValueError as e:
+        typer.echo(f"❌  {e}")
+        raise typer.Exit(code=1)
+
+
+def run_action(task, action, **options):
+    """Call task.<action>(), passing the options that were given (policy, sink)."""
+    func = getattr(task, action)
+    options = {k: v for k, v in options.items() if v is not None}
+    unsupported = [k for k in options if k not in inspect.signature(func).parameters]
+    if unsupported:
+        typer.echo(f"❌  {action} does not take {', '.join(unsupported)} options")
+        raise typer.Exit(code=1)
+    return func(**options)
+
+
+@contextmanager
+def query_cache(no_cache):
+    """Turn the query cache off with --no-cache, print its hits/misses for this run."""
+    from utils.query_cache import get_cache
+
+    cache = get_cache()
+    if no_cache:
+        cache.enabled = False
+    before = dict(cache.stats)
+    yield
+    used = {k: v - before[k] for k, v in cache.stats.items() if v != before[k]}
+    if used:
+        print("🗄️  Query cache: " + ", ".join(f"{k} {v:,}" for k, v in used.items()))
+
+
 @app.command("s4")
 @time_execution(sync=True)
-def solution_4():
-    """Solution 4: Ingest data using batch COPY with insert monitoring"""
+def solution_4(
+    action: str = typer.Argument(
+        "run", help="Action: run, run_binary, run_stream, run_adaptive"
+    ),
+    commit_rows: CommitRows = None,
+    commit_mb: CommitMb = None,
+    commit_seconds: CommitSeconds = None,
+    adaptive: Adaptive = False,
+    sink: SinkSpec = None,
+    resume: bool = typer.Option(
+        False, help="Continue an interrupted run after its last commit (run, run_binary)"
+    ),
+    checkpoint: bool = typer.Option(
+        False, help="Record the progress in ingest_checkpoints, so --resume can continue"
+    ),
+):
+    """Solution 4: Ingest data using batch COPY (CSV or binary) with insert monitoring"""
     from solutions._04_ingest_copy import task
 
-    monitor_process = multiprocessing.Process(target=run_monitoring, daemon=True)
-    monitor_process.start()
+    if not hasattr(task, action):
+        typer.echo(f"❌  Unknown action: {action}")
+        raise typer.Exit(code=1)
 
-    task.run()
+    policy = commit_policy(commit_rows, commit_mb, commit_seconds, adaptive)
+    target = ingest_sink(sink, policy)
+
+    if target is None or target.needs_database:
+        monitor_process = multiprocessing.Process(target=run_monitoring, daemon=True)
+        monitor_process.start()
+
+    typer.echo(f"▶️  Executing: {action}() ...")
+    run_action(
+        task,
+        action,
+        policy=policy,
+        sink=target,
+        resume=resume or None,
+        checkpoint=checkpoint or None,
+    )
 
 
 @app.command("s5")
@@ -200,8 +329,14 @@ def solution_5():
 @time_execution(sync=True, rank=False)
 def solution_6(
     action: str = typer.Argument(
-        "run", help="Action: run, plot_raw_all, plot_average_all"
-    )
+        "run", help="Action: run, plot_raw_all, plot_raw_streamed, plot_average_all"
+    ),
+    itersize: Optional[int] = typer.Option(
+        None, help="Rows per round trip of the server-side cursor (plot_raw_streamed)"
+    ),
+    no_cache: bool = typer.Option(
+        False, "--no-cache", help="Bypass the query cache, every query hits the DB"
+    ),
 ):
     """Solution 6: Fetch and plot data — basic SQL queries"""
     from solutions._06_query_basics import task
@@ -211,7 +346,8 @@ def solution_6(
         raise typer.Exit(code=1)
 
     typer.echo(f"▶️  Executing: {action}() ...")
-    getattr(task, action)()
+    with query_cache(no_cache):
+        run_action(task, action, itersize=itersize)
 
 
 @app.command("s7")
@@ -219,8 +355,15 @@ def solution_6(
 def solution_7(
     action: str = typer.Argument(
         "run",
-        help="Action: run, plot_downsampled_all, plot_average_all, plot_histogram",
-    )
+        help="Action: run, plot_downsampled_all, plot_average_all, "
+        "plot_average_all_parallel, plot_histogram",
+    ),
+    workers: Optional[int] = typer.Option(
+        None, help="Concurrent per-chunk queries (plot_average_all_parallel)"
+    ),
+    no_cache: bool = typer.Option(
+        False, "--no-cache", help="Bypass the query cache, every query hits the DB"
+    ),
 ):
     """Solution 7: Fetch and plot data — hyperfunctions"""
     from solutions._07_hyperfunctions import task
@@ -230,7 +373,8 @@ def solution_7(
         raise typer.Exit(code=1)
 
     typer.echo(f"▶️  Executing: {action}() ...")
-    getattr(task, action)()
+    with query_cache(no_cache):
+        run_action(task, action, workers=workers)
 
 
 @app.command("s8")
@@ -239,7 +383,10 @@ def solution_8(
     action: str = typer.Argument(
         "run",
         help="Action: run, init_cagg, plot_all",
-    )
+    ),
+    no_cache: bool = typer.Option(
+        False, "--no-cache", help="Bypass the query cache, every query hits the DB"
+    ),
 ):
     """Solution 8: Continuous aggregates -> actions: init_cagg, plot_all"""
     from solutions._08_continous_aggregates import task
@@ -249,7 +396,8 @@ def solution_8(
         raise typer.Exit(code=1)
 
     typer.echo(f"▶️  Executing: {action}() ...")
-    getattr(task, action)()
+    with query_cache(no_cache):
+        getattr(task, action)()
 
 
 @app.command("bonus-kaggle")
@@ -257,8 +405,26 @@ def solution_8(
 def solution_9(
     action: str = typer.Argument(
         "run",
-        help="Action: run, ingest_copy_kaggle_solution, plot_downsampled_all",
-    )
+        help="Action: run, ingest_copy_kaggle_solution, ingest_staged_kaggle_solution, "
+        "plot_downsampled_all",
+    ),
+    commit_rows: CommitRows = None,
+    commit_mb: CommitMb = None,
+    commit_seconds: CommitSeconds = None,
+    adaptive: Adaptive = False,
+    sink: SinkSpec = None,
+    resume: bool = typer.Option(
+        False, help="Continue an interrupted ingest_copy_kaggle_solution load"
+    ),
+    checkpoint: bool = typer.Option(
+        False, help="Record the progress in ingest_checkpoints, so --resume can continue"
+    ),
+    chunk_order: bool = typer.Option(
+        False, help="Sort each batch by (chunk, id, time) before COPY"
+    ),
+    no_cache: bool = typer.Option(
+        False, "--no-cache", help="Bypass the query cache, every query hits the DB"
+    ),
 ):
     """Solution 9 [Bonus]: Ingest Kaggle data using COPY with insert monitoring. Bonus task."""
     from solutions._09_ingest_kaggle_bonus import task
@@ -267,8 +433,19 @@ def solution_9(
         typer.echo(f"❌  Unknown action: {action}")
         raise typer.Exit(code=1)
 
+    policy = commit_policy(commit_rows, commit_mb, commit_seconds, adaptive)
+    target = ingest_sink(sink, policy)
     typer.echo(f"▶️  Executing: {action}() ...")
-    getattr(task, action)()
+    with query_cache(no_cache):
+        run_action(
+            task,
+            action,
+            policy=policy,
+            sink=target,
+            resume=resume or None,
+            chunk_order=chunk_order or None,
+            checkpoint=checkpoint or None,
+        )
 
 
 ####################
@@ -314,11 +491,13 @@ def monitor_inserts(
 @time_execution(sync=True, rank=False)
 def truncate_sensors():
     """Truncate the sensors table"""
-    from utils.db import get_connection
+    from utils.db import pooled_connection
+    from utils.query_cache import invalidate
 
-    with get_connection() as conn, conn.cursor() as cur:
+    with pooled_connection() as conn, conn.cursor() as cur:
         cur.execute("TRUNCATE sensors;")
         conn.commit()
+        invalidate()
         count = cur.execute("SELECT approximate_row_count('sensors');").fetchone()[0]
         print(f"✅ Sensors table truncated, approx row count: {count}")
 
@@ -327,9 +506,9 @@ def truncate_sensors():
 @time_execution(sync=True, rank=False)
 def row_count():
     """Get approximate row count of sensors table"""
-    from utils.db import get_connection
+    from utils.db import pooled_connection
 
-    with get_connection() as conn, conn.cursor() as cur:
+    with pooled_connection() as conn, conn.cursor() as cur:
         count = cur.execute("SELECT approximate_row_count('sensors');").fetchone()[0]
         print(f"✅ Sensor table approx row count: {count}")
 
@@ -338,9 +517,9 @@ def row_count():
 @time_execution(sync=True, rank=False)
 def table_size():
     """Get the size of sensors table"""
-    from utils.db import get_connection
+    from utils.db import pooled_connection
 
-    with get_connection() as conn, conn.cursor() as cur:
+    with pooled_connection() as conn, conn.cursor() as cur:
         size = cur.execute(
             "SELECT pg_size_pretty(hypertable_size('sensors'));"
         ).fetchone()[0]
@@ -351,9 +530,9 @@ def table_size():
 @time_execution(sync=True, rank=False)
 def table_chunks():
     """Get the chunk information of sensors table"""
-    from utils.db import get_connection
+    from utils.db import pooled_connection
 
-    with get_connection() as conn, conn.cursor() as cur:
+    with pooled_connection() as conn, conn.cursor() as cur:
         chunks = cur.execute(
             """SELECT
                 tic.chunk_name, range_start, range_end, is_compressed, pg_size_pretty(total_bytes) AS total
@@ -371,9 +550,9 @@ def table_chunks():
 @time_execution(sync=True, rank=False)
 def cagg_chunks():
     """Get the chunk information of continuous aggregate sensors_summary_daily table"""
-    from utils.db import get_connection
+    from utils.db import pooled_connection
 
-    with get_connection() as conn, conn.cursor() as cur:
+    with pooled_connection() as conn, conn.cursor() as cur:
         chunks = cur.execute(
             """SELECT
                 tic.chunk_name, range_start, range_end, is_compressed, pg_size_pretty(total_bytes) AS total
@@ -391,12 +570,14 @@ def cagg_chunks():
 @time_execution(sync=True, rank=False)
 def table_drop():
     """Drop the sensors table to get a fresh start. Deletes all data, tables and cagg."""
-    from utils.db import get_connection
+    from utils.db import pooled_connection
+    from utils.query_cache import invalidate
 
-    with get_connection() as conn, conn.cursor() as cur:
+    with pooled_connection() as conn, conn.cursor() as cur:
         try:
             cur.execute("DROP TABLE IF EXISTS sensors CASCADE;")
             conn.commit()
+            invalidate()
             # PostgreSQL sets this after any command
             msg = cur.statusmessage  # e.g. "DROP TABLE"
             if msg.startswith("DROP TABLE"):
@@ -408,6 +589,47 @@ def table_drop():
             print(f"❌ Failed to drop table: {e}")
 
 
+@app.command("pool-stats")
+@time_execution(sync=True, rank=False)
+def pool_stats(
+    clients: int = typer.Option(8, help="Concurrent threads borrowing connections"),
+    queries: int = typer.Option(50, help="Queries per client"),
+):
+    """Exercise the connection pool with concurrent clients and print its stats (checkouts, wait time, connections)."""
+    from concurrent.futures import ThreadPoolExecutor
+    from utils.db import pooled_connection, pool_stats as get_pool_stats
+
+    def client(_):
+        for _ in range(queries):
+            with pooled_connection() as conn:
+                conn.execute("SELECT pg_sleep(0.001);")
+
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        list(executor.map(client, range(clients)))
+
+    stats = get_pool_stats()
+    for key in sorted(stats):
+        print(f"🏊 {key}: {stats[key]}")
+    if stats.get("requests_num"):
+        avg_wait = stats.get("requests_wait_ms", 0) / stats["requests_num"]
+        print(f"⏳ avg wait per checkout: {avg_wait:.2f} ms")
+
+
+@app.command("query-cache")
+def query_cache_stats(
+    clear: bool = typer.Option(False, help="Drop every cached result"),
+):
+    """Show the query cache stats (hits, misses, rows served from cache) or clear it."""
+    from utils.query_cache import get_cache
+
+    cache = get_cache()
+    if clear:
+        cache.clear()
+        print(f"🧹 Query cache cleared ({cache.path})")
+    for key, value in cache.summary().items():
+        print(f"🗄️  {key}: {value}")
+
+
 @app.command("read-csv")
 @time_execution(sync=True, rank=False)
 def read_csv():
@@ -420,6 +642,329 @@ def read_csv():
         print(batch)
 
 
+@app.command("bench-copy-formats")
+@time_execution(sync=True, rank=False)
+def bench_copy_formats(
+    days: float = typer.Option(10, help="Days of 1s data to generate"),
+    devices: int = typer.Option(2, help="Number of simulated devices"),
+    batch_size: int = typer.Option(15_000, help="Rows per COPY/commit"),
+):
+    """Benchmark CSV vs binary COPY into sensors (rows/s and server CPU). Truncates sensors!"""
+    from benchmarks import copy_formats
+
+    copy_formats.run(days=days, devices=devices, batch_size=batch_size)
+
+
+@app.command("bench-ingest")
+@time_execution(sync=True, rank=False)
+def bench_ingest(
+    strategies: List[str] = typer.Option(
+        [
+            "executemany",
+            "multi_values",
+            "unnest",
+            "copy_csv",
+            "copy_binary",
+            "parallel_copy",
+        ],
+        "--strategy",
+        "-s",
+        help="Strategies to run, e.g. -s copy_binary -s parallel_copy",
+    ),
+    batch_sizes: List[int] = typer.Option(
+        [1_000, 15_000], "--batch-size", "-b", help="Rows per batch/commit to sweep"
+    ),
+    sync_commit: List[str] = typer.Option(
+        ["on", "off"], help="synchronous_commit settings to sweep (on/off)"
+    ),
+    days: float = typer.Option(1, help="Days of 1s data in the dataset"),
+    devices: int = typer.Option(2, help="Number of simulated devices"),
+    workers: int = typer.Option(4, help="Writers for parallel_copy"),
+    out: str = typer.Option("bench_ingest.json", help="JSON report path"),
+    baseline: Optional[str] = typer.Option(
+        None, help="Previous JSON report to compare rows/s against"
+    ),
+):
+    """Benchmark ingest strategies x batch sizes x synchronous_commit into a JSON report. Truncates sensors!"""
+    from benchmarks import ingest_matrix
+
+    ingest_matrix.run(
+        strategies=strategies,
+        batch_sizes=batch_sizes,
+        sync_commits=[s.lower() in ("on", "true", "1") for s in sync_commit],
+        days=days,
+        devices=devices,
+        workers=workers,
+        out=out,
+        baseline=baseline,
+    )
+
+
+@app.command("bench-generator")
+@time_execution(sync=True, rank=False)
+def bench_generator(
+    generators: List[str] = typer.Option(
+        [
+            "generate_csv",
+            "csv_lines_python",
+            "csv_lines_numpy",
+            "array_batches",
+            "copy_binary",
+            "simulate_temp_sensor",
+        ],
+        "--generator",
+        "-g",
+        help="Generators to run, e.g. -g csv_lines_python -g array_batches",
+    ),
+    devices: List[int] = typer.Option([2, 100], "--devices", "-d", help="Device counts"),
+    batch_sizes: List[int] = typer.Option(
+        [1_000, 10_000], "--batch-size", "-b", help="Rows per batch"
+    ),
+    jitters: List[float] = typer.Option([0.0, 0.3], "--jitter", "-j", help="jitter_frac"),
+    rows: int = typer.Option(100_000, help="Rows generated per case"),
+    allocations: bool = typer.Option(
+        True, help="Also trace allocations per row (extra pass with tracemalloc)"
+    ),
+    out: str = typer.Option("bench_generator.json", help="JSON report path"),
+    baseline: Optional[str] = typer.Option(
+        None, help="Previous JSON report to compare rows/s against"
+    ),
+):
+    """Benchmark the data generators into a null sink (rows/s, bytes/s, allocations per row). No database needed."""
+    from benchmarks import generator_micro
+
+    generator_micro.run(
+        generators=generators,
+        devices=devices,
+        batch_sizes=batch_sizes,
+        jitters=jitters,
+        n=rows,
+        allocations=allocations,
+        out=out,
+        baseline=baseline,
+    )
+
+
+@app.command("bench-chunk-order")
+@time_execution(sync=True, rank=False)
+def bench_chunk_order(
+    weeks: int = typer.Option(26, help="Weeks of data, i.e. about this many chunks"),
+    devices: int = typer.Option(20, help="Number of simulated devices"),
+    step_sec: int = typer.Option(60, help="Seconds between readings"),
+    batch_size: int = typer.Option(100_000, help="Rows per batch/commit"),
+    out: str = typer.Option("bench_chunk_order.json", help="JSON report path"),
+):
+    """Benchmark shuffled (out-of-order) COPY with and without chunk ordering and chunk pre-creation. Truncates sensors!"""
+    from benchmarks import chunk_order
+
+    chunk_order.run(
+        weeks=weeks,
+        devices=devices,
+        step_sec=step_sec,
+        batch_size=batch_size,
+        out=out,
+    )
+
+@app.command("bench-merge")
+@time_execution(sync=True, rank=False)
+def bench_merge(
+    cases: List[str] = typer.Option(
+        ["copy", "merge", "merge_reload", "merge_update"],
+        "--case",
+        "-c",
+        help="Cases to run in order, e.g. -c copy -c merge",
+    ),
+    days: float = typer.Option(58, help="Days of 1s data (58 days x 2 devices ≈ 10M rows)"),
+    devices: int = typer.Option(2, help="Number of simulated devices"),
+    commit_rows: int = typer.Option(1_000_000, help="Rows per commit"),
+    out: str = typer.Option("bench_merge.json", help="JSON report path"),
+):
+    """Benchmark idempotent merge loads (staging + ON CONFLICT) against plain COPY. Truncates sensors!"""
+    from benchmarks import merge_vs_copy
+
+    merge_vs_copy.run(
+        cases=cases, days=days, devices=devices, commit_rows=commit_rows, out=out
+    )
+
+
+@app.command("bench-copy-out")
+@time_execution(sync=True, rank=False)
+def bench_copy_out(
+    cases: List[str] = typer.Option(
+        ["fetchall", "server_cursor", "copy_binary"],
+        "--case",
+        "-c",
+        help="Read paths to compare, e.g. -c fetchall -c copy_binary",
+    ),
+    days: float = typer.Option(10, help="Days of 1s data to load and read back"),
+    devices: int = typer.Option(2, help="Number of simulated devices"),
+    load: bool = typer.Option(True, help="Truncate and load the dataset first"),
+    out: str = typer.Option("bench_copy_out.json", help="JSON report path"),
+):
+    """Benchmark bulk reads into NumPy: fetchall vs server-side cursor vs binary COPY TO STDOUT."""
+    from benchmarks import copy_out
+
+    copy_out.run(cases=cases, days=days, devices=devices, load=load, out=out)
+
+
+@app.command("bench-downsample")
+@time_execution(sync=True, rank=False)
+def bench_downsample(
+    sensors: List[int] = typer.Option(
+        [8, 100], "--sensors", "-n", help="Sensor counts to downsample, e.g. -n 8 -n 100"
+    ),
+    days: float = typer.Option(30, help="Days of data per sensor"),
+    step_sec: int = typer.Option(60, help="Seconds between readings"),
+    resolution: int = typer.Option(300, help="lttb points per sensor"),
+    workers: int = typer.Option(8, help="Pooled connections for the concurrent case"),
+    load: bool = typer.Option(True, help="Truncate and load the dataset first"),
+    out: str = typer.Option("bench_downsample.json", help="JSON report path"),
+):
+    """Benchmark lttb for many sensors: per-sensor loop vs one grouped statement vs concurrent queries."""
+    from benchmarks import downsample_many
+
+    downsample_many.run(
+        sensors=sensors,
+        days=days,
+        step_sec=step_sec,
+        resolution=resolution,
+        workers=workers,
+        load=load,
+        out=out,
+    )
+
+
+@app.command("ingest-parallel")
+@time_execution(sync=True, rank=False)
+def ingest_parallel(
+    workers: List[int] = typer.Option(
+        [1, 2, 4], "--workers", "-w", help="Writer counts to sweep, e.g. -w 1 -w 2 -w 8"
+    ),
+    days: float = typer.Option(10, help="Days of 1s data to generate per run"),
+    devices: int = typer.Option(2, help="Number of simulated devices"),
+    commit_rows: int = typer.Option(500_000, help="Rows per COPY/commit per writer"),
+    gen_workers: int = typer.Option(
+        0, help="Generate data on a process pool with this many workers (0 = inline)"
+    ),
+    truncate: bool = typer.Option(True, help="Truncate sensors before each run"),
+    adaptive: bool = typer.Option(
+        False, help="Let each writer tune its commit size, starting at --commit-rows"
+    ),
+):
+    """Ingest with N parallel COPY writers (one connection each) and report rows/s per writer count."""
+    import utils.parallel_ingest as pi
+
+    pi.run(
+        workers=workers,
+        days=days,
+        devices=devices,
+        commit_rows=commit_rows,
+        gen_workers=gen_workers,
+        truncate=truncate,
+        adaptive=adaptive,
+    )
+
+
+@app.command("ingest-async")
+@time_execution(sync=True, rank=False)
+def ingest_async(
+    concurrency: int = typer.Option(
+        2, help="Batches in flight (one async connection each)"
+    ),
+    days: float = typer.Option(10, help="Days of 1s data to generate"),
+    devices: int = typer.Option(2, help="Number of simulated devices"),
+    batch_size: int = typer.Option(50_000, help="Rows per COPY/commit"),
+    fmt: Literal["binary", "csv"] = typer.Option("binary", help="COPY format"),
+):
+    """Ingest with asyncio + psycopg AsyncConnection, generating the next batch while the previous one is in flight."""
+    import utils.async_ingest as ai
+
+    ai.run(
+        concurrency=concurrency,
+        days=days,
+        devices=devices,
+        batch_size=batch_size,
+        fmt=fmt,
+    )
+
+
+@app.command("ingest-csv")
+@time_execution(sync=True, rank=False)
+def ingest_csv(
+    path: str = typer.Argument(
+        "data/kaggle_power_consumption.csv", help="CSV file to load"
+    ),
+    workers: int = typer.Option(4, "--workers", "-w", help="Worker processes"),
+    range_mb: float = typer.Option(16, help="MB of the file per range (transaction)"),
+    retries: int = typer.Option(2, help="Retries of a failed range"),
+    time_column: str = typer.Option("Datetime", help="Timestamp column of wide files"),
+    time_format: str = typer.Option(
+        "%m/%d/%Y %H:%M", help="strptime format of the timestamp column"
+    ),
+    resume: bool = typer.Option(
+        False, help="Skip the ranges an interrupted load already committed"
+    ),
+):
+    """Load a large CSV in parallel: newline-aligned byte ranges, one COPY per range on a process pool."""
+    import utils.parallel_csv as pc
+
+    pc.run(
+        path,
+        workers=workers,
+        range_mb=range_mb,
+        retries=retries,
+        time_column=time_column,
+        time_format=time_format,
+        resume=resume,
+    )
+
+
+@app.command("export")
+@time_execution(sync=True, rank=False)
+def export(
+    out: str = typer.Argument(..., help="Output file: .npz, .csv or .parquet"),
+    ids: List[int] = typer.Option([], "--id", "-i", help="Sensor ids (default: all)"),
+    days: float = typer.Option(100, help="Export the last N days"),
+    start: Optional[str] = typer.Option(None, help="ISO start, overrides --days"),
+    end: Optional[str] = typer.Option(None, help="ISO end (default: now)"),
+):
+    """Export sensor rows with binary COPY TO STDOUT, decoded into NumPy columns."""
+    import datetime as dt
+    from utils.db import pooled_connection
+    from utils.range_reader import export_range
+
+    def parse(value):
+        ts = dt.datetime.fromisoformat(value)
+        return ts if ts.tzinfo else ts.replace(tzinfo=dt.timezone.utc)
+
+    end_ts = parse(end) if end else dt.datetime.now(dt.timezone.utc)
+    start_ts = parse(start) if start else end_ts - dt.timedelta(days=days)
+    with pooled_connection() as conn:
+        rows = export_range(conn, out, start_ts, end_ts, ids or None)
+    print(f"💾 Exported {rows:,} rows ({start_ts} - {end_ts}) to {out}")
+
+
+@app.command("backfill")
+@time_execution(sync=True, rank=False)
+def backfill(
+    days_ago: float = typer.Option(30, help="Backfilled range ends this many days ago"),
+    days: float = typer.Option(7, help="Days of 1s data to backfill"),
+    devices: int = typer.Option(2, help="Number of simulated devices"),
+    workers: int = typer.Option(4, help="Chunks decompressed/recompressed in parallel"),
+    chunk_order: bool = typer.Option(True, help="Sort batches by (chunk, id, time)"),
+):
+    """Backfill historical data into compressed chunks: pause policy, decompress, COPY, recompress in parallel."""
+    import utils.backfill as bf
+
+    bf.run(
+        days_ago=days_ago,
+        days=days,
+        devices=devices,
+        workers=workers,
+        chunk_order=chunk_order,
+    )
+
+
 #############################
 # Interactive setup         #
 #############################
@@ -428,11 +973,14 @@ ACTIONS = {
     "t6": ["run", "plot_raw_all", "plot_average_all", "plot_custom"],
     "t7": ["run", "plot_downsampled_all", "plot_average_all", "plot_histogram"],
     "t8": ["run", "init_cagg", "plot_all"],
+    "s3": ["run", "run_pipeline", "run_unnest"],
+    "s4": ["run", "run_binary", "run_stream", "run_adaptive"],
     "s6": ["run", "plot_raw_all", "plot_average_all"],
     "s7": ["run", "plot_downsampled_all", "plot_average_all", "plot_histogram"],
     "s8": ["run", "init_cagg", "plot_all"],
     "bonus-kaggle": [
         "ingest_copy_kaggle_solution",
+        "ingest_staged_kaggle_solution",
         "plot_downsampled_all",
     ],
 }
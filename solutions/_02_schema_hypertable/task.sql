@@ -30,7 +30,8 @@ WITH (
 
 -- Explicitly create the index as well, although it should be created automatically with the hypertable above by timescale,
 -- You might want other indexes as well depending on your query patterns and additional columns
-CREATE INDEX ON sensors (id, "time" ASC);
+-- Unique, so a reading is stored once: ON CONFLICT (id, time) and the merge ingest (utils/staging.py) rely on it
+CREATE UNIQUE INDEX sensors_id_time_key ON sensors (id, "time" ASC);
 
 /********************************
   SET CHUNK TIME INTERVAL. Default is 7 days, if you don't set it explicitly. But good to be explicit. and know about it.
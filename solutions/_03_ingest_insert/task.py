@@ -3,36 +3,43 @@
 This solution improves upon the basic row-by-row INSERT approach by constructing
 a single INSERT statement for each batch of generated data, significantly reducing
 the number of database round-trips and improving ingestion performance.
-Additionally, it reuses the same database connection and cursor for each batch,
-which further optimizes the process.
+Additionally, it borrows the database connection from the connection pool instead
+of opening a new one, which further optimizes the process. When to commit is up
+to a CommitPolicy (rows, bytes or seconds per transaction, or adaptive).
 """
 
 
 import datetime as dt
-import io  # Needed to handle the CSV string
-import csv  # Needed to parse the CSV string into rows
+from contextlib import nullcontext
 
-from utils.db import get_connection
+import numpy as np
 
-# Assuming generate_csv_lines_batch is your generator function
-from utils.generator import generate_csv_lines_batch
+from utils.commit_policy import CommitPolicy
+from utils.db import get_connection, pooled_connection
+
+# The generator yields SensorBatch objects (time/id/value arrays), no CSV to re-parse
+from utils.generator import generate_array_batches
 from utils.decorators import time_execution
+from utils.ingest import insert_pipeline
+from utils.sinks import PostgresInsertSink
 
 
-def build_insert_query(rows):
+def build_insert_query(batch):
     """
-    Constructs a single INSERT query for multiple rows with ON CONFLICT DO NOTHING.
+    Constructs a single INSERT query for all rows of a SensorBatch with ON CONFLICT DO NOTHING.
     """
-    if not rows:
+    if not len(batch):
         return None
 
-    value_strings = []
-    for time_str, id_str, value_str in rows:
-        # Quote the time and use standard literal for id and value
-        # Note: Time strings generated by isoformat() are safe to quote directly.
-        value_strings.append(f"('{time_str}', {id_str}, {value_str})")
-
-    values_clause = ",\n".join(value_strings)
+    # Format all timestamps in one vectorized call. Quote the time and use standard
+    # literals for id and value. ISO timestamps are safe to quote directly.
+    stamps = np.datetime_as_string(batch.time, unit="us").tolist()
+    values_clause = ",\n".join(
+        f"('{time_str}+00:00', {sensor_id}, {value})"
+        for time_str, sensor_id, value in zip(
+            stamps, batch.id.tolist(), batch.value.tolist()
+        )
+    )
 
     query = f"""
         INSERT INTO sensors (time, id, value)
@@ -44,46 +51,98 @@ def build_insert_query(rows):
 
 
 @time_execution()
-def ingest_insert_commit_solution(cur, sql_query):
+def ingest_insert_commit_solution(sink, batch):
     """
     This function is only split from ingest_insert_solution() for timing purposes.
+    The default sink executes build_insert_query(batch) and commits per its policy.
     """
-    cur.execute(sql_query)
+    sink.write(batch)
 
 
-def ingest_insert_solution():
-    for csv_block in generate_csv_lines_batch(
-        devices=2,
-        step_sec=1,
-        batch_size=15000,
-        start=dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=100),
-        end=dt.datetime.now(dt.timezone.utc),
-        drift_per_day=0.01,
-        jitter_frac=0.3,
-    ):
+def print_commit(rows, total, seconds):
+    print(f"💾 Committed {rows:,} rows in {seconds:.2f}s ({total:,} total)")
 
-        num_lines = len(csv_block.splitlines())
-        print(f"\n🧬 Generated {num_lines} lines of sample data")
 
-        with get_connection() as conn, conn.cursor() as cur:
-            csv_reader = csv.reader(io.StringIO(csv_block))
-            rows = list(
-                csv_reader
-            )  # List of lists/tuples: [('time', 'id', 'value'), ...]
+def ingest_insert_solution(policy=None, sink=None):
+    """
+    Pass another `sink` (utils.sinks) to run the same pipeline into a file, memory
+    or nowhere; the pooled connection is only borrowed for the default sink.
+    """
+    with pooled_connection() if sink is None else nullcontext() as conn:
+        # Default: one literal INSERT and one commit per generated batch
+        sink = sink or PostgresInsertSink(
+            build_sql=build_insert_query,
+            conn=conn,
+            policy=policy or CommitPolicy(max_rows=15000),
+            synchronous_commit=True,
+            on_commit=print_commit,
+        )
+
+        with sink:
+            for batch in generate_array_batches(
+                devices=2,
+                step_sec=1,
+                batch_size=15000,
+                start=dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=100),
+                end=dt.datetime.now(dt.timezone.utc),
+                drift_per_day=0.01,
+                jitter_frac=0.3,
+            ):
+
+                print(f"\n🧬 Generated {len(batch)} rows of sample data")
+
+                ingest_insert_commit_solution(sink, batch)
+                print(f"📦 Ingested ~{len(batch)} rows.\n")
+
+
+def ingest_insert_pipeline_solution(
+    mode="values", rows_per_statement=1000, policy=None
+):
+    """
+    Same data, but rows are bound as parameters instead of formatted into the SQL,
+    statements are prepared once on the server and sent in pipeline mode, so there
+    is no round trip per statement. mode: "values" or "unnest".
+    """
+    start = dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=100)
+    end = dt.datetime.now(dt.timezone.utc)
+
+    with get_connection() as conn:
+        insert_pipeline(
+            conn,
+            generate_array_batches(
+                devices=2,
+                step_sec=1,
+                batch_size=15000,
+                start=start,
+                end=end,
+                drift_per_day=0.01,
+                jitter_frac=0.3,
+            ),
+            mode=mode,
+            rows_per_statement=rows_per_statement,
+            on_commit=print_commit,
+            policy=policy,
+        )
 
-            sql_query = build_insert_query(rows)
 
-            if sql_query:
-                ingest_insert_commit_solution(cur, sql_query)
-                print(f"📦 Ingested ~{cur.rowcount} rows.\n")
+@time_execution()
+def run(policy=None, sink=None):
+    """Run the ingestion task."""
+    ingest_insert_solution(policy=policy, sink=sink)
 
-            conn.commit()
+
+@time_execution()
+def run_pipeline(policy=None):
+    """Run the ingestion task with prepared multi-row INSERTs in pipeline mode."""
+    ingest_insert_pipeline_solution(mode="values", policy=policy)
 
 
 @time_execution()
-def run():
-    """Run the ingestion task."""
-    ingest_insert_solution()
+def run_unnest(policy=None):
+    """Run the ingestion task with a prepared INSERT ... SELECT FROM unnest(arrays)."""
+    ingest_insert_pipeline_solution(
+        mode="unnest", rows_per_statement=15000, policy=policy
+    )
 
 
 if __name__ == "__main__":
@@ -4,58 +4,182 @@ You can make this faster also. The improvement here comes from
 not connecting for each batch. Further improvements could be made
 by adjusting transaction settings per batch, you could collect an spesific
 amount of data before committing, etc. Force commit on time intervals, whatever
-comes first. It really depends on your use case.
+comes first. It really depends on your use case: all functions below take a
+CommitPolicy that does exactly that (or tunes the commit size adaptively).
 """
 
 import datetime as dt
+from utils.checkpoint import checkpointed
+from utils.commit_policy import CommitPolicy
 from utils.db import get_connection
-from utils.generator import generate_csv_lines_batch
+from utils.generator import generate_array_batches
 from utils.decorators import time_execution
+from utils.ingest import copy_stream
+from utils.sinks import PostgresCopySink
 
-COPY_SQL = "COPY sensors(time, id, value) FROM STDIN WITH (FORMAT csv)"
+
+def print_commit(rows, total, seconds):
+    print(f"💾 Committed {rows:,} rows in {seconds:.2f}s ({total:,} total)")
 
 
 @time_execution()
-def ingest_copy_commit_solution(cur, rows, conn):
+def ingest_copy_commit_solution(sink, batch):
     """
     This function is only split from ingest_copy_solution() for timing purposes.
+    `batch` is a SensorBatch; it is only turned into CSV text at the sink. The
+    default sink is a PostgresCopySink: COPY per batch, SET LOCAL synchronous_commit
+    = OFF per transaction and a commit whenever its CommitPolicy says so.
+    """
+    sink.write(batch)
+    print(f"📦 Ingested ~{len(batch):,} rows.")
+
+
+def _generate_batches(start=None, end=None):
+    end = end or dt.datetime.now(dt.timezone.utc)
+    start = start or end - dt.timedelta(days=100)
+    return generate_array_batches(
+        devices=2,
+        step_sec=1,
+        batch_size=15_000,
+        start=start,
+        end=end,
+        drift_per_day=0.01,
+        jitter_frac=0.3,
+    )
+
+
+def _resumable_batches(sink, stream, resume, checkpoint):
+    """
+    The generated batches, checkpointed in Postgres (utils.checkpoint) with
+    `checkpoint` or `resume`. The seeded generator only needs its time window to
+    produce the same rows again, so that is stored with the checkpoint; `resume`
+    skips the rows committed before.
+    """
+    end = dt.datetime.now(dt.timezone.utc)
+    start = end - dt.timedelta(days=100)
+
+    def make_batches(meta):
+        return _generate_batches(
+            dt.datetime.fromisoformat(meta["start"]),
+            dt.datetime.fromisoformat(meta["end"]),
+        )
+
+    meta = {"start": start.isoformat(), "end": end.isoformat()}
+    return checkpointed(sink, stream, make_batches, meta, resume, checkpoint)
+
+
+@time_execution(sync=True)
+def ingest_copy_solution(policy=None, sink=None, resume=False, checkpoint=False):
+    """
+    Single connection reused across batches (inside the sink). Pass another `sink`
+    (utils.sinks) to run the same pipeline into a file, memory or nowhere.
+    With `checkpoint` the progress is recorded after every commit; with `resume`,
+    an interrupted (checkpointed) run continues after its last commit.
+    """
+    # Default: one commit per generated batch
+    sink = sink or PostgresCopySink(
+        fmt="csv",
+        policy=policy or CommitPolicy(max_rows=15_000),
+        on_commit=print_commit,
+    )
+
+    batches = _resumable_batches(
+        sink, "s4.ingest_copy_solution", resume, checkpoint
+    )
+    with sink:
+        for batch in batches:
+            print(f"\n🧬 Generated {len(batch)} rows of sample data")
+            ingest_copy_commit_solution(sink, batch)  # ⬅️ one batch
+
+
+@time_execution()
+def ingest_copy_binary_commit_solution(sink, batch):
     """
-    # Optional speed tweak per batch (applies to this transaction only)
-    cur.execute("SET LOCAL synchronous_commit = OFF")
+    Binary twin of ingest_copy_commit_solution(). The SensorBatch arrays are packed
+    straight into a binary COPY buffer: no text formatting here, no parsing on the server.
+    """
+    sink.write(batch)
+    print(f"📦 Ingested ~{len(batch):,} rows.")
 
-    with cur.copy(COPY_SQL) as cp:
-        cp.write(rows)
 
-    conn.commit()
+@time_execution(sync=True)
+def ingest_copy_binary_solution(
+    policy=None, sink=None, resume=False, checkpoint=False
+):
+    """
+    Same data model as ingest_copy_solution(), but generated as NumPy arrays and sent
+    with COPY ... (FORMAT binary) instead of CSV text. Resumable the same way.
+    """
+    sink = sink or PostgresCopySink(
+        fmt="binary",
+        policy=policy or CommitPolicy(max_rows=15_000),
+        on_commit=print_commit,
+    )
 
-    nrows = rows.count("\n")
-    print(f"📦 Ingested ~{nrows:,} rows.")
+    batches = _resumable_batches(
+        sink, "s4.ingest_copy_binary_solution", resume, checkpoint
+    )
+    with sink:
+        for batch in batches:
+            ingest_copy_binary_commit_solution(sink, batch)  # ⬅️ one batch
 
 
 @time_execution(sync=True)
-def ingest_copy_solution():
+def ingest_copy_stream_solution(commit_rows=1_000_000, buffer_rows=10_000, policy=None):
+    """
+    One long COPY per commit instead of one COPY per 15k batch. The generator feeds
+    the COPY in small binary buffers that are sent while the next one is generated,
+    so memory stays flat no matter how large `commit_rows` is. A `policy` replaces
+    `commit_rows`.
+    """
     start = dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=100)
     end = dt.datetime.now(dt.timezone.utc)
 
-    # Single connection + cursor reused across batches
-    with get_connection() as conn, conn.cursor() as cur:
-        for csv_block in generate_csv_lines_batch(
-            devices=2,
-            step_sec=1,
-            batch_size=15_000,
-            start=start,
-            end=end,
-            drift_per_day=0.01,
-            jitter_frac=0.3,
-        ):
-            num_lines = len(csv_block.splitlines())
-            print(f"\n🧬 Generated {num_lines} lines of sample data")
-            ingest_copy_commit_solution(cur, csv_block, conn)  # ⬅️ one batch
-
-
-def run():
+    with get_connection() as conn:
+        copy_stream(
+            conn,
+            generate_array_batches(
+                devices=2,
+                step_sec=1,
+                batch_size=buffer_rows,
+                start=start,
+                end=end,
+                drift_per_day=0.01,
+                jitter_frac=0.3,
+            ),
+            commit_rows=commit_rows,
+            buffer_rows=buffer_rows,
+            on_commit=print_commit,
+            policy=policy,
+        )
+    if policy is not None and policy.adaptive:
+        print(f"🎯 Adaptive commit size: {policy.summary()}")
+
+
+def run(policy=None, sink=None, resume=False, checkpoint=False):
     """Run the ingestion task."""
-    ingest_copy_solution()
+    ingest_copy_solution(
+        policy=policy, sink=sink, resume=resume, checkpoint=checkpoint
+    )
+
+
+def run_binary(policy=None, sink=None, resume=False, checkpoint=False):
+    """Run the ingestion task with binary COPY."""
+    ingest_copy_binary_solution(
+        policy=policy, sink=sink, resume=resume, checkpoint=checkpoint
+    )
+
+
+def run_stream(policy=None):
+    """Run the ingestion task as a streaming binary COPY."""
+    ingest_copy_stream_solution(policy=policy)
+
+
+def run_adaptive(policy=None):
+    """Streaming binary COPY that tunes its commit size to this machine."""
+    ingest_copy_stream_solution(
+        policy=policy or CommitPolicy(max_rows=50_000, adaptive=True)
+    )
 
 
 if __name__ == "__main__":
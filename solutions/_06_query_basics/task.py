@@ -2,6 +2,8 @@
 import datetime as dt
 from utils.decorators import db_read_once, time_execution
 from utils.plots import show_xy_plot
+from utils.query_cache import cache_key, fetcher, get_cache, inclusive
+from utils.range_reader import read_range
 
 
 @time_execution(sync=True)
@@ -16,6 +18,7 @@ def plot_all(cur):
         WHERE id = %s AND time BETWEEN %s AND %s
         """
 
+    # Not cached: millions of raw rows, larger than a cache entry may be
     cur.execute(query, (id, start, end))
 
     results = cur.fetchall()
@@ -28,6 +31,27 @@ def plot_all(cur):
     return (timestamps, values)
 
 
+@time_execution(sync=True)
+@db_read_once
+def stream_all(cur, itersize=100_000):
+    """
+    Same rows as plot_all, streamed from a server-side cursor `itersize` rows at a
+    time into NumPy arrays, instead of one fetchall() of Python tuples.
+    """
+    id = 1
+    start = dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=100)
+    end = dt.datetime.now(dt.timezone.utc)
+
+    timestamps, values = read_range(cur.connection, id, start, end, itersize=itersize)
+
+    print(
+        f"🔢 Got {len(values)} rows for id={id} between {start} and {end} "
+        f"({(timestamps.nbytes + values.nbytes) / 2**20:.1f} MB as arrays)"
+    )
+
+    return (timestamps, values)
+
+
 @time_execution(sync=True)
 @db_read_once
 def average_all(cur):
@@ -38,14 +62,19 @@ def average_all(cur):
     query = """
         SELECT date_trunc('month', "time") AS month, avg(value) AS avg_value
             FROM sensors
-            WHERE id = %s AND time BETWEEN %s AND %s
+            WHERE id = %s AND time >= %s AND time < %s
             GROUP BY 1
             ORDER BY 1;
         """
 
-    cur.execute(query, (id, start, end))
-
-    results = cur.fetchall()
+    # Complete historical months come from the query cache
+    results = get_cache().rows(
+        cache_key(query, id),
+        start,
+        inclusive(end),
+        fetcher(cur, query, id),
+        bucket="month",
+    )
 
     timestamps = [row[0] for row in results]
     values = [row[1] for row in results]
@@ -67,6 +96,12 @@ def plot_raw_all():
     show_xy_plot("Sensor Raw Data", timestamps, values)
 
 
+def plot_raw_streamed(itersize=100_000):
+    """Cli function to plot stream_all"""
+    (timestamps, values) = stream_all(itersize=itersize)
+    show_xy_plot("Sensor Raw Data", timestamps, values)
+
+
 def run():
     """If you are executing the file directly => You can switch between different functions to test them."""
     # (timestamps, values) = plot_all()
@@ -2,7 +2,9 @@
 import time
 import datetime as dt
 from utils.decorators import db_read_once, time_execution
+from utils.fanout import parallel_aggregate
 from utils.plots import show_xy_plot, show_timescale_histogram
+from utils.query_cache import cache_key, fetcher, get_cache, inclusive
 
 
 @time_execution(sync=True)
@@ -20,17 +22,22 @@ def downsampled(cur):
     FROM unnest(
         (SELECT lttb(td.time, td.value, %s)
         FROM sensors AS td
-        WHERE td.id = %s AND td.time BETWEEN %s AND %s)
+        WHERE td.id = %s AND td.time >= %s AND td.time < %s)
     ) AS timevector
         """
     start_time = time.monotonic()
-    cur.execute(query, (resolution, id, start, end))
+    # lttb picks points from the whole window, so the result is cached as a whole
+    results = get_cache().whole(
+        cache_key(query, resolution, id),
+        start,
+        inclusive(end),
+        fetcher(cur, query, resolution, id),
+    )
     end_time = time.monotonic()
     sql_duration_seconds = end_time - start_time
     print(
         f"SQL Execution Time (with data transfer): {sql_duration_seconds:.4f} seconds"
     )
-    results = cur.fetchall()
 
     timestamps = [row[0] for row in results]
     values = [row[1] for row in results]
@@ -56,14 +63,40 @@ def average_all(cur):
             time_bucket('1 month', "time") AS month,
             AVG(value) AS avg_value
         FROM sensors
-        WHERE id = %s AND time BETWEEN %s AND %s
+        WHERE id = %s AND time >= %s AND time < %s
         GROUP BY 1
         ORDER BY 1;
         """
 
-    cur.execute(query, (id, start, end))
+    # Complete historical months come from the query cache
+    results = get_cache().rows(
+        cache_key(query, id),
+        start,
+        inclusive(end),
+        fetcher(cur, query, id),
+        bucket="month",
+    )
+
+    timestamps = [row[0] for row in results]
+    values = [row[1] for row in results]
 
-    results = cur.fetchall()
+    print(f"Got {len(results)} rows for id={id} between {start} and {end}")
+
+    return (timestamps, values)
+
+
+@time_execution(sync=True)
+def average_all_parallel(workers=4):
+    """
+    average_all split into one subquery per chunk, run on `workers` pooled
+    connections at once; the per-chunk sum/count/min/max of every month are
+    merged here. Useful when the server does not plan a parallel scan itself.
+    """
+    id = 1
+    start = dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=100)
+    end = dt.datetime.now(dt.timezone.utc)
+
+    results = parallel_aggregate(id, start, end, bucket="1 month", workers=workers)
 
     timestamps = [row[0] for row in results]
     values = [row[1] for row in results]
@@ -99,11 +132,15 @@ def histogram(cur):
         SELECT
             histogram(value, %s, %s, %s) AS hist
         FROM sensors
-        WHERE id = %s AND time BETWEEN %s AND %s;
+        WHERE id = %s AND time >= %s AND time < %s;
     """
 
-    cur.execute(query, (min_val, max_val, nbuckets, id, start, end))
-    result = cur.fetchone()
+    result = get_cache().whole(
+        cache_key(query, min_val, max_val, nbuckets, id),
+        start,
+        inclusive(end),
+        fetcher(cur, query, min_val, max_val, nbuckets, id, one=True),
+    )
 
     if not result or not result[0]:
         print(f"No data found for id={id} between {start} and {end}")
@@ -127,6 +164,12 @@ def plot_average_all():
     show_xy_plot("Sensor Monthly Average", timestamps, values)
 
 
+def plot_average_all_parallel(workers=4):
+    """Cli function to plot average_all_parallel"""
+    (timestamps, values) = average_all_parallel(workers=workers)
+    show_xy_plot("Sensor Monthly Average", timestamps, values)
+
+
 def plot_histogram():
     """Cli function to plot histogram"""
     (counts, min_val, max_val, nbuckets) = histogram()
@@ -2,6 +2,11 @@
 import datetime as dt
 from utils.decorators import time_execution, db_write_once, db_read_once
 from utils.plots import plot_multiple
+from utils.query_cache import cache_key, fetcher, get_cache, inclusive
+
+# The refresh policy below only recomputes buckets in the last month; older
+# buckets change only through a manual refresh_continuous_aggregate()
+CAGG_IMMUTABLE_AFTER = dt.timedelta(days=31)
 
 
 # The "time_execution" decorator will print the execution time of this function
@@ -49,17 +54,20 @@ def all(cur):
     id = 1
     start = dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=100)
     end = dt.datetime.now(dt.timezone.utc)
-    cur.execute(
-        """
+    query = """
         SELECT
             bucket, avg_value, max_value, min_value
         FROM sensors_summary_daily
-        WHERE id = %s AND bucket BETWEEN %s AND %s
+        WHERE id = %s AND bucket >= %s AND bucket < %s
         ORDER BY bucket ASC;
-        """,
-        (id, start, end),
+        """
+    rows = get_cache().rows(
+        cache_key(query, id),
+        start,
+        inclusive(end),
+        fetcher(cur, query, id),
+        immutable_after=CAGG_IMMUTABLE_AFTER,
     )
-    rows = cur.fetchall()
     times = [r[0] for r in rows]
     avg_v = [r[1] for r in rows]
     max_v = [r[2] for r in rows]
@@ -9,16 +9,15 @@ by adjusting transaction settings per batch, you could collect an spesific
 amount of data before committing, etc. Force commit on time intervals, whatever
 comes first. It really depends on your use case.
 """
-import csv
-import io
-from utils.db import get_connection
+from utils.commit_policy import CommitPolicy
+from utils.db import pooled_connection
 from utils.decorators import time_execution, db_read_once
-from datetime import timezone
+from utils.downsample import GROUPED_LTTB_SQL, downsample_many
+from utils.sinks import PostgresCopySink
 import datetime as dt
 
 from utils.plots import plot_multiple
-
-COPY_SQL = "COPY sensors(id, time, value) FROM STDIN WITH (FORMAT csv)"
+from utils.query_cache import cache_key, fetcher, get_cache, inclusive
 
 
 @time_execution(rank=False)
@@ -38,13 +37,16 @@ def downsampled(cur, id=1, start=None, end=None, resolution=300):
     FROM unnest(
         (SELECT lttb(td.time, td.value, %s)
         FROM sensors AS td
-        WHERE td.id = %s AND td.time BETWEEN %s AND %s)
+        WHERE td.id = %s AND td.time >= %s AND td.time < %s)
     ) AS timevector
         """
 
-    cur.execute(query, (resolution, id, start, end))
-
-    results = cur.fetchall()
+    results = get_cache().whole(
+        cache_key(query, resolution, id),
+        start,
+        inclusive(end),
+        fetcher(cur, query, resolution, id),
+    )
 
     timestamps = [row[0] for row in results]
     values = [row[1] for row in results]
@@ -54,63 +56,117 @@ def downsampled(cur, id=1, start=None, end=None, resolution=300):
 
 
 @time_execution(rank=False)
-def ingest_copy_kaggle_batch_solution(batch, cur, conn):
+def downsampled_many(ids, start, end, resolution=300, mode="grouped"):
+    """
+    downsampled() for several ids at once: one grouped lttb statement (or
+    concurrent pooled queries with mode="concurrent") instead of a query and a
+    connection borrow per sensor. Returns {id: (timestamps, values)}.
+    """
+    series = get_cache().whole(
+        cache_key(GROUPED_LTTB_SQL, resolution, tuple(ids)),
+        start,
+        inclusive(end),
+        lambda lo, hi: downsample_many(ids, lo, hi, resolution, mode=mode),
+    )
+    points = sum(len(values) for _, values in series.values())
+    print(f"🔢 Got {points} rows for {len(ids)} ids between {start} and {end}")
+    return series
+
+
+@time_execution(rank=False)
+def ingest_copy_kaggle_batch_solution(batch, sink):
     """
-    Commits this batch only (for timing/demo).
-    `batch`: List[Tuple[int, datetime, float]]
+    Writes this batch to the sink (for timing/demo). The default sink sends it as
+    binary COPY, no per-row csv.writer/isoformat() round trip, and commits when
+    its policy says so.
+    `batch`: SensorBatch (naive Kaggle timestamps are taken as UTC)
     """
-    # Per-transaction speed tweak
-    cur.execute("SET LOCAL synchronous_commit = OFF")
-
-    with cur.copy(COPY_SQL) as cp:
-        buf = io.StringIO()
-        w = csv.writer(buf, lineterminator="\n")
-        for sensor_id, ts, value in batch:
-            if ts.tzinfo is None:
-                ts = ts.replace(tzinfo=timezone.utc)
-            # order: id, time, value  (matches COPY columns)
-            w.writerow((sensor_id, ts.isoformat(), value))
-        cp.write(buf.getvalue())
-
-    conn.commit()
+    sink.write(batch)
     print(f"📦 Ingested ~{len(batch):,} rows.\n")
 
 
 @time_execution(sync=True)
-def ingest_copy_kaggle_solution():
-    from utils.disk import read_csv_in_batches
+def ingest_copy_kaggle_solution(
+    policy=None, sink=None, resume=False, chunk_order=False, checkpoint=False
+):
+    """
+    With `checkpoint` the progress is recorded after every commit; with `resume`,
+    an interrupted (checkpointed) load skips the rows it already committed. With
+    `chunk_order`, every 100k-row batch (about 12 weekly chunks) is sorted by
+    (chunk, id, time) and sent as one COPY per chunk (utils.chunks). The flag is
+    part of the checkpoint meta and the rows are reordered before the committed
+    ones are skipped, so a resumed load replays the stream in its original order.
+    """
+    from utils.checkpoint import checkpointed
+    from utils.disk import read_wide_csv_batches
+
+    def make_batches(meta):
+        batches = read_wide_csv_batches(meta["path"], batch_size=batch_size)
+        if not meta.get("chunk_order"):
+            return batches
+        from utils.chunks import chunk_interval, chunk_ordered
+
+        with pooled_connection() as conn:
+            return chunk_ordered(batches, chunk_interval(conn))
 
     csv_path = "data/kaggle_power_consumption.csv"  # "data/sensors_sample_data.csv"
-    batch_size = 15_000
+    batch_size = 100_000
+    # Default: one commit per batch
+    policy = policy or CommitPolicy(max_rows=batch_size)
+    sink = sink or PostgresCopySink(fmt="binary", policy=policy)
+
+    # Columnar reader: timestamps parsed once per chunk, sensor columns unpivoted
+    # with NumPy, so batches arrive as SensorBatch arrays ready for COPY
+    batches = checkpointed(
+        sink,
+        f"kaggle:{csv_path}",
+        make_batches,
+        {"path": csv_path, "chunk_order": chunk_order},
+        resume,
+        checkpoint,
+    )
+    with sink:
+        for batch in batches:
+            ingest_copy_kaggle_batch_solution(batch, sink)
+    print(f"💾 {sink.stats()}")
 
-    with get_connection() as conn, conn.cursor() as cur:
-        for batch in read_csv_in_batches(csv_path, batch_size=batch_size):
-            # print(batch)
-            ingest_copy_kaggle_batch_solution(batch, cur, conn)
+
+@time_execution(sync=True)
+def ingest_staged_kaggle_solution():
+    """
+    Server-side alternative: the raw file goes to an UNLOGGED staging table with
+    COPY and Postgres unpivots it into sensors, the client does no parsing at all.
+    """
+    from utils.staging import copy_wide_csv_staged
+
+    csv_path = "data/kaggle_power_consumption.csv"
+    with pooled_connection() as conn:
+        rows = copy_wide_csv_staged(conn, csv_path)
+    print(f"💾 Unpivoted {rows:,} rows from {csv_path} on the server")
 
 
 def get_downsampled():
     """Cli function to plot all Kaggle sensors downsampled"""
     start = dt.datetime(2017, 1, 1, tzinfo=dt.timezone.utc)
     end = dt.datetime(2017, 12, 30, tzinfo=dt.timezone.utc)
-    series = []
 
     # Since we are not using any sensor metadata table for simplicity, we just hardcode the sensor names here
-    for index, sensor_name in enumerate(
-        [
-            "Temperature",
-            "Humidity",
-            "WindSpeed",
-            "GeneralDiffuseFlows",
-            "DiffuseFlows",
-            "PowerConsumption_Zone1",
-            "PowerConsumption_Zone2",
-            "PowerConsumption_Zone3",
-        ]
-    ):
-        (timestamps, values) = downsampled(
-            id=index + 1, start=start, end=end, resolution=300
-        )
+    sensor_names = [
+        "Temperature",
+        "Humidity",
+        "WindSpeed",
+        "GeneralDiffuseFlows",
+        "DiffuseFlows",
+        "PowerConsumption_Zone1",
+        "PowerConsumption_Zone2",
+        "PowerConsumption_Zone3",
+    ]
+    ids = [index + 1 for index in range(len(sensor_names))]
+    downsampled_series = downsampled_many(ids, start, end, resolution=300)
+
+    series = []
+    for id, sensor_name in zip(ids, sensor_names):
+        (timestamps, values) = downsampled_series[id]
         serie = {
             "kind": "line",
             "x": timestamps,
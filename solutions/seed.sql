@@ -31,7 +31,8 @@ WITH (
 );
 
 -- Explicitly create the index as well, although it should be created automatically with the hypertable above by timescale
-CREATE INDEX ON sensors (id, "time" ASC);
+-- Unique, so a reading is stored once: ON CONFLICT (id, time) and the merge ingest (utils/staging.py) rely on it
+CREATE UNIQUE INDEX sensors_id_time_key ON sensors (id, "time" ASC);
 
 /********************************
   ADD COMPRESSION POLICY
@@ -0,0 +1,153 @@
+import contextlib
+import threading
+
+import numpy as np
+import pytest
+
+import utils.query_cache
+from utils.batch import SensorBatch
+
+
+@pytest.fixture(autouse=True)
+def _query_cache_in_tmp(tmp_path, monkeypatch):
+    """Keep every test away from the user's query cache file and its marker."""
+    monkeypatch.setenv("QUERY_CACHE_PATH", str(tmp_path / "query_cache.pkl"))
+    monkeypatch.setattr(utils.query_cache, "_cache", None)
+
+
+def make_batch(n, offset=0):
+    """`n` rows of sensor 1, one second apart from `offset`, values offset..offset+n-1."""
+    return SensorBatch(
+        np.arange(offset, offset + n).astype("datetime64[s]"),
+        np.ones(n, np.int32),
+        np.arange(offset, offset + n, dtype=np.float64),
+    )
+
+
+def sql_text(query) -> str:
+    """A statement as text, whether it is a str or a psycopg sql.Composable."""
+    return query if isinstance(query, str) else query.as_string(None)
+
+
+class FakeConn:
+    """
+    Stand-in for a psycopg connection, no Postgres involved. Records every
+    statement with its parameters (`statements`), what was committed
+    (`committed`), COPY FROM payloads (`copied`), commits and rollbacks.
+
+    `results` maps a substring of the SQL to the rows its statement returns: a
+    list, or a callable(sql, params) for answers that depend on the parameters.
+    `copy_out` are the messages a COPY ... TO STDOUT yields. Every cursor opened
+    is kept in `cursors`. One instance can be shared by threads and by code that
+    opens it several times.
+    """
+
+    def __init__(self, results=None, rowcount=0, copy_out=()):
+        self.results = results or {}
+        self.rowcount = rowcount
+        self.copy_out = list(copy_out)
+        self.statements, self.committed, self.pending = [], [], []
+        self.cursors = []
+        self.copied = b""
+        self.commits = self.rollbacks = 0
+        self.autocommit = self.closed = False
+        self._lock = threading.Lock()
+
+    def run(self, query, params=None):
+        """Record one statement and return the rows configured for it."""
+        text = sql_text(query)
+        with self._lock:
+            self.statements.append((text, params))
+            self.pending.append((text, params))
+        for key, rows in self.results.items():
+            if key in text:
+                return list(rows(text, params) if callable(rows) else rows)
+        return []
+
+    def sql(self, contains=""):
+        """Texts of the statements recorded so far that contain `contains`."""
+        return [text for text, _ in self.statements if contains in text]
+
+    def execute(self, query, params=None, **kwargs):
+        cur = self.cursor()
+        cur.execute(query, params)
+        return cur
+
+    def cursor(self, name=None, binary=False):
+        cur = FakeCursor(self, name, binary)
+        with self._lock:
+            self.cursors.append(cur)
+        return cur
+
+    def commit(self):
+        with self._lock:
+            self.commits += 1
+            self.committed += self.pending
+            self.pending = []
+
+    def rollback(self):
+        with self._lock:
+            self.rollbacks += 1
+            self.pending = []
+
+    def close(self):
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class _FakeAdapters:
+    def register_loader(self, name, loader):
+        self.loader = (name, loader)
+
+
+class FakeCursor:
+    def __init__(self, conn, name=None, binary=False):
+        self.conn, self.name, self.binary = conn, name, binary
+        self.rows, self.fetches = [], []
+        self.rowcount = conn.rowcount
+        self.adapters = _FakeAdapters()
+
+    def execute(self, query, params=None, **kwargs):
+        self.rows = self.conn.run(query, params)
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+    def fetchmany(self, size):
+        self.fetches.append(size)
+        block, self.rows = self.rows[:size], self.rows[size:]
+        return block
+
+    @contextlib.contextmanager
+    def copy(self, query, **kwargs):
+        self.conn.run(query)
+        yield _FakeCopy(self.conn)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class _FakeCopy:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def write(self, data):
+        self.conn.copied += bytes(data)
+
+    def __iter__(self):
+        return iter(self.conn.copy_out)
@@ -0,0 +1,86 @@
+import datetime as dt
+
+import numpy as np
+import pytest
+
+import utils.backfill as bf
+from tests.conftest import FakeConn
+from utils.batch import SensorBatch
+from utils.sinks import MemorySink
+
+START = dt.datetime(2025, 1, 1, tzinfo=dt.timezone.utc)
+
+CATALOG = {
+    "timescaledb_information.jobs": [(1000,)],
+    "timescaledb_information.chunks": [("_timescaledb_internal._hyper_1_1_chunk",)],
+}
+
+
+@pytest.fixture
+def conn(monkeypatch):
+    conn = FakeConn(results=dict(CATALOG))
+    monkeypatch.setattr(bf, "get_connection", lambda: conn)
+    return conn
+
+
+def _log(conn):
+    """The first 40 characters of every statement, whitespace collapsed."""
+    return [" ".join(text.split())[:40] for text in conn.sql()]
+
+
+def _batches(fail=False):
+    yield SensorBatch(
+        np.array([START.replace(tzinfo=None)], "datetime64[us]"), [1], [1.0]
+    )
+    if fail:
+        raise RuntimeError("load failed")
+
+
+def test_backfill_decompresses_loads_recompresses_and_resumes_jobs(conn):
+    sink = MemorySink()
+    report = bf.backfill(
+        _batches(), START, START, sink=sink, workers=1, chunk_order=False
+    )
+
+    steps = [s for s in _log(conn) if "CALL" in s or "alter_job" in s]
+    assert steps == [
+        "SELECT alter_job(%s, scheduled => false)",
+        "CALL convert_to_rowstore(%s::regclass)",
+        "CALL convert_to_columnstore(%s::regclass",
+        "SELECT alter_job(%s, scheduled => true)",
+    ]
+    assert report["rows"] == 1 and report["paused_jobs"] == [1000]
+
+
+def test_failed_load_still_recompresses_and_resumes_jobs(conn):
+    with pytest.raises(RuntimeError):
+        bf.backfill(
+            _batches(fail=True), START, START, sink=MemorySink(), chunk_order=False
+        )
+
+    log = _log(conn)
+    assert log[-2].startswith("CALL convert_to_columnstore")
+    assert log[-1] == "SELECT alter_job(%s, scheduled => true)"
+
+
+def test_failed_decompression_recompresses_only_the_converted_chunks(conn):
+    chunks = [
+        "_timescaledb_internal._hyper_1_1_chunk",
+        "_timescaledb_internal._hyper_1_2_chunk",
+    ]
+    conn.results["timescaledb_information.chunks"] = [(c,) for c in chunks]
+
+    def convert(text, params):
+        if "convert_to_rowstore" in text and params == (chunks[1],):
+            raise RuntimeError("could not decompress")
+        return []
+
+    conn.results["CALL"] = convert
+    sink = MemorySink()
+    with pytest.raises(RuntimeError, match="could not decompress"):
+        bf.backfill(_batches(), START, START, sink=sink, workers=2, chunk_order=False)
+
+    recompressed = [p for t, p in conn.statements if "convert_to_columnstore" in t]
+    assert recompressed == [(chunks[0],)]
+    assert sink.rows == 0
+    assert _log(conn)[-1] == "SELECT alter_job(%s, scheduled => true)"
@@ -0,0 +1,43 @@
+import datetime as dt
+
+import numpy as np
+import pytest
+
+from utils.batch import SensorBatch
+
+
+def make_batch(n=5):
+    times = np.datetime64("2025-01-01T00:00:00", "us") + np.arange(n) * np.timedelta64(
+        1, "s"
+    )
+    return SensorBatch(times, np.arange(n) % 2, np.arange(n) * 1.5)
+
+
+def test_slicing_is_a_zero_copy_view():
+    batch = make_batch()
+    view = batch[1:4]
+
+    assert len(view) == 3
+    assert np.shares_memory(view.value, batch.value)
+    assert view.id.tolist() == [1, 0, 1]
+    assert len(batch[-1]) == 1 and batch[-1].value[0] == 6.0
+
+
+def test_column_lengths_must_match():
+    with pytest.raises(ValueError):
+        SensorBatch(np.zeros(2, "datetime64[us]"), [1], [1.0, 2.0])
+
+
+def test_rows_and_csv_round_trip():
+    ts = dt.datetime(2025, 1, 1, 12, tzinfo=dt.timezone.utc)
+    batch = SensorBatch.from_rows([(3, ts, 1.25), (4, ts.replace(tzinfo=None), 2.5)])
+
+    assert batch.to_rows() == [(ts, 3, 1.25), (ts, 4, 2.5)]
+    assert batch.to_csv().splitlines()[0] == "2025-01-01T12:00:00.000000+00:00,3,1.25"
+
+
+def test_concat():
+    batch = make_batch()
+    joined = SensorBatch.concat([batch[:2], batch[2:]])
+    assert np.array_equal(joined.value, batch.value)
+    assert len(SensorBatch.concat([])) == 0
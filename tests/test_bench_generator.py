@@ -0,0 +1,38 @@
+import random
+
+import pytest
+
+from benchmarks.generator_micro import GENERATORS, run, run_case
+
+
+@pytest.mark.parametrize("name", list(GENERATORS))
+def test_every_generator_reports_all_rows(name):
+    r = run_case(name, n=2_000, devices=4, jitter_frac=0.3, batch_size=500)
+
+    assert r["rows"] == 2_000
+    assert r["rows_per_s"] > 0
+    assert r["alloc_bytes_per_row"] > 0
+    if name != "simulate_temp_sensor":
+        assert r["bytes"] > 0
+
+
+def test_simulate_temp_sensor_runs_once_per_device_count():
+    report = run(
+        generators=["simulate_temp_sensor"],
+        devices=[2],
+        jitters=[0.0, 0.3],
+        n=200,
+        allocations=False,
+        out=None,
+    )
+
+    assert [(r["devices"], r["jitter_frac"]) for r in report["runs"]] == [(2, None)]
+
+
+def test_simulate_leaves_the_global_random_state_alone():
+    random.seed(1)
+    state = random.getstate()
+
+    run_case("simulate_temp_sensor", n=100, devices=2, jitter_frac=0.0, batch_size=None)
+
+    assert random.getstate() == state
@@ -0,0 +1,55 @@
+from benchmarks.ingest_matrix import compare, run
+
+
+def _run(strategy, batch_size, sync, rows_per_s):
+    return {
+        "strategy": strategy,
+        "batch_size": batch_size,
+        "synchronous_commit": sync,
+        "rows_per_s": rows_per_s,
+    }
+
+
+def test_compare_matches_runs_by_strategy_batch_size_and_sync():
+    baseline = {
+        "runs": [
+            _run("copy_binary", 15_000, False, 100_000),
+            _run("copy_binary", 15_000, True, 50_000),
+        ]
+    }
+    report = {
+        "runs": [
+            _run("copy_binary", 15_000, False, 150_000),
+            _run("copy_csv", 15_000, False, 80_000),  # not in the baseline
+        ]
+    }
+
+    changes = compare(report, baseline)
+
+    assert len(changes) == 1
+    assert changes[0]["baseline_rows_per_s"] == 100_000
+    assert changes[0]["change_pct"] == 50.0
+
+
+def test_matrix_runs_the_null_and_memory_sinks_once_per_batch_size():
+    report = run(
+        strategies=["null", "memory"],
+        batch_sizes=[1_000, 5_000],
+        sync_commits=[True, False],
+        days=0.1,
+        devices=2,
+        out=None,
+    )
+
+    rows = report["meta"]["rows"]
+    assert rows > 0
+    assert [(r["strategy"], r["batch_size"]) for r in report["runs"]] == [
+        ("null", 1_000),
+        ("null", 5_000),
+        ("memory", 1_000),
+        ("memory", 5_000),
+    ]
+    for r in report["runs"]:
+        assert r["rows"] == rows and r["table_bytes"] == 0
+        assert r["synchronous_commit"] == "n/a"
+        assert r["batches"] == -(-rows // r["batch_size"])
@@ -0,0 +1,70 @@
+import contextlib
+
+from tests.conftest import FakeConn, make_batch
+from utils import checkpoint as checkpoint_module
+from utils.checkpoint import Checkpoint, checkpointed, skip_rows
+from utils.commit_policy import CommitPolicy
+from utils.sinks import PostgresCopySink
+
+
+def _saved(conn):
+    """(position, finished) of the checkpoint saves that were committed."""
+    return [
+        (params[2], params[4])
+        for text, params in conn.committed
+        if "ingest_checkpoints" in text
+    ]
+
+
+def test_skip_rows_resumes_inside_a_batch():
+    batches = [make_batch(4), make_batch(4, 4), make_batch(4, 8)]
+
+    rest = list(skip_rows(batches, 6))
+
+    assert [len(b) for b in rest] == [2, 4]
+    assert rest[0].value[0] == 6.0
+
+
+def test_sink_saves_position_with_every_commit():
+    conn = FakeConn()
+    checkpoint = Checkpoint("test", position=100)
+    sink = PostgresCopySink(
+        conn=conn, policy=CommitPolicy(max_rows=5), checkpoint=checkpoint
+    )
+    with sink:
+        for offset in range(0, 12, 3):
+            sink.write(make_batch(3, offset))
+
+    # Commits at 6 and 12 rows (after full batches), the clean close marks it finished
+    assert _saved(conn) == [(106, False), (112, False), (112, True)]
+    assert checkpoint.position == 112 and checkpoint.finished
+
+
+def test_failed_transaction_keeps_the_last_committed_position():
+    conn = FakeConn()
+    checkpoint = Checkpoint("test")
+    sink = PostgresCopySink(conn=conn, checkpoint=checkpoint)
+    try:
+        with sink:
+            sink.write(make_batch(3))
+            raise RuntimeError("crash before the commit")
+    except RuntimeError:
+        pass
+
+    assert _saved(conn) == [] and checkpoint.position == 0
+
+
+def test_checkpointed_only_records_progress_when_asked(monkeypatch):
+    conn = FakeConn()
+    monkeypatch.setattr(
+        checkpoint_module, "pooled_connection", lambda: contextlib.nullcontext(conn)
+    )
+    make_batches = lambda meta: [make_batch(4)]
+
+    sink = PostgresCopySink(conn=FakeConn())
+    assert len(list(checkpointed(sink, "test", make_batches))) == 1
+    assert sink.checkpoint is None and conn.statements == []
+
+    checkpointed(sink, "test", make_batches, checkpoint=True)
+    assert sink.checkpoint.stream == "test"
+    assert len(conn.sql("INSERT INTO ingest_checkpoints")) == 1
@@ -0,0 +1,42 @@
+import datetime as dt
+
+import numpy as np
+
+from utils.batch import SensorBatch
+from utils.chunks import chunk_index, chunk_ordered, order_by_chunk
+
+WEEK = dt.timedelta(days=7)
+
+
+def _shuffled(n=1_000, weeks=5, seed=1):
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2025-01-01T00:00:00", "us")
+    times = start + rng.integers(0, weeks * 7 * 86_400, n) * np.timedelta64(1, "s")
+    return SensorBatch(times, rng.integers(0, 4, n), rng.random(n))
+
+
+def test_chunks_are_aligned_to_the_unix_epoch():
+    # 1970-01-01 was a Thursday: weekly chunks start on Thursdays
+    times = np.array(["1970-01-07T23:59:59", "1970-01-08T00:00:00"], "datetime64[us]")
+    assert chunk_index(times, WEEK).tolist() == [0, 1]
+    assert chunk_index(np.array(["1969-12-31"], "datetime64[us]"), WEEK)[0] == -1
+
+
+def test_order_by_chunk_sorts_by_chunk_id_time():
+    batch = _shuffled()
+    ordered = order_by_chunk(batch, WEEK)
+    keys = list(zip(chunk_index(ordered.time, WEEK), ordered.id, ordered.time))
+
+    assert keys == sorted(keys)
+    assert sorted(ordered.to_rows()) == sorted(batch.to_rows())
+
+
+def test_chunk_ordered_yields_one_batch_per_chunk():
+    batches = [_shuffled(seed=1), _shuffled(seed=2)]
+
+    parts = list(chunk_ordered(batches, WEEK))
+
+    assert sum(len(p) for p in parts) == 2_000
+    assert all(len(set(chunk_index(p.time, WEEK))) == 1 for p in parts)
+    # Reordered within an input batch only: 5-6 chunks per batch
+    assert 10 <= len(parts) <= 12
@@ -0,0 +1,66 @@
+import pytest
+
+from utils.commit_policy import CommitPolicy
+
+
+def test_due_on_first_limit_reached():
+    policy = CommitPolicy(max_rows=100, max_bytes=1_000)
+    policy.begin()
+    assert not policy.due()
+
+    policy.add(50, 500)
+    assert not policy.due()
+    assert policy.room() == 50
+
+    policy.add(10, 600)  # bytes limit hit before rows
+    assert policy.due()
+
+    policy.commit(seconds=0.5)
+    assert policy.rows == 0 and not policy.due()
+    assert policy.history[0]["rows_per_s"] == 120
+
+
+def test_due_on_max_seconds():
+    policy = CommitPolicy(max_rows=None, max_seconds=1.0)
+    policy.begin()
+    policy.add(1)
+    assert not policy.due()
+    assert policy.room() is None
+
+    policy.opened_at -= 2
+    assert policy.due()
+
+
+def test_adaptive_grows_until_plateau():
+    policy = CommitPolicy(max_rows=10_000, adaptive=True, min_rows=1_000)
+
+    def commit_at(rows_per_s):
+        policy.add(policy.max_rows)
+        policy.commit(seconds=policy.max_rows / rows_per_s)
+
+    commit_at(100_000)
+    assert policy.max_rows == 20_000
+    commit_at(150_000)
+    assert policy.max_rows == 40_000
+    commit_at(152_000)  # no real gain: keep the smaller size
+    assert policy.max_rows == 20_000
+    assert policy.converged
+
+    commit_at(300_000)
+    assert policy.max_rows == 20_000
+
+
+def test_adaptive_backs_off_on_slow_commit():
+    policy = CommitPolicy(max_rows=100_000, adaptive=True, target_seconds=1.0)
+    policy.add(100_000)
+    policy.commit(seconds=2.0)
+    assert policy.max_rows == 50_000
+
+
+def test_clone_resets_state_and_adaptive_needs_rows():
+    policy = CommitPolicy(max_rows=10)
+    policy.add(5)
+    assert policy.clone().rows == 0
+
+    with pytest.raises(ValueError):
+        CommitPolicy(max_rows=None, adaptive=True)
@@ -0,0 +1,57 @@
+import numpy as np
+
+from utils.batch import SensorBatch
+from utils.disk import read_csv_in_batches, read_wide_csv_batches
+
+WIDE_CSV = """Datetime,Temperature,Humidity,Zone 1
+1/1/2017 0:00,6.559,73.8,34055.7
+1/1/2017 0:10,6.414,,29814.7
+1/1/2017 0:20,n/a,74.5,29128.1
+1/2/2017 13:30,5.865,74.5,err
+"""
+
+
+def test_wide_reader_matches_row_mapper(tmp_path):
+    path = tmp_path / "wide.csv"
+    path.write_text(WIDE_CSV)
+
+    expected = SensorBatch.concat(
+        [SensorBatch.from_rows(b) for b in read_csv_in_batches(str(path), 5)]
+    )
+    batches = list(read_wide_csv_batches(str(path), batch_size=6))
+    batch = SensorBatch.concat(batches)
+
+    assert len(batches) == 2  # two long rows of three sensors per chunk
+    assert batch.to_rows() == expected.to_rows()
+    # The first data row is included and ids are header positions
+    assert batch.id[:3].tolist() == [1, 2, 3]
+    assert batch.value[0] == 6.559
+    assert len(batch) == 9
+    assert not np.isnan(batch.value).any()
+
+
+def test_wide_reader_iso_timestamps(tmp_path):
+    path = tmp_path / "iso.csv"
+    path.write_text("ts,a\n2025-01-01T00:00:00+01:00,1.0\n")
+
+    (batch,) = read_wide_csv_batches(str(path), time_column="ts", time_format=None)
+
+    assert batch.time[0] == np.datetime64("2024-12-31T23:00:00", "us")
+
+
+def test_wide_reader_skips_rows_without_a_timestamp(tmp_path):
+    path = tmp_path / "gaps.csv"
+    path.write_text("Datetime,a,b\n1/1/2017 0:00,1,2\n,3,4\n1/1/2017 0:20,5,6\n")
+
+    (batch,) = read_wide_csv_batches(str(path))
+
+    assert batch.value.tolist() == [1.0, 2.0, 5.0, 6.0]
+    assert batch.time[-1] == np.datetime64("2017-01-01T00:20", "us")
+
+    path.write_text("ts,a\n2025-01-01T00:00:00Z,1\n,2\n")
+    (batch,) = read_wide_csv_batches(str(path), time_column="ts", time_format=None)
+    assert batch.value.tolist() == [1.0]
+
+    path.write_text("Datetime,a\n,1\n")
+    (batch,) = read_wide_csv_batches(str(path))
+    assert len(batch) == 0
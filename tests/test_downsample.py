@@ -0,0 +1,45 @@
+import datetime as dt
+
+import pytest
+
+import utils.downsample as ds
+from tests.conftest import FakeConn
+
+T0 = dt.datetime(2025, 1, 1, tzinfo=dt.timezone.utc)
+T1 = T0 + dt.timedelta(hours=1)
+
+
+def _one_sensor(text, params):
+    id = params[1]
+    return [(T0, float(id))] if id != 2 else []
+
+
+@pytest.fixture
+def conn(monkeypatch):
+    """Answers the grouped and the per-sensor lttb query."""
+    conn = FakeConn(
+        results={
+            "GROUP BY id": [(1, T0, 1.0), (1, T1, 2.0), (3, T0, 5.0)],
+            "lttb": _one_sensor,
+        }
+    )
+    monkeypatch.setattr(ds, "pooled_connection", lambda: conn)
+    return conn
+
+
+def test_grouped_is_one_statement_for_all_ids(conn):
+    series = ds.downsample_many([1, 2, 3], T0, T1, 300)
+
+    [(text, params)] = conn.statements
+    assert "GROUP BY id" in text and params == (300, [1, 2, 3], T0, T1)
+    assert series == {1: ([T0, T1], [1.0, 2.0]), 2: ([], []), 3: ([T0], [5.0])}
+
+
+def test_concurrent_runs_one_query_per_id(conn):
+    series = ds.downsample_many([1, 2, 3], T0, T1, 300, mode="concurrent", workers=2)
+
+    assert sorted(params[1] for _, params in conn.statements) == [1, 2, 3]
+    assert series == {1: ([T0], [1.0]), 2: ([], []), 3: ([T0], [3.0])}
+
+    with pytest.raises(ValueError):
+        ds.downsample_many([1], T0, T1, mode="serial")
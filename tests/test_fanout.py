@@ -0,0 +1,50 @@
+import datetime as dt
+
+import utils.fanout as fo
+from tests.conftest import FakeConn
+
+T0 = dt.datetime(2025, 1, 1, tzinfo=dt.timezone.utc)
+FEB = dt.datetime(2025, 2, 1, tzinfo=dt.timezone.utc)
+WEEK = dt.timedelta(days=7)
+
+
+def test_merge_partials_combines_buckets_across_chunks():
+    chunk_1 = [(T0, 10.0, 4, 1.0, 4.0)]
+    chunk_2 = [(T0, 6.0, 2, 0.5, 3.5), (FEB, 9.0, 3, 2.0, 4.0)]
+
+    assert fo.merge_partials([chunk_2, chunk_1, []]) == [
+        (T0, 16.0 / 6, 0.5, 4.0, 6),
+        (FEB, 3.0, 2.0, 4.0, 3),
+    ]
+
+
+def _first_and_last_second(text, params):
+    lo, hi = params[-2:]
+    return [(lo, 1.0), (hi - dt.timedelta(seconds=1), 2.0)]
+
+
+def test_parallel_rows_splits_on_chunks_and_keeps_order(monkeypatch):
+    # Two weekly chunks; every subquery returns its first and last second
+    conn = FakeConn(
+        results={
+            "timescaledb_information.chunks": [
+                (T0, T0 + WEEK),
+                (T0 + WEEK, T0 + 2 * WEEK),
+            ],
+            "FROM sensors": _first_and_last_second,
+        }
+    )
+    monkeypatch.setattr(fo, "pooled_connection", lambda: conn)
+    start, end = T0 + dt.timedelta(days=1), T0 + dt.timedelta(days=10)
+
+    rows = fo.parallel_rows(7, start, end, workers=2)
+
+    # One subquery per chunk, clipped to the window
+    subqueries = [params for text, params in conn.statements if "ORDER BY time" in text]
+    assert sorted(subqueries) == [(7, start, T0 + WEEK), (7, T0 + WEEK, end)]
+    assert [t for t, _ in rows] == [
+        start,
+        T0 + WEEK - dt.timedelta(seconds=1),
+        T0 + WEEK,
+        end - dt.timedelta(seconds=1),
+    ]
@@ -0,0 +1,89 @@
+import datetime as dt
+
+import numpy as np
+
+from utils.generator import (
+    generate_array_batches,
+    generate_csv_lines_batch,
+    generate_sharded_batches,
+)
+
+START = dt.datetime(2025, 1, 1, tzinfo=dt.timezone.utc)
+END = START + dt.timedelta(hours=6)
+
+
+def test_numpy_engine_batches_and_row_order():
+    batches = list(
+        generate_array_batches(n=25, start=START, end=END, devices=3, batch_size=10)
+    )
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+
+    times, ids, values = batches[0].time, batches[0].id, batches[0].value
+    assert times.dtype == np.dtype("datetime64[us]")
+    assert ids.tolist() == [0, 1, 2, 0, 1, 2, 0, 1, 2, 0]
+    # All devices share a timestamp within one time step
+    assert times[0] == times[1] == times[2] < times[3]
+    assert np.all(np.abs(values - 10) < 3)
+
+
+def test_numpy_engine_is_deterministic_and_bounded_by_end():
+    kwargs = dict(start=START, end=END, devices=2, step_sec=60, batch_size=100)
+    first = [b.value for b in generate_array_batches(**kwargs)]
+    second = [b.value for b in generate_array_batches(**kwargs)]
+    assert all(np.array_equal(a, b) for a, b in zip(first, second))
+
+    last_times = [b.time for b in generate_array_batches(**kwargs)][-1]
+    assert last_times.max() <= np.datetime64(END.replace(tzinfo=None), "us")
+
+
+def test_numpy_engine_csv_format():
+    block = next(
+        generate_csv_lines_batch(
+            n=4, start=START, end=END, devices=2, batch_size=10, engine="numpy"
+        )
+    )
+    lines = block.splitlines()
+    assert len(lines) == 4
+    time_str, did, value = lines[0].split(",")
+    assert dt.datetime.fromisoformat(time_str) == START
+    assert did == "0"
+    float(value)
+
+
+def test_sharded_output_is_independent_of_worker_count():
+    kwargs = dict(
+        start=START, end=END, devices=3, step_sec=1, batch_size=5000, shard_rows=4000
+    )
+    one = list(generate_sharded_batches(**kwargs, workers=1))
+    two = list(generate_sharded_batches(**kwargs, workers=2))
+
+    assert [len(b) for b in one] == [len(b) for b in two]
+    for b1, b2 in zip(one, two):
+        assert np.array_equal(b1.time, b2.time)
+        assert np.array_equal(b1.id, b2.id)
+        assert np.array_equal(b1.value, b2.value)
+
+    times = np.concatenate([b.time for b in one])
+    assert np.all(np.diff(times.astype(np.int64)) >= 0)
+
+
+def test_sharded_unordered_and_count_limit():
+    kwargs = dict(start=START, end=END, devices=3, step_sec=1, shard_rows=4000)
+    ordered = sum(len(b) for b in generate_sharded_batches(**kwargs, workers=2))
+    unordered = sum(
+        len(b) for b in generate_sharded_batches(**kwargs, workers=2, ordered=False)
+    )
+    assert ordered == unordered
+
+    limited = generate_sharded_batches(**kwargs, workers=2, n=12345, batch_size=1000)
+    assert sum(len(b) for b in limited) == 12345
+
+
+def test_sharded_and_array_batches_agree_on_a_single_instant():
+    kwargs = dict(start=START, end=START, devices=3, batch_size=10)
+    array = list(generate_array_batches(**kwargs))
+    sharded = list(generate_sharded_batches(**kwargs, workers=1))
+
+    assert [len(b) for b in array] == [len(b) for b in sharded] == [3]
+    assert np.array_equal(array[0].time, sharded[0].time)
+    assert sharded[0].id.tolist() == [0, 1, 2]
@@ -0,0 +1,89 @@
+import utils.parallel_csv as pc
+from tests.conftest import FakeConn
+from utils.batch import SensorBatch
+from utils.disk import read_wide_csv_batches
+from utils.parallel_csv import range_batches, split_ranges
+from utils.staging import read_header
+
+WIDE_CSV = "Datetime,a,b\n" + "".join(
+    f"1/{day}/2017 {hour}:00,{day}.5,{hour}\n"
+    for day in range(1, 10)
+    for hour in range(24)
+)
+
+
+def test_ranges_are_newline_aligned_and_cover_all_lines(tmp_path):
+    path = tmp_path / "wide.csv"
+    path.write_text(WIDE_CSV.rstrip("\n"))  # no newline at the end
+    data = path.read_bytes()
+
+    ranges = split_ranges(str(path), range_bytes=100)
+
+    assert len(ranges) > 5
+    assert ranges[0][0] == data.index(b"\n") + 1
+    assert ranges[-1][1] == len(data)
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start and data[end - 1 : end] == b"\n"
+
+
+def test_range_batches_match_sequential_reader(tmp_path):
+    path = tmp_path / "wide.csv"
+    path.write_text(WIDE_CSV)
+    data = path.read_bytes()
+    header = read_header(str(path))
+
+    batches = [
+        b
+        for start, end in split_ranges(str(path), range_bytes=500)
+        for b in range_batches(data[start:end], header, batch_size=50)
+    ]
+
+    expected = SensorBatch.concat(list(read_wide_csv_batches(str(path))))
+    assert SensorBatch.concat(batches).to_rows() == expected.to_rows()
+
+
+def _flaky_load(task):
+    """Range 1 fails once, range 2 always fails, the others load 10 rows."""
+    if task["index"] == 2 or (task["index"] == 1 and task["attempt"] == 0):
+        raise RuntimeError(f"range {task['index']} attempt {task['attempt']}")
+    return {
+        "index": task["index"],
+        "rows": 10 * (task["attempt"] + 1),
+        "bytes": task["end"] - task["start"],
+        "seconds": 0.0,
+    }
+
+
+def test_failed_ranges_are_retried_then_reported(tmp_path, monkeypatch):
+    path = tmp_path / "wide.csv"
+    path.write_text(WIDE_CSV)
+    ranges = split_ranges(str(path), range_bytes=1_000)
+    conn = FakeConn()
+    monkeypatch.setattr(pc, "pooled_connection", lambda: conn)
+    monkeypatch.setattr(pc, "_load_range", _flaky_load)
+
+    report = pc.parallel_csv_copy(
+        str(path), workers=2, range_bytes=1_000, retries=2, on_progress=None
+    )
+
+    assert report["ranges"] == len(ranges) > 3
+    # Range 1 loads on its first retry (20 rows), range 2 never loads
+    assert report["rows"] == 10 * (len(ranges) - 2) + 20
+    [failed] = report["failed"]
+    assert (failed["index"], failed["start"], failed["end"]) == (2, *ranges[2])
+    assert failed["error"] == "range 2 attempt 2"
+    assert conn.sql("DELETE FROM ingest_checkpoints")
+
+
+def test_retry_backs_off_in_the_worker(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(pc.time, "sleep", sleeps.append)
+    monkeypatch.setattr(pc, "get_connection", FakeConn)
+    monkeypatch.setattr(pc, "_conn", None)
+    monkeypatch.setattr(pc, "_copy_range", lambda conn, *args: 5)
+    task = dict(index=0, path="x.csv", start=0, end=10, header=[], options={})
+
+    assert pc._load_range({**task, "attempt": 0})["rows"] == 5
+    pc._load_range({**task, "attempt": 2})
+
+    assert sleeps == [2 * pc.RETRY_BACKOFF]
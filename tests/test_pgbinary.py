@@ -0,0 +1,63 @@
+import datetime as dt
+import struct
+
+import numpy as np
+import pytest
+
+from utils.pgbinary import (
+    COPY_BINARY_HEADER,
+    COPY_BINARY_TRAILER,
+    ROW_SIZE,
+    decode_copy_binary,
+    decode_copy_rows,
+    encode_copy_binary,
+)
+
+
+def test_encode_copy_binary_layout():
+    times = np.array(["2000-01-01T00:00:01", "2025-01-01T00:00:00.5"], "datetime64[us]")
+    ids = np.array([1, 7], dtype=np.int32)
+    values = np.array([1.5, -2.25])
+
+    buf = encode_copy_binary(times, ids, values)
+
+    assert buf.startswith(COPY_BINARY_HEADER)
+    assert buf.endswith(COPY_BINARY_TRAILER)
+    assert len(buf) == len(COPY_BINARY_HEADER) + 2 * ROW_SIZE + len(COPY_BINARY_TRAILER)
+
+    first = buf[len(COPY_BINARY_HEADER) : len(COPY_BINARY_HEADER) + ROW_SIZE]
+    assert struct.unpack("!hiqiiid", first) == (3, 8, 1_000_000, 4, 1, 8, 1.5)
+
+    second = struct.unpack("!hiqiiid", buf[len(COPY_BINARY_HEADER) + ROW_SIZE : -2])
+    pg_epoch = dt.datetime(2000, 1, 1, tzinfo=dt.timezone.utc)
+    expected = dt.datetime(2025, 1, 1, 0, 0, 0, 500000, tzinfo=dt.timezone.utc)
+    assert pg_epoch + dt.timedelta(microseconds=second[2]) == expected
+    assert second[4:] == (7, 8, -2.25)
+
+
+def test_encode_copy_binary_without_framing():
+    times = np.zeros(3, dtype="datetime64[us]")
+    buf = encode_copy_binary(
+        times, np.arange(3), np.ones(3), header=False, trailer=False
+    )
+    assert len(buf) == 3 * ROW_SIZE
+
+
+def test_decode_copy_binary_round_trip():
+    times = np.array(["1999-12-31T23:59:59", "2025-01-01T00:00:00.5"], "datetime64[us]")
+    ids = np.array([3, 9], dtype=np.int32)
+    values = np.array([0.25, -7.0])
+
+    decoded = decode_copy_binary(encode_copy_binary(times, ids, values))
+
+    assert decoded[0].tolist() == times.tolist()
+    assert decoded[1].tolist() == [3, 9] and decoded[1].dtype == np.int32
+    assert decoded[2].tolist() == [0.25, -7.0]
+
+    # A NULL value (length -1) is not the fixed layout
+    row = bytearray(
+        encode_copy_binary(times[:1], ids[:1], values[:1], header=False, trailer=False)
+    )
+    row[-12:] = struct.pack("!i", -1)
+    with pytest.raises(ValueError):
+        decode_copy_rows(bytes(row) + bytes(ROW_SIZE - len(row)))
@@ -0,0 +1,122 @@
+import datetime as dt
+import os
+
+from tests.conftest import FakeConn, make_batch
+from utils.commit_policy import CommitPolicy
+from utils.query_cache import (
+    QueryCache,
+    ceil_bucket,
+    floor_bucket,
+    invalidate,
+    read_generation,
+)
+from utils.sinks import PostgresCopySink
+
+NOW = dt.datetime(2025, 6, 15, 12, 30, tzinfo=dt.timezone.utc)
+HOUR = dt.timedelta(hours=1)
+
+
+class _Table:
+    """Hourly rows (time, value) with a fetch(lo, hi) that records its ranges."""
+
+    def __init__(self, days=100):
+        first = floor_bucket(NOW - dt.timedelta(days=days + 10), HOUR)
+        self.rows = [(first + i * HOUR, float(i)) for i in range((days + 10) * 24)]
+        self.calls = []
+
+    def fetch(self, lo, hi):
+        self.calls.append((lo, hi))
+        return [r for r in self.rows if lo <= r[0] < hi]
+
+
+def test_bucket_alignment():
+    ts = dt.datetime(2025, 3, 14, 10, 5, tzinfo=dt.timezone.utc)
+    assert floor_bucket(ts, "month") == dt.datetime(2025, 3, 1, tzinfo=dt.timezone.utc)
+    assert ceil_bucket(ts, "month") == dt.datetime(2025, 4, 1, tzinfo=dt.timezone.utc)
+    assert floor_bucket(ts, HOUR) == ts.replace(minute=0)
+    assert ceil_bucket(ts.replace(minute=0), HOUR) == ts.replace(minute=0)
+
+
+def test_sliding_window_fetches_only_the_edges():
+    table, cache = _Table(), QueryCache()
+
+    def window(now):
+        return now - dt.timedelta(days=100), now
+
+    first = cache.rows("q", *window(NOW), table.fetch, now=NOW)
+    assert first == table.fetch(*window(NOW))
+    assert cache.stats["misses"] == 1
+
+    # An hour later: same result as the database, only the new edges fetched
+    later = NOW + HOUR
+    table.calls.clear()
+    second = cache.rows("q", *window(later), table.fetch, now=later)
+    assert second == [r for r in table.rows if window(later)[0] <= r[0] < later]
+    assert cache.stats["partial_hits"] == 1
+    horizon = later - dt.timedelta(days=7)
+    assert all(hi - lo <= HOUR or lo >= horizon - HOUR for lo, hi in table.calls)
+    assert cache.stats["rows_from_cache"] > 2000
+
+
+def test_bypass_lru_and_whole_results():
+    table, cache = _Table(), QueryCache(max_entries=1)
+    start, end = NOW - dt.timedelta(days=30), NOW
+
+    cache.enabled = False
+    assert cache.rows("a", start, end, table.fetch, now=NOW) == table.fetch(start, end)
+    assert cache.stats["bypassed"] == 1 and len(cache) == 0
+
+    cache.enabled = True
+    cache.rows("a", start, end, table.fetch, now=NOW)
+    cache.rows("b", start, end, table.fetch, now=NOW)
+    assert len(cache) == 1 and cache.stats["evictions"] == 1
+
+    calls = []
+
+    def lttb(lo, hi):
+        calls.append((lo, hi))
+        return [len(calls)]
+
+    # A sliding window of the same length reuses the result within the TTL
+    minute = dt.timedelta(minutes=1)
+    assert cache.whole("lttb", start, end, lttb, now=NOW) == [1]
+    assert cache.whole(
+        "lttb", start + minute, end + minute, lttb, now=NOW + minute
+    ) == [1]
+    assert cache.whole("lttb", start, end - HOUR, lttb, now=NOW) == [2]
+    # An older window of the same length is a different result
+    day = dt.timedelta(days=1)
+    assert cache.whole("lttb", start - day, end - day, lttb, now=NOW) == [3]
+    assert cache.whole("lttb", start - day, end - day, lttb, now=NOW) == [3]
+    assert cache.summary()["hit_rate"] > 0
+
+
+def test_saved_cache_is_dropped_after_an_invalidation():
+    path = os.environ["QUERY_CACHE_PATH"]
+    table, writer = _Table(), QueryCache(path=path)
+    start = NOW - dt.timedelta(days=30)
+    writer.rows("a", start, NOW, table.fetch, now=NOW)
+    assert not os.path.exists(path)  # saved on save() (at exit), not per query
+
+    writer.save()
+    reader = QueryCache(path=path)
+    assert len(reader) == 1
+
+    # Another process truncates or reloads history: both caches drop their entries
+    invalidate()
+    assert reader._get("a") is None
+    writer.save()
+    assert len(QueryCache(path=path)) == 0
+
+
+def test_only_writes_into_cached_history_invalidate():
+    path = os.environ["QUERY_CACHE_PATH"]
+    now = dt.datetime.now(dt.timezone.utc)
+
+    invalidate(now - dt.timedelta(days=1))
+    assert read_generation(path) == ""
+
+    sink = PostgresCopySink(conn=FakeConn(), policy=CommitPolicy(max_rows=10))
+    with sink:
+        sink.write(make_batch(10))  # 1970
+    assert read_generation(path) != ""
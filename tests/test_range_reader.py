@@ -0,0 +1,80 @@
+import datetime as dt
+import struct
+
+import numpy as np
+
+import utils.range_reader as rr
+from tests.conftest import FakeConn
+from utils.batch import SensorBatch
+from utils.pgbinary import (
+    COPY_BINARY_HEADER,
+    PG_EPOCH_OFFSET_US,
+    ROW_SIZE,
+    encode_copy_binary,
+)
+
+START = dt.datetime(2025, 1, 1, tzinfo=dt.timezone.utc)
+END = dt.datetime(2025, 2, 1, tzinfo=dt.timezone.utc)
+
+
+def test_loader_reads_binary_timestamptz():
+    loader = rr._PgMicrosLoader(0)
+    assert loader.load(struct.pack(">q", -5)) == -5
+    assert loader.load(struct.pack(">q", 2**40)) == 2**40
+
+
+def test_read_range_streams_into_growing_arrays():
+    # 2025-01-01 00:00:00 UTC in PostgreSQL epoch microseconds, then 1s steps
+    t0 = int(np.datetime64("2025-01-01", "us").astype("int64")) - PG_EPOCH_OFFSET_US
+    rows = [(t0 + i * 1_000_000, float(i)) for i in range(25)]
+    conn = FakeConn(results={"FROM sensors": rows})
+
+    times, values = rr.read_range(conn, 1, None, None, itersize=10, capacity=4)
+
+    assert len(times) == 25 and times.dtype == np.dtype("datetime64[us]")
+    assert times[0] == np.datetime64("2025-01-01T00:00:00")
+    assert times[-1] == np.datetime64("2025-01-01T00:00:24")
+    assert values.tolist() == [float(i) for i in range(25)]
+    # Trimmed copies, not views of the grown buffers
+    assert times.base is None and values.base is None
+    assert "ORDER BY time" in conn.sql()[0]
+    [cur] = conn.cursors
+    assert cur.name and cur.binary and cur.fetches == [10] * 4
+
+    conn = FakeConn(results={"FROM sensors": rows})
+    blocks = list(rr.iter_range(conn, 1, None, None, itersize=10))
+    assert [len(t) for t, _ in blocks] == [10, 10, 5]
+
+
+def _messages(buf):
+    """COPY TO STDOUT as the server sends it: the header, one message per row, the trailer."""
+    header = len(COPY_BINARY_HEADER)
+    rows = buf[header:-2]
+    return [
+        buf[:header],
+        *(rows[i : i + ROW_SIZE] for i in range(0, len(rows), ROW_SIZE)),
+        buf[-2:],
+    ]
+
+
+def test_copy_range_decodes_the_binary_stream():
+    times = np.arange(50).astype("datetime64[s]").astype("datetime64[us]")
+    ids = np.arange(50) % 3
+    values = np.arange(50) / 4
+    conn = FakeConn(copy_out=_messages(encode_copy_binary(times, ids, values)))
+
+    batches = list(
+        rr.iter_copy_range(conn, START, END, [1, 2], chunk_bytes=10 * ROW_SIZE)
+    )
+    batch = SensorBatch.concat(batches)
+
+    assert [len(b) for b in batches] == [10] * 5
+    assert batch.time.tolist() == times.tolist()
+    assert batch.id.tolist() == ids.tolist()
+    assert batch.value.tolist() == values.tolist()
+    assert "TO STDOUT (FORMAT binary)" in conn.sql()[0]
+    assert "ANY('{1,2}'" in conn.sql()[0]
+
+    empty_stream = _messages(encode_copy_binary(times[:0], ids[:0], values[:0]))
+    empty = rr.copy_range(FakeConn(copy_out=empty_stream), START, END)
+    assert len(empty) == 0
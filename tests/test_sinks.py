@@ -0,0 +1,118 @@
+import time
+
+import pytest
+
+from tests.conftest import FakeConn, make_batch
+from utils.commit_policy import CommitPolicy
+from utils.pgbinary import COPY_BINARY_HEADER, COPY_BINARY_TRAILER, ROW_SIZE
+from utils.sinks import (
+    FileSink,
+    MemorySink,
+    NullSink,
+    PostgresCopySink,
+    PostgresInsertSink,
+    PostgresMergeSink,
+    Sink,
+    make_sink,
+)
+
+
+def test_memory_and_null_sinks_count_rows():
+    with MemorySink() as memory, NullSink(fmt="binary") as null:
+        for i in range(3):
+            memory.write(make_batch(10, i * 10))
+            null.write(make_batch(10, i * 10))
+
+    assert len(memory.batch) == memory.rows == null.rows == 30
+    assert null.nbytes == 3 * (
+        len(COPY_BINARY_HEADER) + 10 * ROW_SIZE + len(COPY_BINARY_TRAILER)
+    )
+
+
+def test_file_sink_writes_one_binary_copy_stream(tmp_path):
+    path = tmp_path / "sensors.bin"
+    with make_sink(f"file:{path}") as sink:
+        sink.write(make_batch(5))
+        sink.write(make_batch(7, 5))
+
+    data = path.read_bytes()
+    assert data.startswith(COPY_BINARY_HEADER) and data.endswith(COPY_BINARY_TRAILER)
+    assert len(data) == len(COPY_BINARY_HEADER) + 12 * ROW_SIZE + 2
+
+
+def test_postgres_sink_commits_per_policy_and_rolls_back_on_error():
+    conn = FakeConn()
+    with PostgresCopySink(conn=conn, policy=CommitPolicy(max_rows=20)) as sink:
+        for i in range(5):
+            sink.write(make_batch(10, i * 10))
+    # 2 full commits of 20 rows, then the remaining 10 rows on exit
+    assert conn.commits == 3 and conn.rollbacks == 0
+
+    conn = FakeConn()
+    with pytest.raises(RuntimeError):
+        with PostgresCopySink(conn=conn, policy=CommitPolicy(max_rows=20)) as sink:
+            sink.write(make_batch(10))
+            raise RuntimeError("generator failed")
+    assert conn.commits == 0 and conn.rollbacks == 1
+
+
+def test_postgres_sink_reports_database_time_not_generation_time():
+    seconds = []
+    sink = PostgresCopySink(
+        conn=FakeConn(),
+        policy=CommitPolicy(max_rows=20),
+        on_commit=lambda rows, total, s: seconds.append(s),
+    )
+    with sink:
+        sink.write(make_batch(10))
+        time.sleep(0.2)  # a slow generator between writes
+        sink.write(make_batch(10, 10))
+
+    assert len(seconds) == 1 and seconds[0] < 0.1
+    assert sink.policy.history[0]["seconds"] == seconds[0]
+
+
+def test_merge_sink_stages_and_merges_before_every_commit():
+    conn = FakeConn(rowcount=10)
+    with PostgresMergeSink(conn=conn, policy=CommitPolicy(max_rows=20)) as sink:
+        for i in range(3):
+            sink.write(make_batch(10, i * 10))
+
+    copies = [sql for sql in conn.sql() if sql.startswith("COPY")]
+    merges = conn.sql("ON CONFLICT (id, time)")
+    assert all("sensors_merge_staging" in sql for sql in copies) and len(copies) == 3
+    # Index + staging table setup, then one merge per commit (20 rows, then 10)
+    assert len(merges) == 2 and conn.commits == 3
+    assert sink.stats()["merged"] == 20
+
+
+def test_make_sink_rejects_unknown_specs():
+    assert isinstance(make_sink("null"), NullSink)
+    assert isinstance(make_sink("file:out.csv"), FileSink)
+    assert make_sink("merge:csv").copy_sql.endswith("(FORMAT csv)")
+    with pytest.raises(ValueError):
+        make_sink("copy:xml")
+
+
+def test_sink_subclasses_must_implement_write():
+    class Incomplete(Sink):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_insert_sink_sends_the_short_last_chunk_through_unnest():
+    conn = FakeConn()
+    sink = PostgresInsertSink(
+        mode="values", rows_per_statement=10, conn=conn, policy=CommitPolicy()
+    )
+    with sink:
+        sink.write(make_batch(25))
+
+    inserts = conn.sql("INSERT INTO sensors")
+    assert [("unnest" in sql, sql.count("(%b, %b, %b)")) for sql in inserts] == [
+        (False, 10),
+        (False, 10),
+        (True, 0),
+    ]
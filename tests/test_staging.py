@@ -0,0 +1,24 @@
+from tests.conftest import FakeConn
+from utils.staging import copy_wide_csv_staged, unpivot_insert_sql
+
+
+def test_unpivot_sql_uses_header_positions_as_ids():
+    query = unpivot_insert_sql(["Temperature", "Datetime", "Zone 1"], "staging")
+    text = query.as_string(None)
+
+    assert '(0, s."Temperature"), (2, s."Zone 1")' in text
+    assert 'to_timestamp(s."Datetime"' in text
+
+
+def test_raw_file_is_copied_unmodified_then_dropped(tmp_path):
+    path = tmp_path / "wide.csv"
+    data = b"Datetime,a,b\n" + b"1/1/2017 0:00,1,2\n" * 100
+    path.write_bytes(data)
+    conn = FakeConn(rowcount=42)
+
+    rows = copy_wide_csv_staged(conn, str(path), chunk_bytes=64)
+
+    assert rows == 42 and conn.commits == 1
+    assert conn.copied == data
+    assert conn.sql()[3].startswith('CREATE UNLOGGED TABLE "sensors_wide_staging"')
+    assert conn.sql()[-1] == 'DROP TABLE "sensors_wide_staging"'
@@ -0,0 +1,165 @@
+import asyncio
+import datetime as dt
+import sys
+import time
+from typing import Iterable, Iterator, Literal
+
+import numpy as np
+
+from utils.batch import SensorBatch
+from utils.commit_policy import CommitPolicy
+from utils.db import get_async_connection
+from utils.generator import generate_array_batches
+from utils.ingest import COPY_SQL
+from utils.query_cache import invalidate
+
+
+def _next_encoded(
+    batches: Iterator[SensorBatch], fmt: Literal["csv", "binary"]
+) -> tuple[int, bytes | str, np.datetime64 | None] | None:
+    """
+    Generate and encode the next batch: (rows, data, oldest time). Runs in the
+    executor, off the event loop.
+    """
+    batch = next(batches, None)
+    if batch is None:
+        return None
+    data = batch.to_copy_binary() if fmt == "binary" else batch.to_csv()
+    return len(batch), data, batch.time.min() if len(batch) else None
+
+
+async def _producer(
+    batches: Iterator[SensorBatch],
+    q: asyncio.Queue,
+    fmt: Literal["csv", "binary"],
+    consumers: int,
+):
+    loop = asyncio.get_running_loop()
+    while True:
+        item = await loop.run_in_executor(None, _next_encoded, batches, fmt)
+        if item is None:
+            break
+        await q.put(item)
+    for _ in range(consumers):
+        await q.put(None)
+
+
+async def _consumer(
+    index: int, q: asyncio.Queue, sql: str, stats: list, policy: CommitPolicy
+):
+    worker = stats[index]
+    oldest = None
+    seconds = 0.0  # COPY + commit time of the open transaction
+
+    async def commit():
+        nonlocal oldest, seconds
+        t0 = time.perf_counter()
+        await conn.commit()
+        seconds += time.perf_counter() - t0
+        if oldest is not None:
+            invalidate(oldest)
+            oldest = None
+        worker["rows"] += policy.rows
+        worker["commits"] += 1
+        policy.commit(seconds)
+        seconds = 0.0
+
+    async with await get_async_connection() as conn:
+        async with conn.cursor() as cur:
+            policy.begin()
+            while True:
+                item = await q.get()
+                if item is None:
+                    break
+                nrows, buf, low = item
+                if not policy.rows:
+                    await cur.execute("SET LOCAL synchronous_commit = OFF")
+                t0 = time.perf_counter()
+                async with cur.copy(sql) as cp:
+                    await cp.write(buf)
+                seconds += time.perf_counter() - t0
+                policy.add(nrows, len(buf))
+                if low is not None:
+                    oldest = low if oldest is None else min(oldest, low)
+                if policy.due():
+                    await commit()
+            if policy.rows:
+                await commit()
+
+
+async def async_copy(
+    batches: Iterable[SensorBatch],
+    *,
+    concurrency: int = 2,
+    fmt: Literal["csv", "binary"] = "binary",
+    prefetch: int | None = None,
+    policy: CommitPolicy | None = None,
+) -> dict:
+    """
+    Async COPY ingest on psycopg AsyncConnection.
+
+    A producer generates and encodes the next batch in the default thread pool
+    executor while up to `concurrency` batches are in flight (one AsyncConnection
+    each, one COPY per batch). Each connection commits when its clone of `policy`
+    says so (default: after every batch). Encoded batches wait in a queue of
+    `prefetch` items (default: `concurrency`), so the socket is never idle waiting
+    for the generator and the generator never idles waiting on conn.commit().
+
+    Any failure cancels the other tasks (asyncio.TaskGroup) and is re-raised.
+    """
+    if fmt not in COPY_SQL:
+        raise ValueError(f"Unknown COPY format {fmt!r}, use one of {list(COPY_SQL)}")
+    q: asyncio.Queue = asyncio.Queue(maxsize=prefetch or concurrency)
+    stats = [{"worker": i, "rows": 0, "commits": 0} for i in range(concurrency)]
+    sql = COPY_SQL[fmt]
+    # max_rows=1: any batch makes the transaction due, i.e. one commit per batch
+    policy = policy or CommitPolicy(max_rows=1)
+
+    t0 = time.monotonic()
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(_producer(iter(batches), q, fmt, concurrency))
+        for i in range(concurrency):
+            tg.create_task(_consumer(i, q, sql, stats, policy.clone()))
+    seconds = time.monotonic() - t0
+
+    rows = sum(w["rows"] for w in stats)
+    return {
+        "concurrency": concurrency,
+        "rows": rows,
+        "seconds": round(seconds, 4),
+        "rows_per_s": round(rows / seconds) if seconds else 0,
+        "per_worker": stats,
+    }
+
+
+def run(
+    concurrency: int = 2,
+    days: float = 10,
+    devices: int = 2,
+    step_sec: int = 1,
+    batch_size: int = 50_000,
+    fmt: Literal["csv", "binary"] = "binary",
+) -> dict:
+    """Generate `days` of seeded data and ingest it with `async_copy`."""
+    if sys.platform == "win32":
+        # psycopg async does not work with the default ProactorEventLoop on Windows
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+    end = dt.datetime.now(dt.timezone.utc)
+    batches = generate_array_batches(
+        start=end - dt.timedelta(days=days),
+        end=end,
+        step_sec=step_sec,
+        devices=devices,
+        batch_size=batch_size,
+        drift_per_day=0.01,
+        jitter_frac=0.3,
+    )
+
+    print(f"\n⚡ Async COPY ({fmt}) with concurrency={concurrency} ...")
+    report = asyncio.run(async_copy(batches, concurrency=concurrency, fmt=fmt))
+    print(
+        f"📊 {report['rows']:,} rows in {report['seconds']:.2f}s "
+        f"→ {report['rows_per_s']:,} rows/s"
+    )
+    return report
@@ -0,0 +1,201 @@
+import concurrent.futures as cf
+import datetime as dt
+import time
+from typing import Iterable, List
+
+from utils.batch import SensorBatch
+from utils.chunks import chunk_interval, chunk_ordered
+from utils.commit_policy import CommitPolicy
+from utils.db import get_connection
+from utils.query_cache import invalidate
+from utils.sinks import PostgresCopySink, Sink
+
+COMPRESSED_CHUNKS_SQL = """
+    SELECT format('%%I.%%I', chunk_schema, chunk_name)
+    FROM timescaledb_information.chunks
+    WHERE hypertable_name = %s
+      AND is_compressed
+      AND range_end > %s
+      AND range_start <= %s
+    ORDER BY range_start
+"""
+
+# add_columnstore_policy() schedules a policy_compression job
+POLICY_JOBS_SQL = """
+    SELECT job_id
+    FROM timescaledb_information.jobs
+    WHERE hypertable_name = %s AND proc_name = 'policy_compression' AND scheduled
+"""
+
+
+def _autocommit_connection():
+    """
+    Connection for the columnstore procedures: convert_to_rowstore/columnstore
+    are procedures that may commit, so they cannot run inside a transaction block.
+    """
+    conn = get_connection()
+    conn.autocommit = True
+    return conn
+
+
+def compressed_chunks(
+    conn, start: dt.datetime, end: dt.datetime, table: str = "sensors"
+) -> List[str]:
+    """Compressed chunks of `table` that overlap [start, end], oldest first."""
+    rows = conn.execute(COMPRESSED_CHUNKS_SQL, (table, start, end)).fetchall()
+    return [r[0] for r in rows]
+
+
+def pause_policy_jobs(conn, table: str = "sensors") -> List[int]:
+    """Unschedule the columnstore policy jobs of `table`, return their ids."""
+    jobs = [r[0] for r in conn.execute(POLICY_JOBS_SQL, (table,)).fetchall()]
+    for job_id in jobs:
+        conn.execute("SELECT alter_job(%s, scheduled => false)", (job_id,))
+    return jobs
+
+
+def resume_policy_jobs(conn, jobs: Iterable[int]):
+    """Schedule the jobs paused by pause_policy_jobs() again."""
+    for job_id in jobs:
+        conn.execute("SELECT alter_job(%s, scheduled => true)", (job_id,))
+
+
+def _convert(chunk: str, procedure: str) -> float:
+    """Run one conversion procedure on its own connection, return its seconds."""
+    t0 = time.monotonic()
+    with _autocommit_connection() as conn:
+        conn.execute(f"CALL {procedure}(%s::regclass)", (chunk,))
+    return time.monotonic() - t0
+
+
+def convert_chunks(
+    chunks: List[str],
+    procedure: str,
+    workers: int = 4,
+    converted: List[str] | None = None,
+) -> float:
+    """
+    Run convert_to_rowstore or convert_to_columnstore on every chunk, `workers`
+    chunks at a time (one connection each). Returns the wall-clock seconds.
+
+    Every chunk that was converted is appended to `converted`. If a conversion
+    fails the others still finish, then the first error is raised.
+    """
+
+    def convert(chunk):
+        _convert(chunk, procedure)
+        if converted is not None:
+            converted.append(chunk)
+
+    t0 = time.monotonic()
+    if chunks:
+        with cf.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(convert, c) for c in chunks]
+        for future in futures:
+            future.result()
+    return time.monotonic() - t0
+
+
+def backfill(
+    batches: Iterable[SensorBatch],
+    start: dt.datetime,
+    end: dt.datetime,
+    *,
+    sink: Sink | None = None,
+    workers: int = 4,
+    chunk_order: bool = True,
+    table: str = "sensors",
+) -> dict:
+    """
+    Load historical rows in [start, end] that land in compressed chunks:
+
+      1. pause the columnstore policy jobs of `table`, so they do not compress
+         chunks while the load runs
+      2. decompress only the compressed chunks overlapping [start, end]
+         (convert_to_rowstore, `workers` in parallel)
+      3. load `batches` with the fastest path: binary COPY into `sink` (default
+         1M rows per commit), ordered by (chunk, id, time) with `chunk_order`
+      4. recompress those chunks, `workers` in parallel, and resume the jobs
+
+    Step 4 also runs when the decompression or the load fails, for the chunks
+    that were decompressed, so no chunk is left decompressed and no job stays
+    paused. The query cache is invalidated, as it treats compressed history as
+    immutable. Returns a report with the chunks and seconds per step.
+    """
+    sink = sink or PostgresCopySink(
+        fmt="binary", policy=CommitPolicy(max_rows=1_000_000)
+    )
+    report = {"start": start.isoformat(), "end": end.isoformat(), "rows": 0}
+
+    with _autocommit_connection() as conn:
+        jobs = pause_policy_jobs(conn, table)
+        report["paused_jobs"] = jobs
+        try:
+            chunks = compressed_chunks(conn, start, end, table)
+            report["chunks"] = chunks
+            print(f"🧊 {len(chunks)} compressed chunk(s) overlap {start} - {end}")
+            decompressed: List[str] = []
+            try:
+                report["decompress_s"] = round(
+                    convert_chunks(
+                        chunks, "convert_to_rowstore", workers, decompressed
+                    ),
+                    4,
+                )
+                if chunk_order:
+                    batches = chunk_ordered(batches, chunk_interval(conn, table))
+                t0 = time.monotonic()
+                with sink:
+                    for batch in batches:
+                        sink.write(batch)
+                report["load_s"] = round(time.monotonic() - t0, 4)
+                report["rows"] = sink.rows
+            finally:
+                invalidate()
+                report["recompress_s"] = round(
+                    convert_chunks(
+                        [c for c in chunks if c in decompressed],
+                        "convert_to_columnstore",
+                        workers,
+                    ),
+                    4,
+                )
+        finally:
+            resume_policy_jobs(conn, jobs)
+
+    load_s = report.get("load_s")
+    report["rows_per_s"] = round(report["rows"] / load_s) if load_s else 0
+    return report
+
+
+def run(
+    days_ago: float = 30,
+    days: float = 7,
+    devices: int = 2,
+    step_sec: int = 1,
+    workers: int = 4,
+    chunk_order: bool = True,
+) -> dict:
+    """Backfill `days` of generated data ending `days_ago` days ago and print a summary."""
+    from utils.generator import generate_array_batches
+
+    end = dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=days_ago)
+    start = end - dt.timedelta(days=days)
+    batches = generate_array_batches(
+        start=start,
+        end=end,
+        step_sec=step_sec,
+        devices=devices,
+        batch_size=100_000,
+        drift_per_day=0.01,
+        jitter_frac=0.3,
+    )
+
+    print(f"\n⏪ Backfilling {start:%Y-%m-%d %H:%M} - {end:%Y-%m-%d %H:%M} ...")
+    report = backfill(batches, start, end, workers=workers, chunk_order=chunk_order)
+    print(
+        f"📊 {report['rows']:,} rows: decompress {report['decompress_s']:.2f}s, "
+        f"load {report['load_s']:.2f}s ({report['rows_per_s']:,} rows/s), "
+        f"recompress {report['recompress_s']:.2f}s"
+    )
+    return report
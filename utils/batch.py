@@ -0,0 +1,120 @@
+import datetime as dt
+from dataclasses import dataclass
+from typing import Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from utils.pgbinary import encode_copy_binary
+
+
+@dataclass(frozen=True)
+class SensorBatch:
+    """
+    A batch of sensor rows stored as three contiguous columns:
+        time  : datetime64[us] (UTC)
+        id    : int32
+        value : float64
+
+    This is what the generator yields and what the INSERT, COPY and Kaggle writers
+    consume. Slicing returns a new SensorBatch that is a zero-copy view of the same
+    arrays. Text (CSV) is only produced when a sink asks for it with `to_csv()`.
+    """
+
+    time: np.ndarray
+    id: np.ndarray
+    value: np.ndarray
+
+    def __post_init__(self):
+        # np.asarray is a no-op (no copy) when the dtype already matches
+        object.__setattr__(self, "time", np.asarray(self.time, "datetime64[us]"))
+        object.__setattr__(self, "id", np.asarray(self.id, np.int32))
+        object.__setattr__(self, "value", np.asarray(self.value, np.float64))
+        if not len(self.time) == len(self.id) == len(self.value):
+            raise ValueError(
+                f"Column lengths differ: time={len(self.time)}, "
+                f"id={len(self.id)}, value={len(self.value)}"
+            )
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def __getitem__(self, key) -> "SensorBatch":
+        """Slice (zero-copy view) or select rows with an index/mask array (copy)."""
+        if isinstance(key, (int, np.integer)):
+            key = slice(key, key + 1 or None)
+        return SensorBatch(self.time[key], self.id[key], self.value[key])
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the three columns."""
+        return self.time.nbytes + self.id.nbytes + self.value.nbytes
+
+    @classmethod
+    def empty(cls) -> "SensorBatch":
+        return cls(
+            np.empty(0, "datetime64[us]"),
+            np.empty(0, np.int32),
+            np.empty(0, np.float64),
+        )
+
+    @classmethod
+    def concat(cls, batches: Sequence["SensorBatch"]) -> "SensorBatch":
+        """Concatenate batches into one new batch (copies)."""
+        if not batches:
+            return cls.empty()
+        return cls(
+            np.concatenate([b.time for b in batches]),
+            np.concatenate([b.id for b in batches]),
+            np.concatenate([b.value for b in batches]),
+        )
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[int, dt.datetime, float]]) -> "SensorBatch":
+        """
+        Build a batch from (id, time, value) tuples, e.g. the output of
+        `utils.disk.read_csv_in_batches`. Naive datetimes are treated as UTC.
+        """
+        ids, times, values = [], [], []
+        for sensor_id, ts, value in rows:
+            if ts.tzinfo is not None:
+                ts = ts.astimezone(dt.timezone.utc).replace(tzinfo=None)
+            ids.append(sensor_id)
+            times.append(ts)
+            values.append(value)
+        return cls(np.array(times, "datetime64[us]"), ids, values)
+
+    def to_rows(self) -> List[Tuple[dt.datetime, int, float]]:
+        """(time, id, value) tuples with timezone-aware UTC datetimes, for executemany()."""
+        utc = dt.timezone.utc
+        return [
+            (t.replace(tzinfo=utc), i, v)
+            for t, i, v in zip(
+                self.time.astype(object), self.id.tolist(), self.value.tolist()
+            )
+        ]
+
+    def to_csv(self) -> str:
+        """`time,id,value` CSV lines (UTC ISO 8601 timestamps), for text sinks."""
+        stamps = np.datetime_as_string(self.time, unit="us").tolist()
+        return "".join(
+            f"{t}+00:00,{i},{v}\n"
+            for t, i, v in zip(stamps, self.id.tolist(), self.value.tolist())
+        )
+
+    def to_frame(self):
+        """pandas DataFrame with time (UTC), id and value columns."""
+        import pandas as pd
+
+        return pd.DataFrame(
+            {
+                "time": pd.to_datetime(self.time, utc=True),
+                "id": self.id,
+                "value": self.value,
+            }
+        )
+
+    def to_copy_binary(self, *, header: bool = True, trailer: bool = True) -> bytes:
+        """Binary COPY buffer for `utils.pgbinary.COPY_BINARY_SQL`."""
+        return encode_copy_binary(
+            self.time, self.id, self.value, header=header, trailer=trailer
+        )
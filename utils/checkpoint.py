@@ -0,0 +1,152 @@
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator
+
+from psycopg.types.json import Jsonb
+
+from utils.batch import SensorBatch
+from utils.db import pooled_connection
+
+CREATE_CHECKPOINT_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS ingest_checkpoints (
+        stream     text        NOT NULL,
+        part       text        NOT NULL DEFAULT '',
+        position   bigint      NOT NULL DEFAULT 0,
+        meta       jsonb       NOT NULL DEFAULT '{}',
+        finished   boolean     NOT NULL DEFAULT false,
+        updated_at timestamptz NOT NULL DEFAULT now(),
+        PRIMARY KEY (stream, part)
+    )
+"""
+
+SAVE_CHECKPOINT_SQL = """
+    INSERT INTO ingest_checkpoints (stream, part, position, meta, finished)
+    VALUES (%s, %s, %s, %s, %s)
+    ON CONFLICT (stream, part) DO UPDATE
+    SET position = EXCLUDED.position,
+        meta = EXCLUDED.meta,
+        finished = EXCLUDED.finished,
+        updated_at = now()
+"""
+
+
+def ensure_table(conn):
+    """Create the ingest_checkpoints progress table if it is missing."""
+    conn.execute(CREATE_CHECKPOINT_TABLE_SQL)
+    conn.commit()
+
+
+def clear_stream(conn, stream: str):
+    """Forget every checkpoint of `stream` (all parts)."""
+    conn.execute("DELETE FROM ingest_checkpoints WHERE stream = %s", (stream,))
+    conn.commit()
+
+
+def finished_parts(conn, stream: str) -> Dict[str, int]:
+    """part -> position of the finished parts of `stream`."""
+    rows = conn.execute(
+        "SELECT part, position FROM ingest_checkpoints "
+        "WHERE stream = %s AND finished",
+        (stream,),
+    ).fetchall()
+    return dict(rows)
+
+
+@dataclass
+class Checkpoint:
+    """
+    Last committed position of one ingest stream (rows out of a deterministic
+    generator, rows read from a file, ...), kept in the ingest_checkpoints table.
+
+    Writers call `save(cur, position)` inside the transaction that writes the data
+    and `committed(position)` after conn.commit(), so the stored position and the
+    data are committed together: after a crash, resuming from `position` neither
+    skips nor duplicates rows. `meta` holds what is needed to rebuild the same
+    stream (e.g. the generator time window); on resume the stored `meta` wins.
+    """
+
+    stream: str
+    part: str = ""
+    position: int = 0
+    meta: dict = field(default_factory=dict)
+    finished: bool = False
+
+    def open(self, conn, resume: bool = False) -> "Checkpoint":
+        """
+        Load the stored position (`resume`) or start the stream over at 0,
+        replacing any earlier checkpoint.
+        """
+        ensure_table(conn)
+        row = None
+        if resume:
+            row = conn.execute(
+                "SELECT position, meta, finished FROM ingest_checkpoints "
+                "WHERE stream = %s AND part = %s",
+                (self.stream, self.part),
+            ).fetchone()
+        if row:
+            self.position, self.meta, self.finished = row
+        else:
+            self.position, self.finished = 0, False
+            conn.execute(SAVE_CHECKPOINT_SQL, self._params(0, False))
+        conn.commit()
+        return self
+
+    def save(self, cur, position: int, finished: bool = False):
+        """Store `position` as part of the open transaction on `cur`."""
+        cur.execute(SAVE_CHECKPOINT_SQL, self._params(position, finished))
+
+    def committed(self, position: int, finished: bool = False):
+        """The transaction that saved `position` was committed."""
+        self.position, self.finished = position, finished
+
+    def finish(self, conn):
+        """Mark the stream complete, so a later resume has nothing left to do."""
+        with conn.cursor() as cur:
+            self.save(cur, self.position, finished=True)
+        conn.commit()
+        self.committed(self.position, finished=True)
+
+    def _params(self, position: int, finished: bool) -> tuple:
+        return (self.stream, self.part, position, Jsonb(self.meta), finished)
+
+
+def skip_rows(batches: Iterable[SensorBatch], rows: int) -> Iterator[SensorBatch]:
+    """Drop the first `rows` rows of a batch stream (zero-copy), e.g. to resume it."""
+    for batch in batches:
+        if rows >= len(batch):
+            rows -= len(batch)
+            continue
+        yield batch[rows:] if rows else batch
+        rows = 0
+
+
+def checkpointed(
+    sink,
+    stream: str,
+    make_batches: Callable[[dict], Iterable[SensorBatch]],
+    meta: dict | None = None,
+    resume: bool = False,
+    checkpoint: bool = False,
+) -> Iterable[SensorBatch]:
+    """
+    The batches of `make_batches(meta)` for `sink`, checkpointed as `stream` when
+    asked to (`checkpoint`, or `resume`, which keeps checkpointing) and the sink
+    writes to Postgres. `meta` must describe the stream completely (e.g. the
+    generator window): with `resume` the stored meta is used instead, and the
+    rows committed before are skipped. Otherwise the sink just gets a fresh
+    stream and ingest_checkpoints is left alone.
+    """
+    meta = meta or {}
+    if not (resume or checkpoint) or not sink.needs_database:
+        return make_batches(meta)
+
+    progress = Checkpoint(stream, meta=meta)
+    with pooled_connection() as conn:
+        progress.open(conn, resume=resume)
+    if progress.finished:
+        print(f"✅ {stream} is already complete ({progress.position:,} rows)")
+        return iter(())
+    if progress.position:
+        print(f"⏩ Resuming {stream} after {progress.position:,} committed rows")
+    sink.checkpoint = progress
+    return skip_rows(make_batches(progress.meta), progress.position)
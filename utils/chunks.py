@@ -0,0 +1,125 @@
+import datetime as dt
+from typing import Iterable, Iterator, List
+
+import numpy as np
+from psycopg import sql
+
+from utils.batch import SensorBatch
+
+EPOCH = dt.datetime(1970, 1, 1, tzinfo=dt.timezone.utc)
+
+CHUNK_INTERVAL_SQL = """
+    SELECT time_interval
+    FROM timescaledb_information.dimensions
+    WHERE hypertable_name = %s AND time_interval IS NOT NULL
+    ORDER BY dimension_number
+    LIMIT 1
+"""
+
+CHUNK_STARTS_SQL = """
+    SELECT range_start
+    FROM timescaledb_information.chunks
+    WHERE hypertable_name = %s
+"""
+
+# Id of the placeholder rows that create chunks; they are deleted right away
+PRECREATE_ID = -(2**31)
+
+
+def chunk_interval(conn, table: str = "sensors") -> dt.timedelta:
+    """Time chunk interval of a hypertable (set_chunk_time_interval, default 7 days)."""
+    row = conn.execute(CHUNK_INTERVAL_SQL, (table,)).fetchone()
+    if row is None:
+        raise ValueError(f"{table} is not a hypertable with a time dimension")
+    return row[0]
+
+
+def _interval_us(interval: dt.timedelta) -> int:
+    return interval // dt.timedelta(microseconds=1)
+
+
+def chunk_index(times: np.ndarray, interval: dt.timedelta) -> np.ndarray:
+    """
+    Chunk number of every timestamp. TimescaleDB aligns time chunks to multiples
+    of the interval since the Unix epoch, so this matches the chunk a row lands in.
+    """
+    us = np.asarray(times, "datetime64[us]").view("int64")
+    return np.floor_divide(us, _interval_us(interval))
+
+
+def order_by_chunk(batch: SensorBatch, interval: dt.timedelta) -> SensorBatch:
+    """The rows of `batch` sorted by (chunk, id, time), a copy."""
+    order = np.lexsort((batch.time, batch.id, chunk_index(batch.time, interval)))
+    return batch[order]
+
+
+def split_by_chunk(batch: SensorBatch, interval: dt.timedelta) -> List[SensorBatch]:
+    """Zero-copy views of a chunk-ordered batch, one per chunk."""
+    chunks = chunk_index(batch.time, interval)
+    cuts = np.flatnonzero(np.diff(chunks)) + 1
+    bounds = [0, *cuts.tolist(), len(batch)]
+    return [batch[a:b] for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def chunk_ordered(
+    batches: Iterable[SensorBatch], interval: dt.timedelta
+) -> Iterator[SensorBatch]:
+    """
+    Ingest stage for out-of-order input (backfills, replays, wide files): every
+    batch is sorted by (chunk, id, time) and yielded as one batch per chunk, so the
+    server routes each COPY to a single chunk and fills its (id, time) index in
+    order instead of hopping between chunks row by row. Rows are reordered within
+    a batch only, never across batches.
+    """
+    for batch in batches:
+        yield from split_by_chunk(order_by_chunk(batch, interval), interval)
+
+
+def precreate_chunks(
+    conn,
+    start: dt.datetime,
+    end: dt.datetime,
+    table: str = "sensors",
+    interval: dt.timedelta | None = None,
+) -> int:
+    """
+    Create the missing chunks covering [start, end] before a load, so chunk
+    creation (catalog writes, locks) is not paid in the middle of it. A placeholder
+    row is inserted into every missing chunk range and deleted in the same
+    transaction; the empty chunks stay. Returns the number of chunks created.
+    """
+    interval = interval or chunk_interval(conn, table)
+    step = _interval_us(interval)
+    first = _to_us(start) // step
+    last = _to_us(end) // step
+    existing = {
+        _to_us(row[0]) // step
+        for row in conn.execute(CHUNK_STARTS_SQL, (table,)).fetchall()
+    }
+    missing = [
+        EPOCH + dt.timedelta(microseconds=n * step)
+        for n in range(first, last + 1)
+        if n not in existing
+    ]
+    if missing:
+        with conn.cursor() as cur:
+            cur.execute(
+                sql.SQL(
+                    "INSERT INTO {} (time, id, value) "
+                    "SELECT t, %s, 0 FROM unnest(%s::timestamptz[]) AS t "
+                    "ON CONFLICT DO NOTHING"
+                ).format(sql.Identifier(table)),
+                (PRECREATE_ID, missing),
+            )
+            cur.execute(
+                sql.SQL("DELETE FROM {} WHERE id = %s AND time = ANY(%s)").format(
+                    sql.Identifier(table)
+                ),
+                (PRECREATE_ID, missing),
+            )
+    conn.commit()
+    return len(missing)
+
+
+def _to_us(ts: dt.datetime) -> int:
+    return (ts - EPOCH) // dt.timedelta(microseconds=1)
@@ -0,0 +1,168 @@
+import math
+import time
+from dataclasses import dataclass, field, replace
+from typing import List
+
+
+@dataclass
+class CommitPolicy:
+    """
+    Decides when an ingest transaction is committed: after `max_rows` rows,
+    `max_bytes` encoded bytes or `max_seconds` since the transaction started,
+    whichever comes first (None disables a limit).
+
+    Writers call `begin()` when a transaction opens, `add(rows, nbytes)` after
+    every write, check `due()` and call `commit(seconds)` right after
+    conn.commit(), passing the time spent in the writes and the commit itself, so
+    rows/s measures the database and not the generator feeding it.
+
+    With `adaptive=True` the row limit is tuned from the observed commits: it is
+    multiplied by `growth` while rows/s keeps improving by more than `tolerance`,
+    probed again from the best size with a smaller step when throughput drops,
+    and kept once it plateaus, i.e. at the knee of the rows/s curve on this
+    machine. A commit slower than `target_seconds` shrinks it and ends the
+    search. The limit stays within [`min_rows`, `max_rows_cap`].
+
+    A policy holds per-transaction state, so every connection needs its own:
+    use `clone()` to hand the same settings to several writers.
+    """
+
+    max_rows: int | None = 1_000_000
+    max_bytes: int | None = None
+    max_seconds: float | None = None
+    adaptive: bool = False
+    min_rows: int = 5_000
+    max_rows_cap: int = 10_000_000
+    target_seconds: float = 5.0
+    growth: float = 2.0
+    tolerance: float = 0.05
+
+    rows: int = field(default=0, init=False)
+    nbytes: int = field(default=0, init=False)
+    opened_at: float = field(default_factory=time.monotonic, init=False)
+    converged: bool = field(default=False, init=False)
+    history: List[dict] = field(default_factory=list, init=False)
+    _best_rate: float = field(default=0.0, init=False, repr=False)
+    _best_rows: int = field(default=0, init=False, repr=False)
+
+    def __post_init__(self):
+        if self.adaptive and self.max_rows is None:
+            raise ValueError("adaptive CommitPolicy needs a starting max_rows")
+
+    @classmethod
+    def from_options(
+        cls,
+        commit_rows: int | None = None,
+        commit_mb: float | None = None,
+        commit_seconds: float | None = None,
+        adaptive: bool = False,
+        default_rows: int = 1_000_000,
+    ) -> "CommitPolicy":
+        """
+        Build a policy from CLI-style options (MB instead of bytes). Adaptive mode
+        starts from `default_rows` when no row limit is given.
+        """
+        return cls(
+            max_rows=commit_rows or (default_rows if adaptive else None),
+            max_bytes=int(commit_mb * 1024 * 1024) if commit_mb else None,
+            max_seconds=commit_seconds,
+            adaptive=adaptive,
+        )
+
+    def clone(self) -> "CommitPolicy":
+        """Same settings, fresh state."""
+        return replace(self)
+
+    def begin(self):
+        """Start a new transaction."""
+        self.rows = 0
+        self.nbytes = 0
+        self.opened_at = time.monotonic()
+
+    def add(self, rows: int, nbytes: int = 0):
+        """Account for rows (and encoded bytes) written in the open transaction."""
+        self.rows += rows
+        self.nbytes += nbytes
+
+    def room(self) -> int | None:
+        """Rows that still fit under `max_rows` (None: no row limit)."""
+        if self.max_rows is None:
+            return None
+        return max(self.max_rows - self.rows, 0)
+
+    def due(self) -> bool:
+        """True if the open transaction should be committed now."""
+        if not self.rows:
+            return False
+        return (
+            (self.max_rows is not None and self.rows >= self.max_rows)
+            or (self.max_bytes is not None and self.nbytes >= self.max_bytes)
+            or (
+                self.max_seconds is not None
+                and time.monotonic() - self.opened_at >= self.max_seconds
+            )
+        )
+
+    def commit(self, seconds: float | None = None) -> dict:
+        """
+        Record the transaction that was just committed, adapt the row limit and
+        start the next transaction. `seconds` is the measured write + commit time;
+        it defaults to the wall time since `begin()`, which also counts generating
+        and encoding the rows in between. Returns the recorded entry.
+        """
+        if seconds is None:
+            seconds = time.monotonic() - self.opened_at
+        entry = {
+            "rows": self.rows,
+            "bytes": self.nbytes,
+            "seconds": round(seconds, 4),
+            "rows_per_s": round(self.rows / seconds) if seconds > 0 else 0,
+            "max_rows": self.max_rows,
+        }
+        self.history.append(entry)
+        if self.adaptive and self.rows:
+            self._adapt(entry["rows_per_s"], seconds)
+        self.begin()
+        return entry
+
+    def _adapt(self, rate: float, seconds: float):
+        if seconds > self.target_seconds:
+            # Too slow to commit: back off and stay there, whatever the throughput
+            self._set_rows(self.max_rows / self.growth)
+            self.converged = True
+        elif self.converged:
+            return
+        elif self.rows < self.max_rows:
+            # Cut short by the byte/time limit or the end of data: not comparable
+            return
+        elif rate > self._best_rate * (1 + self.tolerance):
+            self._best_rate, self._best_rows = rate, self.max_rows
+            self._set_rows(self.max_rows * self.growth)
+        elif rate < self._best_rate * (1 - self.tolerance):
+            # Past the knee: probe above the best size again with a smaller step
+            self.growth = math.sqrt(self.growth)
+            if self.growth < 1.1:
+                self._set_rows(self._best_rows)
+                self.converged = True
+            else:
+                self._set_rows(self._best_rows * self.growth)
+        else:
+            # Plateau: larger commits buy nothing, keep the smaller size
+            self._set_rows(min(self.max_rows, self._best_rows))
+            self.converged = True
+
+    def _set_rows(self, rows: float):
+        self.max_rows = int(min(max(rows, self.min_rows), self.max_rows_cap))
+
+    def summary(self) -> dict:
+        """Totals over all recorded commits plus the current row limit."""
+        rows = sum(c["rows"] for c in self.history)
+        seconds = sum(c["seconds"] for c in self.history)
+        return {
+            "commits": len(self.history),
+            "rows": rows,
+            "seconds": round(seconds, 4),
+            "rows_per_s": round(rows / seconds) if seconds else 0,
+            "max_rows": self.max_rows,
+            "converged": self.converged,
+        }
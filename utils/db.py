@@ -1,18 +1,90 @@
+import atexit
 import os
+import threading
+from contextlib import contextmanager
+
 import psycopg
 from dotenv import load_dotenv
+from psycopg_pool import ConnectionPool
 
 load_dotenv()
 
+_pool: ConnectionPool | None = None
+_pool_pid: int | None = None
+_pool_lock = threading.Lock()
 
-def get_connection():
+
+def connection_kwargs() -> dict:
     """
-    Returns a psycopg connection object. Use directly, or the decorator functions conn_read/conn_write.
+    Connection parameters read from the environment (.env), shared by all connection helpers.
     """
-    return psycopg.connect(
+    return dict(
         host=os.getenv("DB_HOST", "localhost"),
         user=os.getenv("DB_USER", "postgres"),
         password=os.getenv("DB_PASSWORD", "password"),
         dbname=os.getenv("DB_NAME", "postgres"),
         port=int(os.getenv("DB_PORT", 5432)),
     )
+
+
+def get_connection():
+    """
+    Returns a psycopg connection object. Use directly, or the decorator functions conn_read/conn_write.
+    Opens a new connection every time: prefer pooled_connection() for short borrows,
+    keep this one for long-lived connections (e.g. dedicated ingest writers).
+    """
+    return psycopg.connect(**connection_kwargs())
+
+
+async def get_async_connection():
+    """
+    Returns a psycopg AsyncConnection object, same settings as get_connection().
+    """
+    return await psycopg.AsyncConnection.connect(**connection_kwargs())
+
+
+def get_pool() -> ConnectionPool:
+    """
+    Process-wide connection pool, opened on first use with the same settings as
+    get_connection(). Tuned from the environment:
+        DB_POOL_MIN_SIZE      connections kept open (default 1)
+        DB_POOL_MAX_SIZE      upper limit of open connections (default 10)
+        DB_POOL_TIMEOUT       seconds to wait for a free connection (default 10)
+        DB_POOL_MAX_LIFETIME  seconds before a connection is replaced (default 3600)
+        DB_POOL_MAX_IDLE      seconds an extra idle connection is kept (default 600)
+    Connections are health-checked before being handed out. A forked child process
+    (e.g. the insert monitor) gets its own pool instead of sharing sockets.
+    """
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ConnectionPool(
+                kwargs=connection_kwargs(),
+                min_size=int(os.getenv("DB_POOL_MIN_SIZE", 1)),
+                max_size=int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+                timeout=float(os.getenv("DB_POOL_TIMEOUT", 10)),
+                max_lifetime=float(os.getenv("DB_POOL_MAX_LIFETIME", 3600)),
+                max_idle=float(os.getenv("DB_POOL_MAX_IDLE", 600)),
+                check=ConnectionPool.check_connection,
+                name="workshop",
+                open=True,
+            )
+            _pool_pid = os.getpid()
+            atexit.register(_pool.close)
+        return _pool
+
+
+@contextmanager
+def pooled_connection():
+    """
+    Borrow a connection from the pool. Same shape as `with get_connection() as conn:`
+    (commit on success, rollback on error), but the connection goes back to the pool
+    instead of being closed.
+    """
+    with get_pool().connection() as conn:
+        yield conn
+
+
+def pool_stats() -> dict:
+    """Pool counters (checkouts, wait time, connections, ...), see psycopg_pool get_stats()."""
+    return get_pool().get_stats()
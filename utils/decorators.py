@@ -2,7 +2,7 @@ import time
 
 from functools import wraps
 from typing import Callable, Any
-from utils.db import get_connection
+from utils.db import pooled_connection
 
 from threading import Lock
 
@@ -64,48 +64,37 @@ def time_execution(
 
 def db_read_once(func):
     """
-    Decorator for once off single read database connection.
+    Decorator for once off single read database connection, borrowed from the pool.
     """
 
     @wraps(func)
     def wrapper(*args, **kwargs):
-        conn = get_connection()
-        cur = conn.cursor()
-        try:
+        with pooled_connection() as conn, conn.cursor() as cur:
             return func(cur, *args, **kwargs)
-        finally:
-            cur.close()
-            conn.close()
 
     return wrapper
 
 
 def db_write_once(autocommit: bool = False):
     """
-    Decorator for once off single write database connection with commit/rollback.
+    Decorator for once off single write database connection with commit/rollback,
+    borrowed from the pool.
     """
 
     def deco(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            conn = get_connection()
-            try:
+            # The pooled connection commits on success and rolls back on error
+            with pooled_connection() as conn:
                 if autocommit:
                     conn.autocommit = True
-                cur = conn.cursor()
                 try:
-                    result = func(cur, *args, **kwargs)
+                    with conn.cursor() as cur:
+                        return func(cur, *args, **kwargs)
                 finally:
-                    cur.close()
-                if not autocommit:
-                    conn.commit()
-                return result
-            except Exception:
-                if not autocommit:
-                    conn.rollback()
-                raise
-            finally:
-                conn.close()
+                    if autocommit and not conn.broken:
+                        # Hand the connection back to the pool in its default mode
+                        conn.autocommit = False
 
         return wrapper
 
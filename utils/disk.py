@@ -4,6 +4,11 @@ import csv
 from datetime import datetime
 from typing import Iterator, List, Tuple
 
+import numpy as np
+import pandas as pd
+
+from utils.batch import SensorBatch
+
 
 def load_sql(filename: str) -> str:
     """
@@ -74,15 +79,97 @@ def read_csv_in_batches(path: str, batch_size: int) -> Iterator[List[dict]]:
         for row in reader:
             # batch.append(map_row(row)) # Use this line if you want mapped rows and skip the flat-mapping
 
-            for row in reader:
-                mapped = map_row_to_sensors(
-                    row
-                )  # Use this line for Kaggle style mapping
+            mapped = map_row_to_sensors(row)  # Use this line for Kaggle style mapping
 
-                for item in mapped:  # basic flat-map
-                    batch.append(item)
-                    if len(batch) >= batch_size:
-                        yield batch
-                        batch = []
+            for item in mapped:  # basic flat-map
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
         if batch:
             yield batch
+
+
+def _parse_times(strings: pd.Series, time_format: str | None) -> np.ndarray:
+    """
+    Parse a timestamp column to datetime64[us] (naive = UTC, aware = converted).
+    Missing (blank) timestamps become NaT.
+
+    For "<date> <time>" formats every distinct date and every distinct time of day
+    is parsed only once and the two are added: a file has few of each, and
+    pandas' strptime path for non-ISO formats is the slowest step of reading.
+    """
+    date_format, sep, clock_format = (time_format or "").partition(" ")
+    if not sep or " " in clock_format or "%z" in time_format:
+        parsed = pd.to_datetime(strings, format=time_format, utc=True)
+        return parsed.dt.tz_localize(None).to_numpy("datetime64[us]")
+
+    times = np.full(len(strings), np.datetime64("NaT", "us"))
+    present = strings.notna().to_numpy()
+    if not present.any():
+        return times
+    dates, _, clocks = zip(*(s.partition(" ") for s in strings[present].tolist()))
+    date_codes, unique_dates = pd.factorize(pd.Index(dates))
+    clock_codes, unique_clocks = pd.factorize(pd.Index(clocks))
+    days = pd.to_datetime(unique_dates, format=date_format).to_numpy("datetime64[us]")
+    # Times of day parse onto 1900-01-01
+    offsets = (
+        pd.to_datetime(unique_clocks, format=clock_format) - pd.Timestamp(1900, 1, 1)
+    ).to_numpy("timedelta64[us]")
+    times[present] = days[date_codes] + offsets[clock_codes]
+    return times
+
+
+def read_wide_csv_batches(
+    path: str,
+    batch_size: int = 100_000,
+    time_column: str = "Datetime",
+    time_format: str | None = "%m/%d/%Y %H:%M",
+) -> Iterator[SensorBatch]:
+    """
+    Columnar version of read_csv_in_batches() + map_row_to_sensors() for wide files
+    (one timestamp column, one column per sensor), yielding SensorBatch objects
+    ready for COPY.
+
+    The file is parsed by pandas' C reader in chunks of about `batch_size` long
+    rows. Per chunk the timestamp column is parsed once, and the sensor columns
+    are unpivoted to (time, id, value) with NumPy repeat/tile/ravel. The id is the
+    column position in the header, empty or non-numeric cells are skipped (NaN
+    too, which float() would let through), and naive timestamps are taken as
+    UTC: the same rows, in the same order, as the row-by-row mapper. Rows with a
+    blank timestamp have no time to store and are skipped.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    sensor_columns = [c for c in header if c != time_column]
+    chunk_rows = max(1, batch_size // max(len(sensor_columns), 1))
+
+    for chunk in pd.read_csv(path, chunksize=chunk_rows):
+        yield unpivot_frame(chunk, list(header), time_column, time_format)
+
+
+def unpivot_frame(
+    chunk: pd.DataFrame,
+    header: List[str],
+    time_column: str = "Datetime",
+    time_format: str | None = "%m/%d/%Y %H:%M",
+) -> SensorBatch:
+    """
+    One wide DataFrame chunk as a SensorBatch, row-major (all sensors of a
+    timestamp, then the next timestamp). Ids are positions in `header`. Empty
+    cells and rows without a timestamp are skipped.
+    """
+    sensor_columns = [c for c in header if c != time_column]
+    ids = np.array([header.index(c) for c in sensor_columns], np.int32)
+    times = _parse_times(chunk[time_column], time_format)
+    sensors = chunk[sensor_columns]
+    if not all(pd.api.types.is_numeric_dtype(d) for d in sensors.dtypes):
+        # Text in a sensor column: non-numeric cells become NaN and are skipped
+        sensors = sensors.apply(pd.to_numeric, errors="coerce")
+    values = sensors.to_numpy(np.float64).ravel()
+    times = np.repeat(times, len(sensor_columns))
+    keep = ~np.isnan(values) & ~np.isnat(times)
+    return SensorBatch(
+        times[keep],
+        np.tile(ids, len(chunk))[keep],
+        values[keep],
+    )
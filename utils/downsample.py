@@ -0,0 +1,83 @@
+import concurrent.futures as cf
+import datetime as dt
+from typing import Dict, List, Sequence, Tuple
+
+from utils.db import pooled_connection
+
+# One lttb aggregate per id, unnested into (id, time, value) rows
+GROUPED_LTTB_SQL = """
+    SELECT s.id, p.time, p.value
+    FROM (
+        SELECT id, lttb(time, value, %s) AS tv
+        FROM sensors
+        WHERE id = ANY(%s) AND time >= %s AND time < %s
+        GROUP BY id
+    ) AS s
+    CROSS JOIN LATERAL unnest(s.tv) AS p
+    ORDER BY s.id, p.time
+"""
+
+LTTB_SQL = """
+    SELECT (timevector).time AS time, (timevector).value AS value
+    FROM unnest(
+        (SELECT lttb(td.time, td.value, %s)
+        FROM sensors AS td
+        WHERE td.id = %s AND td.time >= %s AND td.time < %s)
+    ) AS timevector
+"""
+
+MODES = ("grouped", "concurrent")
+
+Series = Tuple[List[dt.datetime], List[float]]
+
+
+def group_series(ids: Sequence[int], rows) -> Dict[int, Series]:
+    """(id, time, value) rows ordered by id and time -> {id: (times, values)}."""
+    series = {id: ([], []) for id in ids}
+    for id, time, value in rows:
+        times, values = series[id]
+        times.append(time)
+        values.append(value)
+    return series
+
+
+def downsample_one(cur, id: int, start, end, resolution: int = 300) -> Series:
+    """lttb of one sensor: the per-sensor query the workshop solutions run."""
+    cur.execute(LTTB_SQL, (resolution, id, start, end))
+    rows = cur.fetchall()
+    return [r[0] for r in rows], [r[1] for r in rows]
+
+
+def downsample_many(
+    ids: Sequence[int],
+    start: dt.datetime,
+    end: dt.datetime,
+    resolution: int = 300,
+    *,
+    mode: str = "grouped",
+    workers: int = 8,
+) -> Dict[int, Series]:
+    """
+    lttb downsampling of several sensors over [start, end), `resolution` points
+    each, returned as {id: (times, values)} (empty lists for ids without data).
+
+      grouped     one statement: lttb grouped by id and unnested, a single
+                  round trip and a single scan of the range
+      concurrent  one lttb query per id, `workers` at a time on pooled
+                  connections (capped by the pool size)
+    """
+    if mode == "grouped":
+        with pooled_connection() as conn, conn.cursor() as cur:
+            cur.execute(GROUPED_LTTB_SQL, (resolution, list(ids), start, end))
+            return group_series(ids, cur.fetchall())
+
+    if mode == "concurrent":
+
+        def one(id: int) -> Series:
+            with pooled_connection() as conn, conn.cursor() as cur:
+                return downsample_one(cur, id, start, end, resolution)
+
+        with cf.ThreadPoolExecutor(max_workers=workers) as executor:
+            return dict(zip(ids, executor.map(one, ids)))
+
+    raise ValueError(f"Unknown mode {mode!r}, use one of {MODES}")
@@ -0,0 +1,115 @@
+import concurrent.futures as cf
+import datetime as dt
+from typing import Any, Callable, Iterable, List, Sequence, Tuple
+
+from utils.db import pooled_connection
+
+CHUNK_RANGES_SQL = """
+    SELECT range_start, range_end
+    FROM timescaledb_information.chunks
+    WHERE hypertable_name = %s AND range_end > %s AND range_start < %s
+    ORDER BY range_start
+"""
+
+# Partial aggregates per bucket, mergeable across chunks
+PARTIAL_AGG_SQL = """
+    SELECT time_bucket(%s::interval, time) AS bucket,
+           sum(value), count(value), min(value), max(value)
+    FROM sensors
+    WHERE id = %s AND time >= %s AND time < %s
+    GROUP BY 1
+"""
+
+ROWS_SQL = """
+    SELECT time, value FROM sensors
+    WHERE id = %s AND time >= %s AND time < %s
+    ORDER BY time
+"""
+
+Range = Tuple[dt.datetime, dt.datetime]
+
+
+def chunk_ranges(
+    conn, start: dt.datetime, end: dt.datetime, table: str = "sensors"
+) -> List[Range]:
+    """
+    The chunks of `table` overlapping [start, end), as [lo, hi) ranges clipped to
+    the window, oldest first. Ranges without a chunk hold no rows and are skipped.
+    """
+    rows = conn.execute(CHUNK_RANGES_SQL, (table, start, end)).fetchall()
+    return [(max(lo, start), min(hi, end)) for lo, hi in rows]
+
+
+def fan_out(
+    query: str,
+    params: Sequence,
+    ranges: Iterable[Range],
+    *,
+    workers: int = 4,
+    fetch: Callable = lambda cur: cur.fetchall(),
+) -> List[Any]:
+    """
+    Run `query` once per range, with `params` followed by the range bounds, on up
+    to `workers` pooled connections at a time. Each subquery only touches one
+    chunk, so the server runs them on separate backends (cores) even when it would
+    not plan a parallel scan for the whole range. Results are in range order.
+    """
+
+    def run(bounds: Range):
+        with pooled_connection() as conn, conn.cursor() as cur:
+            cur.execute(query, (*params, *bounds))
+            return fetch(cur)
+
+    with cf.ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run, ranges))
+
+
+def merge_partials(parts: Iterable[Iterable[tuple]]) -> List[tuple]:
+    """
+    Merge (bucket, sum, count, min, max) partials of buckets that span several
+    chunks into (bucket, avg, min, max, count) rows ordered by bucket.
+    """
+    merged = {}
+    for rows in parts:
+        for bucket, total, count, low, high in rows:
+            if bucket in merged:
+                t, c, lo, hi = merged[bucket]
+                merged[bucket] = (t + total, c + count, min(lo, low), max(hi, high))
+            else:
+                merged[bucket] = (total, count, low, high)
+    return [
+        (bucket, total / count, low, high, count)
+        for bucket, (total, count, low, high) in sorted(merged.items())
+        if count
+    ]
+
+
+def parallel_aggregate(
+    id: int,
+    start: dt.datetime,
+    end: dt.datetime,
+    *,
+    bucket: str = "1 month",
+    workers: int = 4,
+) -> List[tuple]:
+    """
+    time_bucket(`bucket`) avg/min/max/count of one sensor over [start, end),
+    computed per chunk concurrently and merged on the client.
+    """
+    with pooled_connection() as conn:
+        ranges = chunk_ranges(conn, start, end)
+    parts = fan_out(PARTIAL_AGG_SQL, (bucket, id), ranges, workers=workers)
+    return merge_partials(parts)
+
+
+def parallel_rows(
+    id: int, start: dt.datetime, end: dt.datetime, *, workers: int = 4
+) -> List[tuple]:
+    """Raw (time, value) rows of one sensor over [start, end), per chunk, in time order."""
+    with pooled_connection() as conn:
+        ranges = chunk_ranges(conn, start, end)
+    return [
+        row
+        for rows in fan_out(ROWS_SQL, (id,), ranges, workers=workers)
+        for row in rows
+    ]
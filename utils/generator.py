@@ -1,7 +1,16 @@
+import concurrent.futures as cf
 import datetime as dt
 import random
 import math
-from typing import Literal, Iterator, Tuple
+from collections import deque
+from typing import Iterable, Literal, Iterator, Tuple
+
+import numpy as np
+
+from utils.batch import SensorBatch
+
+_EPOCH = dt.datetime(1970, 1, 1, tzinfo=dt.timezone.utc)
+_US_PER_DAY = 86_400_000_000
 
 
 def generate_csv(
@@ -111,6 +120,7 @@ def generate_csv_lines_batch(
     noise_sigma: float = 0.05,  # Gaussian noise (std dev)
     drift_per_day: float = 0.0,  # linear drift per day (e.g., 0.02)
     seed: int | None = 42,  # set None for non-deterministic
+    engine: Literal["python", "numpy"] = "python",  # "numpy": vectorized batches
 ) -> Iterator[str]:
     """
     Generate simulated time-series sensor data and YIELD CSV data in batches
@@ -122,7 +132,33 @@ def generate_csv_lines_batch(
     Generation modes:
       • Count-limited: set `n`.
       • Time-limited: set `start` and `end` (defaults: last 10 days to now).
+
+    Engines:
+      • "python": the original row-by-row loop (uses the global `random` module).
+      • "numpy": vectorized, see `generate_array_batches`. Same value model and
+        parameters, but a different random stream, so values differ from "python".
     """
+    if engine == "numpy":
+        for batch in generate_array_batches(
+            n=n,
+            start=start,
+            end=end,
+            step_sec=step_sec,
+            devices=devices,
+            jitter_frac=jitter_frac,
+            batch_size=batch_size,
+            baseline_mode=baseline_mode,
+            base_value=base_value,
+            base_spread=base_spread,
+            by_id_step=by_id_step,
+            daily_amp=daily_amp,
+            noise_sigma=noise_sigma,
+            drift_per_day=drift_per_day,
+            seed=seed,
+        ):
+            yield batch.to_csv()
+        return
+
     if seed is not None:
         random.seed(seed)
 
@@ -197,6 +233,366 @@ def generate_csv_lines_batch(
         yield "".join(current_batch_lines)
 
 
+def _to_epoch_us(t: dt.datetime) -> int:
+    """Microseconds since the Unix epoch. Naive datetimes are treated as UTC."""
+    if t.tzinfo is None:
+        t = t.replace(tzinfo=dt.timezone.utc)
+    return (t - _EPOCH) // dt.timedelta(microseconds=1)
+
+
+def _device_profiles(
+    rng: np.random.Generator,
+    devices: int,
+    baseline_mode: Literal["random", "by_id"],
+    base_value: float,
+    base_spread: float,
+    by_id_step: float,
+    daily_amp: float,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Per-device (baseline, amp, phase) arrays, indexed by device id.
+    Same distributions as the profiles in `generate_csv_lines_batch`.
+    """
+    if baseline_mode == "by_id":
+        baseline = base_value + np.arange(devices) * by_id_step
+    else:  # "random"
+        baseline = base_value + rng.uniform(-base_spread, base_spread, devices)
+
+    phase = rng.uniform(0, 2 * math.pi, devices)
+    amp = daily_amp * rng.uniform(0.8, 1.2, devices)
+    return baseline, amp, phase
+
+
+def _step_times_us(
+    rng: np.random.Generator,
+    t0_us: int,
+    n_steps: int,
+    step_sec: float,
+    jitter_frac: float,
+) -> Tuple[np.ndarray, int]:
+    """
+    Draw `n_steps` jittered sampling instants starting at `t0_us`.
+
+    Returns the instants (int64 epoch microseconds) and the instant that
+    follows the last one, so consecutive calls continue the same timeline.
+    """
+    steps = step_sec * (1 + rng.uniform(-jitter_frac, jitter_frac, n_steps))
+    offsets = np.cumsum(steps) * 1e6
+    times = np.empty(n_steps, dtype=np.int64)
+    times[0] = t0_us
+    times[1:] = t0_us + np.rint(offsets[:-1]).astype(np.int64)
+    return times, t0_us + int(round(offsets[-1]))
+
+
+def _sample_values(
+    rng: np.random.Generator,
+    times_us: np.ndarray,
+    device_ids: np.ndarray,
+    profiles: Tuple[np.ndarray, np.ndarray, np.ndarray],
+    origin_us: int,
+    drift_per_day: float,
+    noise_sigma: float,
+) -> np.ndarray:
+    """
+    Value model for every (time, device) pair, as a (len(times), len(devices)) matrix:
+    baseline + daily cycle + drift + noise.
+    """
+    baseline, amp, phase = (p[device_ids] for p in profiles)
+    day_angle = 2 * math.pi * ((times_us % _US_PER_DAY) / _US_PER_DAY)
+    days_since_start = (times_us - origin_us) / _US_PER_DAY
+
+    values = amp * np.sin(day_angle[:, None] + phase)
+    values += baseline
+    values += (drift_per_day * days_since_start)[:, None]
+    values += rng.normal(0.0, noise_sigma, values.shape)
+    return values
+
+
+def _timeline_rows(
+    rng: np.random.Generator,
+    t0_us: int,
+    stop_us: int,
+    inclusive: bool,
+    device_ids: np.ndarray,
+    profiles: Tuple[np.ndarray, np.ndarray, np.ndarray],
+    origin_us: int,
+    step_sec: float,
+    jitter_frac: float,
+    drift_per_day: float,
+    noise_sigma: float,
+    steps_per_round: int,
+) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Yield (times_us, ids, values) row chunks for `device_ids` on one jittered
+    timeline from `t0_us` until `stop_us` (inclusive or exclusive).
+    Each chunk covers `steps_per_round` time steps (the last one may be shorter).
+    """
+    t_us = t0_us
+    while t_us < stop_us or (inclusive and t_us == stop_us):
+        times, t_us = _step_times_us(rng, t_us, steps_per_round, step_sec, jitter_frac)
+        times = times[times <= stop_us] if inclusive else times[times < stop_us]
+
+        values = _sample_values(
+            rng, times, device_ids, profiles, origin_us, drift_per_day, noise_sigma
+        )
+        yield (
+            np.repeat(times, len(device_ids)),
+            np.tile(device_ids, len(times)),
+            values.ravel(),
+        )
+
+
+def _rebatch(
+    chunks: Iterable[Tuple[np.ndarray, np.ndarray, np.ndarray]],
+    batch_size: int,
+    n: int | None = None,
+) -> Iterator[SensorBatch]:
+    """
+    Re-slice row chunks of any size into SensorBatches of exactly `batch_size` rows
+    (the last one may be shorter), stopping after `n` rows if given.
+    Batches are views into the chunk arrays whenever a batch fits inside one chunk.
+    """
+    remaining = n
+    # Rows left over from the previous chunk that did not fill a whole batch
+    pending = None
+
+    for rows in chunks:
+        if remaining is not None:
+            rows = tuple(col[:remaining] for col in rows)
+            remaining -= len(rows[0])
+
+        if pending is not None and len(pending[0]):
+            rows = tuple(np.concatenate(cols) for cols in zip(pending, rows))
+
+        full = len(rows[0]) - len(rows[0]) % batch_size
+        for offset in range(0, full, batch_size):
+            times, ids, values = (col[offset : offset + batch_size] for col in rows)
+            yield SensorBatch(times.view("datetime64[us]"), ids, values)
+        pending = tuple(col[full:] for col in rows)
+
+        if remaining == 0:
+            break
+
+    if pending is not None and len(pending[0]):
+        times, ids, values = pending
+        yield SensorBatch(times.view("datetime64[us]"), ids, values)
+
+
+def generate_array_batches(
+    n: int | None = None,
+    start: dt.datetime | None = None,
+    end: dt.datetime | None = None,
+    step_sec: int = 60,
+    devices: int = 100,
+    jitter_frac: float = 0.2,
+    *,
+    batch_size: int = 10000,
+    baseline_mode: Literal["random", "by_id"] = "random",
+    base_value: float = 10.0,
+    base_spread: float = 2.0,
+    by_id_step: float = 0.1,
+    daily_amp: float = 0.5,
+    noise_sigma: float = 0.05,
+    drift_per_day: float = 0.0,
+    seed: int | None = 42,
+) -> Iterator[SensorBatch]:
+    """
+    Vectorized twin of `generate_csv_lines_batch`: same parameters, same value
+    model and the same row order (all devices per time step), but whole batches
+    are built as NumPy arrays instead of one Python row at a time.
+
+    Yields a `SensorBatch` (time/id/value columns) per batch.
+
+    Jittered time steps are drawn in bulk and accumulated with cumsum, the
+    per-device baseline/amp/phase profiles are broadcast over the time steps,
+    and the Gaussian noise is drawn for the whole batch at once.
+    Uses its own `np.random.Generator` seeded with `seed`, so it does not touch
+    (or depend on) the global `random` state.
+    """
+    rng = np.random.default_rng(seed)
+
+    now = dt.datetime.now(dt.timezone.utc).replace(microsecond=0)
+    if start is None:
+        start = now - dt.timedelta(days=10)
+    if end is None:
+        end = now
+
+    start_us, end_us = _to_epoch_us(start), _to_epoch_us(end)
+    profiles = _device_profiles(
+        rng, devices, baseline_mode, base_value, base_spread, by_id_step, daily_amp
+    )
+    chunks = _timeline_rows(
+        rng,
+        start_us,
+        end_us,
+        True,
+        np.arange(devices, dtype=np.int32),
+        profiles,
+        start_us,
+        step_sec,
+        jitter_frac,
+        drift_per_day,
+        noise_sigma,
+        # Enough time steps per round to fill at least one batch
+        steps_per_round=max(1, -(-batch_size // devices)),
+    )
+    yield from _rebatch(chunks, batch_size, n)
+
+
+def _generate_shard(task: dict) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Process pool worker: generate every row of one shard (a time segment of a
+    device group) with the shard's own RNG stream.
+    """
+    rng = np.random.default_rng(task.pop("seed_seq"))
+    chunks = list(_timeline_rows(rng, **task))
+    return tuple(np.concatenate(cols) for cols in zip(*chunks))
+
+
+def _run_shards(
+    tasks: Iterable[dict], workers: int, ordered: bool
+) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Run shard tasks on a process pool and yield their rows, keeping at most
+    2 * `workers` shards in flight so memory stays bounded.
+    """
+    max_in_flight = 2 * workers
+    tasks = iter(tasks)
+
+    with cf.ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque()
+        try:
+            while True:
+                while len(in_flight) < max_in_flight:
+                    task = next(tasks, None)
+                    if task is None:
+                        break
+                    in_flight.append(executor.submit(_generate_shard, task))
+                if not in_flight:
+                    return
+
+                if ordered:
+                    yield in_flight.popleft().result()
+                else:
+                    done, _ = cf.wait(in_flight, return_when=cf.FIRST_COMPLETED)
+                    for future in done:
+                        in_flight.remove(future)
+                        yield future.result()
+        finally:
+            # Consumer stopped early (e.g. `n` reached) or a shard failed
+            for future in in_flight:
+                future.cancel()
+
+
+def generate_sharded_batches(
+    n: int | None = None,
+    start: dt.datetime | None = None,
+    end: dt.datetime | None = None,
+    step_sec: int = 60,
+    devices: int = 100,
+    jitter_frac: float = 0.2,
+    *,
+    workers: int = 4,
+    shard_by: Literal["time", "devices"] = "time",
+    ordered: bool = True,
+    shard_rows: int = 500_000,  # approx. rows generated per shard (per pool task)
+    batch_size: int = 10000,
+    baseline_mode: Literal["random", "by_id"] = "random",
+    base_value: float = 10.0,
+    base_spread: float = 2.0,
+    by_id_step: float = 0.1,
+    daily_amp: float = 0.5,
+    noise_sigma: float = 0.05,
+    drift_per_day: float = 0.0,
+    seed: int | None = 42,
+) -> Iterator[SensorBatch]:
+    """
+    Multi-process version of `generate_array_batches`. Yields the same
+    SensorBatches of `batch_size` rows.
+
+    The [start, end] range is cut into time segments of ~`shard_rows` rows and,
+    with `shard_by="devices"`, the device set is also split into `workers`
+    groups. Every (device group, time segment) shard is generated on a process
+    pool with its own RNG stream, derived from `seed` and the shard's position
+    (never from scheduling), so output is reproducible run to run:
+      • shard_by="time": depends on `seed` and `shard_rows`, not on `workers`.
+      • shard_by="devices": also depends on `workers` (the number of groups).
+    Device profiles come from a separate stream, so a device keeps the same
+    baseline/amp/phase across all time segments.
+
+    ordered=True yields shards in time order (device groups within a segment in
+    id order). ordered=False yields shards as soon as they finish, which keeps
+    all workers busy when the consumer is slower than a single shard.
+    """
+    now = dt.datetime.now(dt.timezone.utc).replace(microsecond=0)
+    if start is None:
+        start = now - dt.timedelta(days=10)
+    if end is None:
+        end = now
+
+    start_us, end_us = _to_epoch_us(start), _to_epoch_us(end)
+
+    root = np.random.SeedSequence(seed)
+    profiles = _device_profiles(
+        np.random.default_rng(np.random.SeedSequence(root.entropy, spawn_key=(0,))),
+        devices,
+        baseline_mode,
+        base_value,
+        base_spread,
+        by_id_step,
+        daily_amp,
+    )
+
+    all_ids = np.arange(devices, dtype=np.int32)
+    groups = (
+        [g for g in np.array_split(all_ids, workers) if len(g)]
+        if shard_by == "devices"
+        else [all_ids]
+    )
+
+    # Time segments sized for ~shard_rows rows of the largest device group
+    segment_us = max(
+        1, int(shard_rows / max(len(g) for g in groups) * step_sec * 1_000_000)
+    )
+    # start == end still makes one (inclusive) segment: one time step, like
+    # generate_array_batches
+    boundaries = (list(range(start_us, end_us, segment_us)) or [start_us]) + [end_us]
+
+    def tasks():
+        for seg, (t0_us, stop_us) in enumerate(zip(boundaries, boundaries[1:])):
+            last = seg == len(boundaries) - 2
+            for grp, device_ids in enumerate(groups):
+                yield dict(
+                    seed_seq=np.random.SeedSequence(
+                        root.entropy, spawn_key=(1, grp, seg)
+                    ),
+                    t0_us=t0_us,
+                    stop_us=stop_us,
+                    inclusive=last,
+                    device_ids=device_ids,
+                    profiles=profiles,
+                    origin_us=start_us,
+                    step_sec=step_sec,
+                    jitter_frac=jitter_frac,
+                    drift_per_day=drift_per_day,
+                    noise_sigma=noise_sigma,
+                    steps_per_round=max(1, -(-batch_size // len(device_ids))),
+                )
+
+    yield from _rebatch(_run_shards(tasks(), workers, ordered), batch_size, n)
+
+
+def generate_copy_binary_batches(*args, **kwargs) -> Iterator[bytes]:
+    """
+    Same parameters as `generate_array_batches`, but yields each batch as a
+    complete PostgreSQL binary COPY buffer (header + rows + trailer) for
+    `utils.pgbinary.COPY_BINARY_SQL`. No text is formatted on the client and
+    the server has nothing to parse.
+    """
+    for batch in generate_array_batches(*args, **kwargs):
+        yield batch.to_copy_binary()
+
+
 def simulate_temp_sensor(
     start: dt.datetime,
     end: dt.datetime,
@@ -208,19 +604,24 @@ def simulate_temp_sensor(
     noise_sigma: float = 0.1,  # Standard deviation of random sensor noise
     drift_per_day: float = 0.005,  # Slow, linear warming/cooling drift
     seed: int | None = 42,
+    rng: random.Random | None = None,
 ) -> Iterator[Tuple[dt.datetime, float]]:
     """
     Generates time and value tuples for a single simulated temperature sensor.
+    Draws from the module-level `random`, reseeded with `seed`, unless an own
+    `rng` is given (then `seed` is ignored and the global state is left alone).
 
     Yields: (dt.datetime, float)
     """
-    if seed is not None:
-        random.seed(seed)
+    if rng is None:
+        rng = random
+        if seed is not None:
+            random.seed(seed)
 
     # 1. Device Profile (Fixed for a single sensor)
     # The phase is randomized here to simulate an arbitrary start point
     # in the 24-hour cycle relative to the 'start' time.
-    initial_phase = random.uniform(0, 2 * math.pi)
+    initial_phase = rng.uniform(0, 2 * math.pi)
 
     t = start
 
@@ -242,7 +643,7 @@ def simulate_temp_sensor(
             # Drift: Slow environmental change over time
             + drift_per_day * days_since_start
             # Noise: High-frequency sensor error/fluctuation
-            + random.gauss(0.0, noise_sigma)
+            + rng.gauss(0.0, noise_sigma)
         )
 
         # 3. Yield the timestamp and the value
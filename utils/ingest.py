@@ -0,0 +1,233 @@
+import functools
+import itertools
+import time
+from typing import Callable, Iterable, Iterator, Literal
+
+from psycopg.copy import QueuedLibpqWriter
+
+from utils.batch import SensorBatch
+from utils.commit_policy import CommitPolicy
+from utils.pgbinary import COPY_BINARY_HEADER, COPY_BINARY_SQL, COPY_BINARY_TRAILER
+from utils.query_cache import invalidate
+
+COPY_CSV_SQL = "COPY sensors(time, id, value) FROM STDIN WITH (FORMAT csv)"
+
+COPY_SQL = {"csv": COPY_CSV_SQL, "binary": COPY_BINARY_SQL}
+
+# One statement inserts a whole batch from three arrays. Times travel as int8
+# epoch microseconds, so no Python datetime is created per row.
+UNNEST_INSERT_SQL = """
+    INSERT INTO sensors (time, id, value)
+    SELECT timestamptz 'epoch' + t * interval '1 microsecond', i, v
+    FROM unnest(%b::int8[], %b::int4[], %b::float8[]) AS u(t, i, v)
+    ON CONFLICT DO NOTHING
+"""
+
+# Postgres accepts at most 65535 bind parameters per statement
+MAX_PARAMS = 65_535
+
+
+def _buffers(batches: Iterable[SensorBatch], buffer_rows: int) -> Iterator[SensorBatch]:
+    """Cut batches into zero-copy views of at most `buffer_rows` rows."""
+    for batch in batches:
+        for offset in range(0, len(batch), buffer_rows):
+            yield batch[offset : offset + buffer_rows]
+
+
+def _encode(buf: SensorBatch, fmt: Literal["csv", "binary"]):
+    if fmt == "binary":
+        # Header/trailer are sent once per COPY, not per buffer
+        return buf.to_copy_binary(header=False, trailer=False)
+    return buf.to_csv()
+
+
+def copy_stream(
+    conn,
+    batches: Iterable[SensorBatch],
+    *,
+    fmt: Literal["csv", "binary"] = "binary",
+    commit_rows: int = 1_000_000,
+    buffer_rows: int = 10_000,
+    synchronous_commit: bool = False,
+    on_commit: Callable[[int, int, float], None] | None = None,
+    policy: CommitPolicy | None = None,
+) -> int:
+    """
+    Stream batches into sensors with long-running COPYs, encoding and sending
+    `buffer_rows` rows at a time.
+
+    Memory is bounded by the buffer size, not by the commit size: each buffer is
+    encoded and handed to a psycopg QueuedLibpqWriter, whose background thread
+    pushes it to the socket while the next buffer is generated. A COPY is closed
+    and committed when `policy` says so (default: every `commit_rows` rows; a
+    batch straddling the row limit is split), so commit boundaries are independent
+    of both the buffer and the generator batch size.
+
+    `on_commit(rows_in_commit, rows_total, commit_seconds)` is called after every
+    commit, with the time spent writing and committing that transaction (not
+    generating and encoding it). Returns the total number of rows copied. A commit that reaches into
+    cached history invalidates the query cache.
+    """
+    policy = policy or CommitPolicy(max_rows=commit_rows)
+    sql = COPY_SQL[fmt]
+    buffers = _buffers(batches, buffer_rows)
+    buf = next(buffers, None)
+    total = 0
+
+    with conn.cursor() as cur:
+        while buf is not None:
+            policy.begin()
+            if not synchronous_commit:
+                cur.execute("SET LOCAL synchronous_commit = OFF")
+
+            oldest = None
+            seconds = 0.0  # writing and committing, not generating and encoding
+            t0 = time.perf_counter()
+            with cur.copy(sql, writer=QueuedLibpqWriter(cur)) as cp:
+                if fmt == "binary":
+                    cp.write(COPY_BINARY_HEADER)
+                seconds += time.perf_counter() - t0
+
+                while buf is not None and not policy.due():
+                    take = policy.room()
+                    head, rest = (
+                        (buf, None)
+                        if take is None or len(buf) <= take
+                        else (buf[:take], buf[take:])
+                    )
+                    data = _encode(head, fmt)
+                    t0 = time.perf_counter()
+                    cp.write(data)
+                    seconds += time.perf_counter() - t0
+                    policy.add(len(head), len(data))
+                    if len(head):
+                        low = head.time.min()
+                        oldest = low if oldest is None else min(oldest, low)
+                    buf = rest if rest is not None else next(buffers, None)
+
+                t0 = time.perf_counter()
+                if fmt == "binary":
+                    cp.write(COPY_BINARY_TRAILER)
+            conn.commit()
+            seconds += time.perf_counter() - t0
+            if oldest is not None:
+                invalidate(oldest)
+
+            rows = policy.rows
+            total += rows
+            entry = policy.commit(seconds)
+            if on_commit:
+                on_commit(rows, total, entry["seconds"])
+
+    return total
+
+
+@functools.lru_cache(maxsize=8)
+def values_insert_sql(rows: int) -> str:
+    """Parameterized multi-row INSERT for exactly `rows` rows (binary parameters)."""
+    placeholders = ", ".join(["(%b, %b, %b)"] * rows)
+    return (
+        f"INSERT INTO sensors (time, id, value) VALUES {placeholders} "
+        "ON CONFLICT DO NOTHING"
+    )
+
+
+def insert_chunk(
+    cur,
+    chunk: SensorBatch,
+    mode: Literal["values", "unnest"],
+    rows_per_statement: int,
+):
+    """
+    Send one chunk of at most `rows_per_statement` rows as a prepared INSERT. In
+    mode="values" a full chunk uses the fixed-arity VALUES statement; a shorter
+    one (the last chunk of a batch), like every chunk in mode="unnest", uses the
+    unnest statement, which serves any chunk size with one prepared plan.
+    """
+    if mode == "values" and len(chunk) == rows_per_statement:
+        params = list(itertools.chain.from_iterable(chunk.to_rows()))
+        cur.execute(values_insert_sql(rows_per_statement), params, prepare=True)
+    else:
+        params = (
+            chunk.time.view("int64").tolist(),
+            chunk.id.tolist(),
+            chunk.value.tolist(),
+        )
+        cur.execute(UNNEST_INSERT_SQL, params, prepare=True)
+
+
+def insert_pipeline(
+    conn,
+    batches: Iterable[SensorBatch],
+    *,
+    mode: Literal["values", "unnest"] = "values",
+    rows_per_statement: int = 1000,
+    commit_rows: int = 100_000,
+    on_commit: Callable[[int, int, float], None] | None = None,
+    policy: CommitPolicy | None = None,
+) -> int:
+    """
+    INSERT batches using psycopg pipeline mode and server-prepared statements.
+
+    mode="values": a multi-row `VALUES (%b, %b, %b), ...` INSERT of fixed arity
+        (`rows_per_statement` rows). Every full chunk reuses the same prepared
+        statement and plan; the shorter last chunk of a batch goes through the
+        prepared unnest statement instead of a one-off VALUES statement.
+    mode="unnest": one `INSERT ... SELECT FROM unnest(int8[], int4[], float8[])`
+        per `rows_per_statement` rows. A single prepared statement serves any
+        chunk size.
+
+    In pipeline mode statements are sent back to back without waiting for each
+    result, so the round trip per statement disappears. Parameters are bound (and
+    sent in binary), never formatted into the SQL text, and ON CONFLICT DO NOTHING
+    semantics are kept. A commit (pipeline sync) happens when `policy` says so
+    (default: every `commit_rows` rows), checked after each statement.
+
+    `on_commit(rows_in_commit, rows_total, commit_seconds)` is called after every
+    commit, with the time spent sending that transaction's statements and
+    committing it. Returns the total number of rows sent. A commit that reaches into
+    cached history invalidates the query cache.
+    """
+    if mode == "values" and rows_per_statement * 3 > MAX_PARAMS:
+        raise ValueError(
+            f"rows_per_statement={rows_per_statement} exceeds {MAX_PARAMS // 3} rows "
+            "(Postgres bind parameter limit) for mode='values'"
+        )
+
+    policy = policy or CommitPolicy(max_rows=commit_rows)
+    total = 0
+    oldest = None
+    seconds = 0.0  # sending statements and committing, not generating
+
+    def commit():
+        nonlocal total, oldest, seconds
+        t0 = time.perf_counter()
+        conn.commit()
+        seconds += time.perf_counter() - t0
+        if oldest is not None:
+            invalidate(oldest)
+            oldest = None
+        rows = policy.rows
+        total += rows
+        entry = policy.commit(seconds)
+        seconds = 0.0
+        if on_commit:
+            on_commit(rows, total, entry["seconds"])
+
+    policy.begin()
+    with conn.pipeline(), conn.cursor() as cur:
+        for chunk in _buffers(batches, rows_per_statement):
+            t0 = time.perf_counter()
+            insert_chunk(cur, chunk, mode, rows_per_statement)
+            seconds += time.perf_counter() - t0
+
+            policy.add(len(chunk), chunk.nbytes)
+            low = chunk.time.min()
+            oldest = low if oldest is None else min(oldest, low)
+            if policy.due():
+                commit()
+
+        if policy.rows:
+            commit()
+
+    return total
@@ -0,0 +1,292 @@
+import concurrent.futures as cf
+import io
+import mmap
+import os
+import time
+from typing import Callable, Iterator, List, Tuple
+
+import pandas as pd
+from psycopg import sql
+
+from utils.batch import SensorBatch
+from utils.checkpoint import Checkpoint, clear_stream, ensure_table, finished_parts
+from utils.db import get_connection, pooled_connection
+from utils.disk import unpivot_frame
+from utils.pgbinary import COPY_BINARY_SQL, COPY_BINARY_HEADER, COPY_BINARY_TRAILER
+from utils.query_cache import invalidate
+from utils.staging import read_header
+
+# Columns of a file that can be COPYed into sensors as it is
+LONG_COLUMNS = {"time", "id", "value"}
+
+# Seconds to wait before retry n of a range: RETRY_BACKOFF * n
+RETRY_BACKOFF = 0.5
+
+# Worker process state: one connection per process, reopened after a failure
+_conn = None
+
+
+def split_ranges(path: str, range_bytes: int = 16 << 20) -> List[Tuple[int, int]]:
+    """
+    Cut a CSV file into (start, end) byte ranges of about `range_bytes` that cover
+    every data line once: the header line is skipped and every boundary is moved
+    forward to just after the next newline, so no line is split. Quoted fields
+    with embedded newlines are not supported (sensor exports have none).
+    """
+    size = os.path.getsize(path)
+    if not size:
+        return []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        newline = mm.find(b"\n")
+        start = size if newline < 0 else newline + 1
+        ranges = []
+        while start < size:
+            newline = mm.find(b"\n", min(start + range_bytes, size) - 1)
+            end = size if newline < 0 else newline + 1
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def range_batches(
+    data,
+    header: List[str],
+    batch_size: int = 100_000,
+    time_column: str = "Datetime",
+    time_format: str | None = "%m/%d/%Y %H:%M",
+) -> Iterator[SensorBatch]:
+    """Parse the lines of one byte range of a wide CSV into SensorBatch objects."""
+    chunk_rows = max(1, batch_size // max(len(header) - 1, 1))
+    chunks = pd.read_csv(
+        io.BytesIO(data), header=None, names=header, chunksize=chunk_rows
+    )
+    for chunk in chunks:
+        yield unpivot_frame(chunk, header, time_column, time_format)
+
+
+def _copy_range(conn, path, start, end, header, options) -> int:
+    """
+    COPY one byte range in one transaction, return the rows it holds. The rows'
+    times are not known here (raw bytes), so a loaded range invalidates the
+    query cache.
+    """
+    with open(path, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mm, conn.cursor() as cur:
+        if not options["synchronous_commit"]:
+            cur.execute("SET LOCAL synchronous_commit = OFF")
+        data = memoryview(mm)[start:end]
+        try:
+            if set(header) == LONG_COLUMNS:
+                # Already (time, id, value): send the bytes as they are
+                copy_sql = sql.SQL("COPY sensors({}) FROM STDIN WITH (FORMAT csv)")
+                columns = sql.SQL(", ").join(map(sql.Identifier, header))
+                with cur.copy(copy_sql.format(columns)) as cp:
+                    for offset in range(0, len(data), 1 << 20):
+                        cp.write(data[offset : offset + (1 << 20)])
+                rows = cur.rowcount
+            else:
+                rows = 0
+                with cur.copy(COPY_BINARY_SQL) as cp:
+                    cp.write(COPY_BINARY_HEADER)
+                    for batch in range_batches(
+                        data,
+                        header,
+                        time_column=options["time_column"],
+                        time_format=options["time_format"],
+                    ):
+                        cp.write(batch.to_copy_binary(header=False, trailer=False))
+                        rows += len(batch)
+                    cp.write(COPY_BINARY_TRAILER)
+        finally:
+            data.release()
+        # Committed together with the rows: a finished range is never loaded twice
+        Checkpoint(options["stream"], part=str(start)).save(cur, end, finished=True)
+    conn.commit()
+    invalidate()
+    return rows
+
+
+def _load_range(task: dict) -> dict:
+    """
+    Process pool worker: load one range on this process' connection. A failed
+    range is rolled back as a whole, so the caller can simply submit it again
+    with the next `attempt` number; a retry first backs off in the worker, so
+    the coordinator keeps collecting the other ranges meanwhile.
+    """
+    global _conn
+    if task["attempt"]:
+        time.sleep(RETRY_BACKOFF * task["attempt"])
+    t0 = time.monotonic()
+    try:
+        if _conn is None or _conn.closed:
+            _conn = get_connection()
+        rows = _copy_range(
+            _conn,
+            task["path"],
+            task["start"],
+            task["end"],
+            task["header"],
+            task["options"],
+        )
+    except Exception:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
+        raise
+    return {
+        "index": task["index"],
+        "rows": rows,
+        "bytes": task["end"] - task["start"],
+        "seconds": time.monotonic() - t0,
+    }
+
+
+def print_progress(done: int, total: int, rows: int, nbytes: int, seconds: float):
+    print(
+        f"📦 {done}/{total} ranges, {rows:,} rows, {nbytes / 2**20:,.1f} MB "
+        f"({nbytes / 2**20 / seconds if seconds else 0:,.1f} MB/s)"
+    )
+
+
+def parallel_csv_copy(
+    path: str,
+    *,
+    workers: int = 4,
+    range_bytes: int = 16 << 20,
+    retries: int = 2,
+    time_column: str = "Datetime",
+    time_format: str | None = "%m/%d/%Y %H:%M",
+    synchronous_commit: bool = False,
+    resume: bool = False,
+    on_progress: Callable[[int, int, int, int, float], None] | None = print_progress,
+) -> dict:
+    """
+    Load a large CSV file with a process pool: the file is split into
+    newline-aligned byte ranges (see `split_ranges`) and every worker process
+    COPYs whole ranges on its own connection, one transaction per range.
+
+    A file with exactly the columns time, id, value (any order) is sent as raw
+    bytes and parsed by Postgres; any other header is read as a wide file (one
+    `time_column`, one column per sensor) and unpivoted with pandas/NumPy in the
+    worker, then sent as binary COPY.
+
+    A range that fails is retried up to `retries` times on a fresh connection;
+    since it commits atomically, a retry never duplicates rows. Ranges that still
+    fail are listed in the report, the other ranges stay committed.
+
+    Every range is checkpointed in ingest_checkpoints (stream "csv:<abs path>",
+    one part per range start) in its own transaction. With `resume`, ranges that
+    finished before are skipped; this needs the same `range_bytes` as the run
+    being resumed. Without it the stream's checkpoints are cleared first.
+
+    `on_progress(done, total, rows, bytes, seconds)` is called after every range.
+
+    Returns a report dict with rows, bytes, seconds, rows/s and failed ranges.
+    """
+    header = read_header(path)
+    ranges = split_ranges(path, range_bytes)
+    stream = f"csv:{os.path.abspath(path)}"
+    with pooled_connection() as conn:
+        ensure_table(conn)
+        if resume:
+            finished = finished_parts(conn, stream)
+            ranges = [(s, e) for s, e in ranges if finished.get(str(s)) != e]
+            if finished:
+                print(f"⏩ Resuming {stream}: {len(ranges)} range(s) left")
+        else:
+            clear_stream(conn, stream)
+    options = dict(
+        stream=stream,
+        time_column=time_column,
+        time_format=time_format,
+        synchronous_commit=synchronous_commit,
+    )
+    tasks = [
+        dict(
+            index=i,
+            path=path,
+            start=s,
+            end=e,
+            header=header,
+            options=options,
+            attempt=0,
+        )
+        for i, (s, e) in enumerate(ranges)
+    ]
+    failed = []
+    rows = nbytes = done = 0
+
+    t0 = time.monotonic()
+    with cf.ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = {executor.submit(_load_range, t): t for t in tasks}
+        while pending:
+            finished, _ = cf.wait(pending, return_when=cf.FIRST_COMPLETED)
+            for future in finished:
+                task = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    if task["attempt"] < retries:
+                        task = {**task, "attempt": task["attempt"] + 1}
+                        print(
+                            f"🔁 Range {task['index']} failed ({e}), retry "
+                            f"{task['attempt']}/{retries}"
+                        )
+                        pending[executor.submit(_load_range, task)] = task
+                    else:
+                        failed.append(
+                            {
+                                "index": task["index"],
+                                "start": task["start"],
+                                "end": task["end"],
+                                "error": str(e),
+                            }
+                        )
+                    continue
+                done += 1
+                rows += result["rows"]
+                nbytes += result["bytes"]
+                if on_progress:
+                    on_progress(done, len(tasks), rows, nbytes, time.monotonic() - t0)
+
+    seconds = time.monotonic() - t0
+    return {
+        "path": path,
+        "workers": workers,
+        "ranges": len(tasks),
+        "rows": rows,
+        "bytes": nbytes,
+        "seconds": round(seconds, 4),
+        "rows_per_s": round(rows / seconds) if seconds else 0,
+        "failed": failed,
+    }
+
+
+def run(
+    path: str,
+    workers: int = 4,
+    range_mb: float = 16,
+    retries: int = 2,
+    time_column: str = "Datetime",
+    time_format: str | None = "%m/%d/%Y %H:%M",
+    resume: bool = False,
+) -> dict:
+    """Load `path` with `parallel_csv_copy` and print a summary."""
+    print(f"\n🚚 Loading {path} with {workers} worker process(es) ...")
+    report = parallel_csv_copy(
+        path,
+        workers=workers,
+        range_bytes=int(range_mb * 2**20),
+        retries=retries,
+        time_column=time_column,
+        time_format=time_format,
+        resume=resume,
+    )
+    print(
+        f"📊 {report['rows']:,} rows from {report['ranges']} ranges in "
+        f"{report['seconds']:.2f}s → {report['rows_per_s']:,} rows/s"
+    )
+    for f in report["failed"]:
+        print(f"❌ Range {f['index']} (bytes {f['start']}-{f['end']}): {f['error']}")
+    return report
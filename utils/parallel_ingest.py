@@ -0,0 +1,220 @@
+import datetime as dt
+import queue
+import threading
+import time
+from typing import Callable, Iterable, Iterator, List, Literal
+
+from utils.batch import SensorBatch
+from utils.commit_policy import CommitPolicy
+from utils.db import get_connection, pooled_connection
+from utils.generator import generate_array_batches, generate_sharded_batches
+from utils.ingest import copy_stream
+
+
+def _drain(q: queue.Queue, stop: threading.Event) -> Iterator[SensorBatch]:
+    """Batches from the shared queue until the None sentinel or a stop request."""
+    while not stop.is_set():
+        try:
+            batch = q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        if batch is None:
+            return
+        yield batch
+
+
+def _writer(
+    index: int,
+    q: queue.Queue,
+    stop: threading.Event,
+    stats: List[dict],
+    errors: list,
+    copy_kwargs: dict,
+    policy: CommitPolicy | None,
+    callback: Callable[[int, int, float], None] | None,
+):
+    """Writer thread: one connection, one streaming COPY fed from the shared queue."""
+    worker = stats[index]
+
+    def on_commit(rows, total, seconds):
+        worker["rows"] = total
+        worker["commits"] += 1
+        if callback:
+            callback(rows, total, seconds)
+
+    t0 = time.monotonic()
+    try:
+        with get_connection() as conn:
+            copy_stream(
+                conn,
+                _drain(q, stop),
+                on_commit=on_commit,
+                policy=policy.clone() if policy else None,
+                **copy_kwargs,
+            )
+    except Exception as e:
+        errors.append((index, e))
+        stop.set()
+    finally:
+        worker["seconds"] = time.monotonic() - t0
+        worker["rows_per_s"] = (
+            round(worker["rows"] / worker["seconds"]) if worker["seconds"] else 0
+        )
+
+
+def parallel_copy(
+    batches: Iterable[SensorBatch],
+    *,
+    workers: int = 4,
+    fmt: Literal["csv", "binary"] = "binary",
+    commit_rows: int = 500_000,
+    buffer_rows: int = 10_000,
+    queue_size: int | None = None,
+    policy: CommitPolicy | None = None,
+    synchronous_commit: bool = False,
+    on_commit: Callable[[int, int, float], None] | None = None,
+) -> dict:
+    """
+    Ingest batches with `workers` writer threads, each streaming COPY on its own
+    connection (see `utils.ingest.copy_stream`) and pulling from one shared,
+    bounded batch queue that the calling thread fills.
+
+    Threads are enough here: psycopg releases the GIL while sending, and binary
+    encoding is NumPy work, so the server backends are what gets parallelized.
+
+    `policy` (optional) replaces `commit_rows`; every writer gets its own clone.
+    `on_commit(rows_in_commit, writer_total, commit_seconds)` is called from the
+    writer threads after every commit.
+
+    If a writer fails, the others stop taking new batches, commit what they already
+    received and exit; queued batches are dropped and the first error is re-raised.
+    The same happens if `batches` raises (or on Ctrl+C).
+
+    Returns a report dict with aggregate and per-worker rows, seconds and rows/s.
+    """
+    q: queue.Queue = queue.Queue(maxsize=queue_size or 2 * workers)
+    stop = threading.Event()
+    errors: list = []
+    stats = [
+        {"worker": i, "rows": 0, "commits": 0, "seconds": 0.0} for i in range(workers)
+    ]
+    copy_kwargs = dict(
+        fmt=fmt,
+        commit_rows=commit_rows,
+        buffer_rows=buffer_rows,
+        synchronous_commit=synchronous_commit,
+    )
+
+    threads = [
+        threading.Thread(
+            target=_writer,
+            args=(i, q, stop, stats, errors, copy_kwargs, policy, on_commit),
+            name=f"copy-writer-{i}",
+            daemon=True,
+        )
+        for i in range(workers)
+    ]
+    t0 = time.monotonic()
+    for t in threads:
+        t.start()
+
+    try:
+        for batch in batches:
+            # Short timeouts so a failed writer is noticed while the queue is full
+            while not stop.is_set():
+                try:
+                    q.put(batch, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            if stop.is_set():
+                break
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        # One sentinel per writer. After a stop request writers exit on their own.
+        for _ in threads:
+            while not stop.is_set():
+                try:
+                    q.put(None, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+        for t in threads:
+            t.join()
+
+    if errors:
+        index, error = errors[0]
+        raise RuntimeError(f"COPY writer {index} failed: {error}") from error
+
+    seconds = time.monotonic() - t0
+    rows = sum(w["rows"] for w in stats)
+    return {
+        "workers": workers,
+        "rows": rows,
+        "seconds": round(seconds, 4),
+        "rows_per_s": round(rows / seconds) if seconds else 0,
+        "per_worker": stats,
+    }
+
+
+def run(
+    workers: Iterable[int] = (1, 2, 4),
+    days: float = 10,
+    devices: int = 2,
+    step_sec: int = 1,
+    batch_size: int = 10_000,
+    commit_rows: int = 500_000,
+    gen_workers: int = 0,
+    truncate: bool = True,
+    adaptive: bool = False,
+) -> List[dict]:
+    """
+    Run `parallel_copy` once per worker count on the same seeded dataset and print
+    per-worker and aggregate rows/s. With `gen_workers` > 0 the data is generated on
+    a process pool too, so the generator is not the bottleneck. With `adaptive`
+    each writer tunes its commit size, starting from `commit_rows`.
+    """
+    end = dt.datetime.now(dt.timezone.utc)
+    start = end - dt.timedelta(days=days)
+    reports = []
+
+    for n in workers:
+        if truncate:
+            with pooled_connection() as conn, conn.cursor() as cur:
+                cur.execute("TRUNCATE sensors;")
+                conn.commit()
+
+        gen_kwargs = dict(
+            start=start,
+            end=end,
+            step_sec=step_sec,
+            devices=devices,
+            batch_size=batch_size,
+            drift_per_day=0.01,
+            jitter_frac=0.3,
+        )
+        batches = (
+            generate_sharded_batches(**gen_kwargs, workers=gen_workers)
+            if gen_workers
+            else generate_array_batches(**gen_kwargs)
+        )
+
+        print(f"\n🚚 Parallel COPY with {n} writer(s) ...")
+        policy = CommitPolicy(max_rows=commit_rows, adaptive=True) if adaptive else None
+        report = parallel_copy(
+            batches, workers=n, commit_rows=commit_rows, policy=policy
+        )
+        for w in report["per_worker"]:
+            print(
+                f"   👷 writer {w['worker']}: {w['rows']:,} rows, {w['commits']} commits, "
+                f"{w['rows_per_s']:,} rows/s"
+            )
+        print(
+            f"📊 {n} writer(s): {report['rows']:,} rows in {report['seconds']:.2f}s "
+            f"→ {report['rows_per_s']:,} rows/s"
+        )
+        reports.append(report)
+
+    return reports
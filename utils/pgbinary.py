@@ -0,0 +1,132 @@
+"""
+PostgreSQL binary COPY encoding for the sensors table.
+
+Binary COPY skips text formatting on the client and timestamp/float parsing on
+the server. The format is documented here:
+https://www.postgresql.org/docs/current/sql-copy.html#id-1.9.3.55.9.4
+
+Every row is a fixed 34-byte record (for the column order time, id, value):
+    int16  field count (3)
+    int32  length (8) + int64  timestamptz, microseconds since 2000-01-01 UTC
+    int32  length (4) + int32  id
+    int32  length (8) + float8 value
+so a whole batch can be packed with one NumPy structured array, no Python loop.
+`COPY (SELECT time, id, value ...) TO STDOUT` produces the same records, so the
+stream is decoded the same way in reverse.
+"""
+
+import struct
+from typing import Tuple
+
+import numpy as np
+
+COPY_BINARY_SQL = "COPY sensors(time, id, value) FROM STDIN WITH (FORMAT binary)"
+
+# 11-byte signature, int32 flags, int32 header extension length
+COPY_BINARY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+# int16 field count of -1 marks the end of the data
+COPY_BINARY_TRAILER = b"\xff\xff"
+
+# Unix epoch -> PostgreSQL epoch (2000-01-01), in microseconds
+PG_EPOCH_OFFSET_US = 946_684_800 * 1_000_000
+
+_ROW_DTYPE = np.dtype(
+    [
+        ("nfields", ">i2"),
+        ("time_len", ">i4"),
+        ("time", ">i8"),
+        ("id_len", ">i4"),
+        ("id", ">i4"),
+        ("value_len", ">i4"),
+        ("value", ">f8"),
+    ]
+)
+ROW_SIZE = _ROW_DTYPE.itemsize
+
+
+def encode_copy_binary(
+    times: np.ndarray,
+    ids: np.ndarray,
+    values: np.ndarray,
+    *,
+    header: bool = True,
+    trailer: bool = True,
+) -> bytes:
+    """
+    Encode (times, ids, values) arrays as a binary COPY buffer for
+    `COPY sensors(time, id, value) FROM STDIN WITH (FORMAT binary)`.
+
+    times  : datetime64 (any unit, UTC) or int64 epoch microseconds
+    ids    : integer array (sent as int4)
+    values : float array (sent as float8)
+
+    By default the buffer is a complete COPY stream (header + rows + trailer),
+    so it can be written as-is to `cur.copy(COPY_BINARY_SQL)`. When streaming
+    several buffers through ONE copy, send the header only with the first
+    buffer and the trailer only with the last.
+    """
+    if np.issubdtype(times.dtype, np.datetime64):
+        times = times.astype("datetime64[us]").view(np.int64)
+
+    rows = np.empty(len(times), dtype=_ROW_DTYPE)
+    rows["nfields"] = 3
+    rows["time_len"] = 8
+    rows["time"] = times - PG_EPOCH_OFFSET_US
+    rows["id_len"] = 4
+    rows["id"] = ids
+    rows["value_len"] = 8
+    rows["value"] = values
+
+    parts = [rows.tobytes()]
+    if header:
+        parts.insert(0, COPY_BINARY_HEADER)
+    if trailer:
+        parts.append(COPY_BINARY_TRAILER)
+    return b"".join(parts)
+
+
+def binary_header_size(buf) -> int:
+    """
+    Size of the binary COPY header at the start of `buf` (signature, flags and
+    the variable-length header extension), validated.
+    """
+    signature = COPY_BINARY_HEADER[:11]
+    if bytes(buf[:11]) != signature:
+        raise ValueError("Not a binary COPY stream (bad signature)")
+    (extension,) = struct.unpack("!i", buf[15:19])
+    return 19 + extension
+
+
+def decode_copy_rows(buf) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Decode whole 34-byte (time, id, value) row records, without header or trailer,
+    as produced by `COPY (SELECT time, id, value ...) TO STDOUT (FORMAT binary)`.
+    One np.frombuffer over the buffer, no Python loop. Returns (times
+    datetime64[us] UTC, ids int32, values float64), copies owned by NumPy.
+
+    Any other layout (NULLs, other columns or types) is rejected with ValueError.
+    """
+    if len(buf) % ROW_SIZE:
+        raise ValueError(f"{len(buf)} bytes is not a whole number of rows")
+    rows = np.frombuffer(buf, dtype=_ROW_DTYPE)
+    if len(rows) and not (
+        (rows["nfields"] == 3).all()
+        and (rows["time_len"] == 8).all()
+        and (rows["id_len"] == 4).all()
+        and (rows["value_len"] == 8).all()
+    ):
+        raise ValueError(
+            "Unexpected binary COPY row layout, expected non-NULL "
+            "(timestamptz, int4, float8) columns"
+        )
+    times = (rows["time"] + PG_EPOCH_OFFSET_US).astype("datetime64[us]")
+    return times, rows["id"].astype(np.int32), rows["value"].astype(np.float64)
+
+
+def decode_copy_binary(buf) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Decode a complete binary COPY stream (header + rows + trailer) of sensors rows."""
+    buf = memoryview(buf)
+    start = binary_header_size(buf)
+    if bytes(buf[-2:]) != COPY_BINARY_TRAILER:
+        raise ValueError("Binary COPY stream is missing its trailer")
+    return decode_copy_rows(buf[start:-2])
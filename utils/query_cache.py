@@ -0,0 +1,376 @@
+import atexit
+import datetime as dt
+import os
+import pickle
+import tempfile
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Hashable, List, Literal, Tuple
+
+import numpy as np
+
+# Rows older than this are in compressed chunks (add_columnstore_policy after 7 days)
+# and only change through a truncate, a backfill or a reload of history, which
+# invalidate the cache (see invalidate()).
+IMMUTABLE_AFTER = dt.timedelta(days=7)
+
+DEFAULT_PATH = os.path.expanduser("~/.cache/timescale-workshop/query_cache.pkl")
+
+_EPOCH = dt.datetime(1970, 1, 1, tzinfo=dt.timezone.utc)
+_ONE_US = dt.timedelta(microseconds=1)
+
+Bucket = dt.timedelta | Literal["month"] | None
+
+
+def floor_bucket(ts: dt.datetime, bucket: Bucket) -> dt.datetime:
+    """Start of the bucket holding `ts` (UTC): epoch-aligned, or calendar months."""
+    if bucket is None:
+        return ts
+    ts = ts.astimezone(dt.timezone.utc)
+    if bucket == "month":
+        return ts.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return ts - (ts - _EPOCH) % bucket
+
+
+def ceil_bucket(ts: dt.datetime, bucket: Bucket) -> dt.datetime:
+    """First bucket start at or after `ts`."""
+    start = floor_bucket(ts, bucket)
+    if start == ts or bucket is None:
+        return start
+    if bucket == "month":
+        return floor_bucket(start + dt.timedelta(days=32), "month")
+    return start + bucket
+
+
+@dataclass
+class _Entry:
+    lo: dt.datetime | None  # immutable range [lo, hi) covered by `value`
+    hi: dt.datetime | None
+    value: Any
+    expires_at: float
+
+
+@dataclass
+class QueryCache:
+    """
+    LRU + TTL cache for the read paths, keyed on (query template, id,
+    bucket/resolution). Persisted to `path` (pickle, written atomically by
+    save(), once at exit for get_cache()) so separate CLI calls share it; None
+    keeps it in memory only.
+
+    Writes into the immutable history bump a generation marker next to `path`
+    (see invalidate()). Every process sharing `path` checks it on lookup and on
+    save, and drops its entries once it changed.
+
+    Most plots query a sliding `now() - 100 days` window. For results made of
+    time-keyed rows (raw rows, time buckets, continuous aggregate buckets) the
+    window is split into
+        head    [start, first bucket boundary)   fetched (partial bucket)
+        middle  [boundary, horizon)              served from the cache
+        tail    [horizon, end)                   fetched (fresh data)
+    where the horizon is `now - immutable_after`, floored to a bucket boundary.
+    As the window slides, only the missing edge of the middle is fetched and
+    merged into the entry. Results that cannot be split (lttb, histograms) are
+    cached whole and reused while the TTL lasts: for the same bounds, or for the
+    same length while the window keeps ending at `now`.
+    """
+
+    max_entries: int = 64
+    ttl: float = 24 * 3600
+    path: str | None = None
+    max_entry_rows: int = 1_000_000
+    enabled: bool = True
+    stats: dict = field(
+        default_factory=lambda: dict.fromkeys(
+            (
+                "hits",
+                "partial_hits",
+                "misses",
+                "bypassed",
+                "rows_from_cache",
+                "rows_from_db",
+                "evictions",
+            ),
+            0,
+        )
+    )
+    _entries: "OrderedDict[Hashable, _Entry]" = field(
+        default_factory=OrderedDict, repr=False
+    )
+    _generation: str = field(default="", repr=False)
+    _dirty: bool = field(default=False, repr=False)
+
+    def __post_init__(self):
+        self._generation = read_generation(self.path)
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, "rb") as f:
+                    entries, stats, generation = pickle.load(f)
+                self.stats.update(stats)
+                if generation == self._generation:
+                    self._entries = entries
+            except Exception:
+                # Unreadable or from an older version: start empty
+                self._entries = OrderedDict()
+
+    # --- LRU/TTL storage -------------------------------------------------------
+
+    def _sync(self):
+        """Drop every entry if another process invalidated the cache meanwhile."""
+        generation = read_generation(self.path)
+        if generation != self._generation:
+            self._entries.clear()
+            self._generation = generation
+            self._dirty = True
+
+    def _get(self, key) -> _Entry | None:
+        self._sync()
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at < time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _put(self, key, entry: _Entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        self._dirty = True
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def save(self):
+        """
+        Write the entries to `path` if they changed: to a temporary file that
+        then replaces `path`, so a reader never sees a half-written pickle.
+        """
+        if not self.path or not self._dirty:
+            return
+        self._sync()
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as f:
+            pickle.dump((self._entries, self.stats, self._generation), f)
+        os.replace(f.name, self.path)
+        self._dirty = False
+
+    def clear(self):
+        """Drop every entry, in every process sharing `path` (see invalidate())."""
+        self._entries.clear()
+        self._generation = bump_generation(self.path)
+        self._dirty = True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # --- read paths ------------------------------------------------------------
+
+    def rows(
+        self,
+        key: Hashable,
+        start: dt.datetime,
+        end: dt.datetime,
+        fetch: Callable[[dt.datetime, dt.datetime], List[tuple]],
+        *,
+        bucket: Bucket = None,
+        time_index: int = 0,
+        immutable_after: dt.timedelta = IMMUTABLE_AFTER,
+        now: dt.datetime | None = None,
+    ) -> List[tuple]:
+        """
+        Rows for [start, end) built from cached and fetched pieces.
+        `fetch(lo, hi)` must return the rows for the half-open range [lo, hi),
+        ordered by the timestamp at `time_index`. With `bucket` every row is one
+        bucket starting at that timestamp.
+        """
+        if not self.enabled:
+            self.stats["bypassed"] += 1
+            return fetch(start, end)
+
+        now = now or dt.datetime.now(dt.timezone.utc)
+        lo = ceil_bucket(start, bucket)
+        hi = floor_bucket(min(end, now - immutable_after), bucket)
+        if hi <= lo:
+            # Nothing immutable in the window
+            self.stats["misses"] += 1
+            rows = fetch(start, end)
+            self.stats["rows_from_db"] += len(rows)
+            return rows
+
+        entry = self._get(key)
+        if entry is not None and entry.lo < hi and lo < entry.hi:
+            # Overlap: fetch only what the entry is missing, then merge
+            before = fetch(lo, entry.lo) if lo < entry.lo else []
+            after = fetch(entry.hi, hi) if entry.hi < hi else []
+            fetched = len(before) + len(after)
+            cached = before + entry.value + after
+            expires_at = entry.expires_at
+            partial = lo < entry.lo or entry.hi < hi
+            self.stats["partial_hits" if partial else "hits"] += 1
+        else:
+            cached = fetch(lo, hi)
+            fetched = len(cached)
+            expires_at = time.time() + self.ttl
+            self.stats["misses"] += 1
+
+        # Keep only this window's immutable part, so a sliding window does not
+        # grow the entry without bound
+        middle = [r for r in cached if lo <= r[time_index] < hi]
+        if len(middle) <= self.max_entry_rows:
+            self._put(key, _Entry(lo, hi, middle, expires_at))
+
+        head = fetch(start, lo) if start < lo else []
+        tail = fetch(hi, end) if hi < end else []
+        self.stats["rows_from_cache"] += max(len(middle) - fetched, 0)
+        self.stats["rows_from_db"] += fetched + len(head) + len(tail)
+        return head + middle + tail
+
+    def whole(
+        self,
+        key: Hashable,
+        start: dt.datetime,
+        end: dt.datetime,
+        fetch: Callable[[dt.datetime, dt.datetime], Any],
+        *,
+        ttl: float = 300,
+        immutable_after: dt.timedelta = IMMUTABLE_AFTER,
+        now: dt.datetime | None = None,
+    ) -> Any:
+        """
+        Result of a query that cannot be split by time (lttb, histogram). A window
+        that is entirely immutable is cached for the cache TTL. A sliding window
+        ending within `ttl` seconds of `now` is reused for `ttl` seconds as long as
+        it has the same length; any other window is cached for its exact bounds.
+        """
+        if not self.enabled:
+            self.stats["bypassed"] += 1
+            return fetch(start, end)
+
+        now = now or dt.datetime.now(dt.timezone.utc)
+        if end <= now - immutable_after:
+            key, ttl = (key, start, end), self.ttl
+        elif abs((now - end).total_seconds()) <= ttl:
+            # "The last N days": the same window a few seconds later
+            key = (key, round((end - start).total_seconds()))
+        else:
+            key = (key, start, end)
+
+        entry = self._get(key)
+        if entry is not None:
+            self.stats["hits"] += 1
+            return entry.value
+
+        self.stats["misses"] += 1
+        value = fetch(start, end)
+        self._put(key, _Entry(None, None, value, time.time() + ttl))
+        return value
+
+    def summary(self) -> dict:
+        served = self.stats["hits"] + self.stats["partial_hits"]
+        total = served + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self),
+            "hit_rate": round(served / total, 3) if total else 0.0,
+        }
+
+
+def _generation_path(path: str) -> str:
+    return path + ".generation"
+
+
+def read_generation(path: str | None) -> str:
+    """Current generation marker of the cache persisted at `path` ("" if none)."""
+    if not path:
+        return ""
+    try:
+        with open(_generation_path(path)) as f:
+            return f.read()
+    except FileNotFoundError:
+        return ""
+
+
+def bump_generation(path: str | None) -> str:
+    """Write a new generation marker for `path`, return it."""
+    generation = f"{os.getpid()}:{time.time_ns()}"
+    if path:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(_generation_path(path), "w") as f:
+            f.write(generation)
+    return generation
+
+
+_cache: QueryCache | None = None
+
+
+def _cache_path() -> str:
+    return os.getenv("QUERY_CACHE_PATH", DEFAULT_PATH)
+
+
+def get_cache() -> QueryCache:
+    """
+    Process-wide cache, persisted to QUERY_CACHE_PATH (default
+    ~/.cache/timescale-workshop/query_cache.pkl) when the process exits.
+    QUERY_CACHE=off disables it, like the CLI --no-cache.
+    """
+    global _cache
+    if _cache is None:
+        _cache = QueryCache(
+            path=_cache_path(),
+            enabled=os.getenv("QUERY_CACHE", "on").lower() not in ("off", "0", "false"),
+        )
+        atexit.register(_cache.save)
+    return _cache
+
+
+def invalidate(since: dt.datetime | np.datetime64 | None = None):
+    """
+    Rows at or after `since` (None: anywhere, e.g. TRUNCATE) were written or
+    removed. If that reaches into the history older than IMMUTABLE_AFTER, the
+    cached results of every process sharing the cache file are dropped. Rows
+    newer than that are never served from the cache, so writing them (live
+    ingest) keeps the cache.
+
+    Called by the write paths: the Postgres sinks, copy_stream and
+    insert_pipeline on every commit, and truncates, backfills and file loads.
+    """
+    if since is not None:
+        if isinstance(since, np.datetime64):
+            # SensorBatch times: naive UTC
+            since = since.astype("datetime64[us]").item()
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=dt.timezone.utc)
+        if since >= dt.datetime.now(dt.timezone.utc) - IMMUTABLE_AFTER:
+            return
+    if _cache is not None:
+        _cache.clear()
+    else:
+        # No need to load the cache file just to empty it
+        bump_generation(_cache_path())
+
+
+def inclusive(end: dt.datetime) -> dt.datetime:
+    """Half-open end that includes `end`, for queries written with BETWEEN."""
+    return end + _ONE_US
+
+
+def cache_key(template: str, *params) -> Tuple:
+    """Key of a query: its whitespace-normalized SQL plus the non-time parameters."""
+    return (" ".join(template.split()), *params)
+
+
+def fetcher(cur, query: str, *params, one: bool = False) -> Callable:
+    """
+    fetch(lo, hi) for the cache: runs `query` with `params` followed by the range
+    bounds, i.e. a query ending in `time >= %s AND time < %s`.
+    """
+
+    def fetch(lo: dt.datetime, hi: dt.datetime):
+        cur.execute(query, (*params, lo, hi))
+        return cur.fetchone() if one else cur.fetchall()
+
+    return fetch
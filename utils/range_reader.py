@@ -0,0 +1,190 @@
+import datetime as dt
+import itertools
+from typing import Iterator, Sequence, Tuple
+
+import numpy as np
+from psycopg import sql
+from psycopg.adapt import Loader
+from psycopg.pq import Format
+
+from utils.batch import SensorBatch
+from utils.pgbinary import (
+    COPY_BINARY_TRAILER,
+    PG_EPOCH_OFFSET_US,
+    ROW_SIZE,
+    binary_header_size,
+    decode_copy_rows,
+)
+
+RANGE_SQL = """
+    SELECT time, value FROM sensors
+    WHERE id = %s AND time >= %s AND time < %s
+    ORDER BY time
+"""
+
+_ROW_DTYPE = np.dtype([("time", "i8"), ("value", "f8")])
+_cursor_names = itertools.count()
+
+
+class _PgMicrosLoader(Loader):
+    """
+    Binary timestamptz as the raw int64 (microseconds since 2000-01-01 UTC): no
+    datetime object per row, the epoch shift is done on the whole block.
+    """
+
+    format = Format.BINARY
+
+    def load(self, data) -> int:
+        return int.from_bytes(data, "big", signed=True)
+
+
+def iter_range(
+    conn,
+    id: int,
+    start: dt.datetime,
+    end: dt.datetime,
+    *,
+    itersize: int = 100_000,
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Stream the raw rows of one sensor in [start, end) from a named (server-side)
+    cursor, `itersize` rows per round trip, in time order. Yields (times
+    datetime64[us] UTC, values float64) blocks as they arrive, so the first rows
+    are usable before the query finishes and the client never holds more than one
+    block of Python rows. Needs a connection in a transaction (not autocommit),
+    like any named cursor.
+    """
+    name = f"range_reader_{next(_cursor_names)}"
+    with conn.cursor(name=name, binary=True) as cur:
+        cur.itersize = itersize
+        cur.adapters.register_loader("timestamptz", _PgMicrosLoader)
+        cur.execute(RANGE_SQL, (id, start, end))
+        while rows := cur.fetchmany(itersize):
+            block = np.array(rows, dtype=_ROW_DTYPE)
+            times = (block["time"] + PG_EPOCH_OFFSET_US).view("datetime64[us]")
+            yield times, block["value"]
+
+
+def read_range(
+    conn,
+    id: int,
+    start: dt.datetime,
+    end: dt.datetime,
+    *,
+    itersize: int = 100_000,
+    capacity: int | None = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    All raw rows of one sensor in [start, end) as (times, values) NumPy arrays,
+    streamed with iter_range() into arrays preallocated for `capacity` rows (grown
+    by doubling if the estimate is short). 16 bytes per row instead of a tuple, a
+    datetime and a float object per row plus the lists built from them. The
+    arrays are trimmed to the rows read, so no unused capacity stays allocated.
+    """
+    times = np.empty(capacity or itersize, "datetime64[us]")
+    values = np.empty(capacity or itersize, "float64")
+    n = 0
+    for block_times, block_values in iter_range(
+        conn, id, start, end, itersize=itersize
+    ):
+        k = len(block_times)
+        if n + k > len(times):
+            size = max(2 * len(times), n + k)
+            times = np.resize(times, size)
+            values = np.resize(values, size)
+        times[n : n + k] = block_times
+        values[n : n + k] = block_values
+        n += k
+    # Copies of exactly n rows, not views that keep the whole buffer alive
+    # (np.resize would copy the whole buffer and return a view of it, too)
+    return times[:n].copy(), values[:n].copy()
+
+
+def copy_range_sql(
+    start: dt.datetime, end: dt.datetime, ids: Sequence[int] | None = None
+) -> sql.Composed:
+    """
+    COPY of the (time, id, value) rows in [start, end), of `ids` or all sensors,
+    as binary. COPY takes no bind parameters, so the values are quoted literals.
+    """
+    where = [
+        sql.SQL("time >= {}").format(sql.Literal(start)),
+        sql.SQL("time < {}").format(sql.Literal(end)),
+    ]
+    if ids is not None:
+        where.append(sql.SQL("id = ANY({}::int4[])").format(sql.Literal(list(ids))))
+    return sql.SQL(
+        "COPY (SELECT time, id, value FROM sensors WHERE {}) "
+        "TO STDOUT (FORMAT binary)"
+    ).format(sql.SQL(" AND ").join(where))
+
+
+def iter_copy_range(
+    conn,
+    start: dt.datetime,
+    end: dt.datetime,
+    ids: Sequence[int] | None = None,
+    *,
+    chunk_bytes: int = 8 << 20,
+) -> Iterator[SensorBatch]:
+    """
+    Bulk read with COPY TO STDOUT (FORMAT binary): the server streams the rows
+    already encoded as fixed 34-byte records, which are buffered into about
+    `chunk_bytes` and decoded per buffer with np.frombuffer. No psycopg loader
+    and no Python object runs per row. Yields one SensorBatch per buffer.
+    """
+    buf = bytearray()
+    header = None
+    with conn.cursor() as cur:
+        with cur.copy(copy_range_sql(start, end, ids)) as copy:
+            for data in copy:
+                buf += data
+                if header is None and len(buf) >= 19:
+                    header = binary_header_size(buf)
+                    del buf[:header]
+                if len(buf) >= chunk_bytes:
+                    whole = len(buf) - len(buf) % ROW_SIZE
+                    yield SensorBatch(*decode_copy_rows(bytes(buf[:whole])))
+                    del buf[:whole]
+    if buf[-2:] != COPY_BINARY_TRAILER:
+        raise ValueError("Binary COPY stream ended without its trailer")
+    del buf[-2:]
+    if buf:
+        yield SensorBatch(*decode_copy_rows(bytes(buf)))
+
+
+def copy_range(
+    conn,
+    start: dt.datetime,
+    end: dt.datetime,
+    ids: Sequence[int] | None = None,
+    *,
+    chunk_bytes: int = 8 << 20,
+) -> SensorBatch:
+    """All rows of iter_copy_range() as one SensorBatch (.to_frame() for pandas)."""
+    return SensorBatch.concat(
+        list(iter_copy_range(conn, start, end, ids, chunk_bytes=chunk_bytes))
+    )
+
+
+def export_range(
+    conn,
+    path: str,
+    start: dt.datetime,
+    end: dt.datetime,
+    ids: Sequence[int] | None = None,
+) -> int:
+    """
+    Export the rows in [start, end) with copy_range() to `path`: .npz (the NumPy
+    columns as-is), .csv or .parquet (through pandas). Returns the row count.
+    """
+    batch = copy_range(conn, start, end, ids)
+    if path.endswith(".npz"):
+        np.savez(path, time=batch.time, id=batch.id, value=batch.value)
+    elif path.endswith(".csv"):
+        batch.to_frame().to_csv(path, index=False)
+    elif path.endswith(".parquet"):
+        batch.to_frame().to_parquet(path, index=False)
+    else:
+        raise ValueError(f"Unsupported export format {path!r}, use .npz/.csv/.parquet")
+    return len(batch)
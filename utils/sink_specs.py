@@ -0,0 +1,10 @@
+# Sink specs understood by utils.sinks.make_sink. Kept free of imports so the CLI
+# can list them in --help without loading the sinks, numpy or the database pool.
+SINK_SPECS = (
+    "copy[:binary|csv]",
+    "insert[:unnest|values]",
+    "merge[:binary|csv]",
+    "file:<path.csv|path.bin>",
+    "memory",
+    "null[:csv|binary]",
+)
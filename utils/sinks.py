@@ -0,0 +1,373 @@
+import abc
+import contextlib
+import io
+import time
+from typing import Callable, List, Literal
+
+from utils.batch import SensorBatch
+from utils.checkpoint import Checkpoint
+from utils.commit_policy import CommitPolicy
+from utils.db import get_connection
+from utils.ingest import COPY_SQL, insert_chunk
+from utils.pgbinary import COPY_BINARY_HEADER, COPY_BINARY_TRAILER
+from utils.query_cache import invalidate
+from utils.sink_specs import SINK_SPECS
+from utils.staging import (
+    CREATE_MERGE_STAGING_SQL,
+    ENSURE_UNIQUE_INDEX_SQL,
+    MERGE_COPY_SQL,
+    MERGE_SQL,
+)
+
+
+def _encode(batch: SensorBatch, fmt: Literal["csv", "binary"] | None):
+    if fmt == "binary":
+        return batch.to_copy_binary()
+    if fmt == "csv":
+        return batch.to_csv()
+    return None
+
+
+class Sink(abc.ABC):
+    """
+    Destination for SensorBatch objects. Use as a context manager:
+
+        with make_sink("null") as sink:
+            for batch in batches:
+                sink.write(batch)
+
+    Every sink counts the rows and (encoded) bytes written. Database sinks commit
+    according to their CommitPolicy and commit the remainder on a clean exit (roll
+    back on an exception); file sinks flush and close the file.
+    """
+
+    needs_database = False
+
+    def __init__(self):
+        self.rows = 0
+        self.nbytes = 0
+
+    def open(self) -> "Sink":
+        return self
+
+    def write(self, batch: SensorBatch):
+        self.nbytes += self._write(batch) or 0
+        self.rows += len(batch)
+
+    @abc.abstractmethod
+    def _write(self, batch: SensorBatch) -> int:
+        """Write one batch, return the number of bytes it took."""
+
+    def close(self, error: BaseException | None = None):
+        pass
+
+    def __enter__(self) -> "Sink":
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(exc)
+
+    def stats(self) -> dict:
+        return {"sink": repr(self), "rows": self.rows, "bytes": self.nbytes}
+
+    def __repr__(self) -> str:
+        return type(self).__name__
+
+
+class NullSink(Sink):
+    """
+    Discards everything. With `fmt` ("csv" or "binary") batches are still encoded
+    first, so the client-side encoding cost is part of the measurement.
+    """
+
+    def __init__(self, fmt: Literal["csv", "binary"] | None = None):
+        super().__init__()
+        self.fmt = fmt
+
+    def _write(self, batch):
+        data = _encode(batch, self.fmt)
+        return len(data) if data is not None else batch.nbytes
+
+    def __repr__(self):
+        return f"NullSink(fmt={self.fmt})"
+
+
+class MemorySink(Sink):
+    """Keeps the batches (zero-copy) in a list, e.g. for tests."""
+
+    def __init__(self):
+        super().__init__()
+        self.batches: List[SensorBatch] = []
+
+    def _write(self, batch):
+        self.batches.append(batch)
+        return batch.nbytes
+
+    @property
+    def batch(self) -> SensorBatch:
+        """Everything written so far as one batch."""
+        return SensorBatch.concat(self.batches)
+
+
+class FileSink(Sink):
+    """
+    Writes `time,id,value` CSV or one binary COPY stream to a local file. Both can
+    be loaded later with `COPY sensors(time, id, value) FROM '<file>'` and the
+    matching format.
+    """
+
+    def __init__(self, path: str, fmt: Literal["csv", "binary"] = "csv"):
+        super().__init__()
+        self.path = path
+        self.fmt = fmt
+        self._file: io.IOBase | None = None
+
+    def open(self):
+        if self.fmt == "binary":
+            self._file = open(self.path, "wb")
+            self._file.write(COPY_BINARY_HEADER)
+        else:
+            self._file = open(self.path, "w", newline="")
+        return self
+
+    def _write(self, batch):
+        if self.fmt == "binary":
+            data = batch.to_copy_binary(header=False, trailer=False)
+        else:
+            data = batch.to_csv()
+        self._file.write(data)
+        return len(data)
+
+    def close(self, error=None):
+        if self._file is None:
+            return
+        if self.fmt == "binary":
+            self._file.write(COPY_BINARY_TRAILER)
+        self._file.close()
+        self._file = None
+
+    def __repr__(self):
+        return f"FileSink({self.path!r}, fmt={self.fmt})"
+
+
+class _PostgresSink(Sink):
+    """
+    Shared connection and commit handling of the Postgres sinks. With a
+    `checkpoint`, its position advances by the committed rows in every commit's
+    transaction, and the stream is marked finished on a clean close. A commit
+    that reaches into cached history invalidates the query cache.
+
+    The time spent in the database (`_timed()` around writes and the commit, not
+    the encoding) is what the policy and `on_commit` get as commit seconds.
+    """
+
+    needs_database = True
+
+    def __init__(
+        self,
+        policy: CommitPolicy | None = None,
+        conn=None,
+        synchronous_commit: bool = False,
+        on_commit: Callable[[int, int, float], None] | None = None,
+        checkpoint: Checkpoint | None = None,
+    ):
+        super().__init__()
+        self.policy = policy or CommitPolicy(max_rows=15_000)
+        self.synchronous_commit = synchronous_commit
+        self.on_commit = on_commit
+        self.checkpoint = checkpoint
+        self.conn = conn
+        self._own_conn = conn is None
+        self.cur = None
+        self._oldest = None  # oldest time written in the open transaction
+        self._seconds = 0.0  # database time of the open transaction
+
+    @contextlib.contextmanager
+    def _timed(self):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._seconds += time.perf_counter() - t0
+
+    def open(self):
+        if self.conn is None:
+            self.conn = get_connection()
+        self.cur = self.conn.cursor()
+        self.policy.begin()
+        return self
+
+    def write(self, batch):
+        if not self.policy.rows and not self.synchronous_commit:
+            # Per-transaction speed tweak
+            self.cur.execute("SET LOCAL synchronous_commit = OFF")
+        nbytes = self._write(batch) or 0
+        self.nbytes += nbytes
+        self.rows += len(batch)
+        if len(batch):
+            oldest = batch.time.min()
+            self._oldest = oldest if self._oldest is None else min(self._oldest, oldest)
+        self.policy.add(len(batch), nbytes)
+        if self.policy.due():
+            self.commit()
+
+    def commit(self, finished: bool = False):
+        rows = self.policy.rows
+        with self._timed():
+            if self.checkpoint is not None:
+                position = self.checkpoint.position + rows
+                self.checkpoint.save(self.cur, position, finished)
+            self.conn.commit()
+        if self._oldest is not None:
+            invalidate(self._oldest)
+            self._oldest = None
+        if self.checkpoint is not None:
+            self.checkpoint.committed(position, finished)
+        entry = self.policy.commit(self._seconds)
+        self._seconds = 0.0
+        if self.on_commit:
+            self.on_commit(rows, self.rows, entry["seconds"])
+
+    def close(self, error=None):
+        if self.conn is None:
+            return
+        try:
+            if error is not None:
+                self.conn.rollback()
+                self._oldest = None
+                self._seconds = 0.0
+            elif self.policy.rows:
+                self.commit(finished=True)
+            elif self.checkpoint is not None:
+                self.checkpoint.finish(self.conn)
+            self.cur.close()
+        finally:
+            if self._own_conn:
+                self.conn.close()
+                self.conn = None
+
+
+class PostgresCopySink(_PostgresSink):
+    """One COPY (csv or binary) per batch into sensors, committed per `policy`."""
+
+    def __init__(self, fmt: Literal["csv", "binary"] = "binary", **kwargs):
+        super().__init__(**kwargs)
+        self.fmt = fmt
+        self.copy_sql = COPY_SQL[fmt]
+
+    def _write(self, batch):
+        data = _encode(batch, self.fmt)
+        with self._timed(), self.cur.copy(self.copy_sql) as cp:
+            cp.write(data)
+        return len(data)
+
+    def __repr__(self):
+        return f"PostgresCopySink(fmt={self.fmt})"
+
+
+class PostgresMergeSink(PostgresCopySink):
+    """
+    Idempotent loads: every batch is COPYed into a TEMP staging table and each
+    commit first merges the staged rows into sensors with one INSERT ... SELECT
+    ON CONFLICT (id, time), backed by the unique (id, time) index. Loading the
+    same data twice adds nothing. on_conflict="update" overwrites stored values
+    that differ instead of keeping them. `merged` counts the rows that changed.
+    """
+
+    def __init__(
+        self,
+        fmt: Literal["csv", "binary"] = "binary",
+        on_conflict: Literal["nothing", "update"] = "nothing",
+        **kwargs,
+    ):
+        super().__init__(fmt=fmt, **kwargs)
+        self.copy_sql = MERGE_COPY_SQL[fmt]
+        self.on_conflict = on_conflict
+        self.merged = 0
+
+    def open(self):
+        super().open()
+        self.cur.execute(ENSURE_UNIQUE_INDEX_SQL)
+        # ON COMMIT DELETE ROWS: the staging table is empty again after each merge
+        self.cur.execute(CREATE_MERGE_STAGING_SQL)
+        self.conn.commit()
+        return self
+
+    def commit(self, finished=False):
+        with self._timed():
+            self.cur.execute(MERGE_SQL[self.on_conflict])
+        self.merged += self.cur.rowcount
+        super().commit(finished)
+
+    def stats(self):
+        return {**super().stats(), "merged": self.merged}
+
+    def __repr__(self):
+        return f"PostgresMergeSink(fmt={self.fmt}, on_conflict={self.on_conflict})"
+
+
+class PostgresInsertSink(_PostgresSink):
+    """
+    INSERTs into sensors, committed per `policy`:
+        mode="unnest"  one prepared INSERT ... SELECT FROM unnest(arrays) per batch
+        mode="values"  prepared multi-row VALUES of `rows_per_statement` rows, the
+                       shorter last chunk of a batch through the unnest statement
+                       (utils.ingest.insert_chunk, as insert_pipeline does)
+    or, with `build_sql`, one literal SQL statement built by `build_sql(batch)`.
+    """
+
+    def __init__(
+        self,
+        mode: Literal["values", "unnest"] = "unnest",
+        rows_per_statement: int = 1000,
+        build_sql: Callable[[SensorBatch], str | None] | None = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.mode = mode
+        self.rows_per_statement = rows_per_statement
+        self.build_sql = build_sql
+
+    def _write(self, batch):
+        if self.build_sql is not None:
+            sql = self.build_sql(batch)
+            if sql:
+                with self._timed():
+                    self.cur.execute(sql)
+            return len(sql or "")
+
+        with self._timed():
+            if self.mode == "unnest":
+                insert_chunk(self.cur, batch, "unnest", len(batch))
+                return batch.nbytes
+
+            for offset in range(0, len(batch), self.rows_per_statement):
+                chunk = batch[offset : offset + self.rows_per_statement]
+                insert_chunk(self.cur, chunk, "values", self.rows_per_statement)
+        return batch.nbytes
+
+    def __repr__(self):
+        mode = "literal" if self.build_sql else self.mode
+        return f"PostgresInsertSink(mode={mode})"
+
+
+def make_sink(spec: str, **kwargs) -> Sink:
+    """
+    Build a sink from a CLI spec, one of SINK_SPECS, e.g. "copy:csv",
+    "file:/tmp/sensors.bin" or "null:binary". `kwargs` (policy, on_commit, ...)
+    are passed to the Postgres sinks.
+    """
+    kind, _, arg = spec.partition(":")
+    if kind == "copy" and arg in ("", "binary", "csv"):
+        return PostgresCopySink(fmt=arg or "binary", **kwargs)
+    if kind == "insert" and arg in ("", "unnest", "values"):
+        return PostgresInsertSink(mode=arg or "unnest", **kwargs)
+    if kind == "merge" and arg in ("", "binary", "csv"):
+        return PostgresMergeSink(fmt=arg or "binary", **kwargs)
+    if kind == "file" and arg:
+        return FileSink(arg, fmt="binary" if arg.endswith(".bin") else "csv")
+    if kind == "memory" and not arg:
+        return MemorySink()
+    if kind == "null" and arg in ("", "binary", "csv"):
+        return NullSink(fmt=arg or None)
+    raise ValueError(f"Unknown sink {spec!r}, use one of {', '.join(SINK_SPECS)}")
@@ -0,0 +1,163 @@
+import csv
+import mmap
+import os
+from typing import List
+
+from psycopg import sql
+
+from utils.query_cache import invalidate
+
+WIDE_STAGING_TABLE = "sensors_wide_staging"
+
+# Postgres to_timestamp() pattern of the Kaggle "1/1/2017 0:10" timestamps
+KAGGLE_TIME_FORMAT = "MM/DD/YYYY HH24:MI"
+
+
+def read_header(path: str) -> List[str]:
+    """Column names from the first line of a CSV file."""
+    with open(path, newline="") as f:
+        return next(csv.reader(f), [])
+
+
+def create_wide_staging_sql(columns: List[str], table: str) -> sql.Composed:
+    """UNLOGGED text table with one column per CSV header field, in file order."""
+    return sql.SQL("CREATE UNLOGGED TABLE {} ({})").format(
+        sql.Identifier(table),
+        sql.SQL(", ").join(
+            sql.SQL("{} text").format(sql.Identifier(c)) for c in columns
+        ),
+    )
+
+
+def unpivot_insert_sql(
+    columns: List[str],
+    table: str,
+    time_column: str = "Datetime",
+    time_format: str = KAGGLE_TIME_FORMAT,
+) -> sql.Composed:
+    """
+    One set-based INSERT that turns every staged wide row into one sensors row per
+    sensor column: CROSS JOIN LATERAL (VALUES (id, value), ...). The id is the
+    column position in the header (as in utils.disk.read_wide_csv_batches), and
+    empty, non-numeric and NaN cells are skipped. Timestamps are parsed with
+    to_timestamp(`time_format`) in the session time zone, so set it to UTC for
+    naive files.
+    """
+    pairs = sql.SQL(", ").join(
+        sql.SQL("({}, s.{})").format(sql.Literal(i), sql.Identifier(c))
+        for i, c in enumerate(columns)
+        if c != time_column
+    )
+    return sql.SQL("""
+        INSERT INTO sensors (time, id, value)
+        SELECT time, id, value::float8
+        FROM (
+            SELECT to_timestamp(s.{time}, {fmt}) AS time, v.id, v.value
+            FROM {table} AS s
+            CROSS JOIN LATERAL (VALUES {pairs}) AS v(id, value)
+        ) AS u
+        -- CASE, not AND: the cast must only see valid input
+        WHERE CASE WHEN pg_input_is_valid(value, 'float8')
+                   THEN value::float8 <> 'NaN' ELSE false END
+        ON CONFLICT DO NOTHING
+        """).format(
+        time=sql.Identifier(time_column),
+        fmt=sql.Literal(time_format),
+        table=sql.Identifier(table),
+        pairs=pairs,
+    )
+
+
+def copy_wide_csv_staged(
+    conn,
+    path: str,
+    *,
+    time_column: str = "Datetime",
+    time_format: str = KAGGLE_TIME_FORMAT,
+    time_zone: str = "UTC",
+    table: str = WIDE_STAGING_TABLE,
+    keep_table: bool = False,
+    chunk_bytes: int = 1 << 20,
+    synchronous_commit: bool = False,
+) -> int:
+    """
+    Load a wide CSV (one timestamp column, one column per sensor) by letting
+    Postgres do the reshaping: the file bytes are COPYed unmodified into an
+    UNLOGGED staging table whose text columns match the header, then unpivoted
+    into sensors with one INSERT ... SELECT, in a single transaction.
+
+    The file is memory-mapped and handed to COPY in `chunk_bytes` slices, so the
+    client neither parses nor holds the file. The staging table is dropped
+    afterwards, or truncated with `keep_table=True` for repeated loads.
+    Requires Postgres 16+ (pg_input_is_valid). Returns the rows inserted; any
+    row invalidates the query cache, as the file's times are not known here.
+    """
+    columns = read_header(path)
+    if time_column not in columns:
+        raise ValueError(f"{path} has no {time_column!r} column: {columns}")
+
+    with conn.cursor() as cur:
+        if not synchronous_commit:
+            cur.execute("SET LOCAL synchronous_commit = OFF")
+        cur.execute(sql.SQL("SET LOCAL TimeZone = {}").format(sql.Literal(time_zone)))
+        cur.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(table)))
+        cur.execute(create_wide_staging_sql(columns, table))
+
+        copy_sql = sql.SQL("COPY {} FROM STDIN WITH (FORMAT csv, HEADER true)")
+        with cur.copy(copy_sql.format(sql.Identifier(table))) as cp:
+            if os.path.getsize(path):
+                with open(path, "rb") as f, mmap.mmap(
+                    f.fileno(), 0, access=mmap.ACCESS_READ
+                ) as mm:
+                    view = memoryview(mm)
+                    try:
+                        for offset in range(0, len(mm), chunk_bytes):
+                            cp.write(view[offset : offset + chunk_bytes])
+                    finally:
+                        view.release()
+
+        cur.execute(unpivot_insert_sql(columns, table, time_column, time_format))
+        rows = cur.rowcount
+
+        cleanup = "TRUNCATE {}" if keep_table else "DROP TABLE {}"
+        cur.execute(sql.SQL(cleanup).format(sql.Identifier(table)))
+    conn.commit()
+    if rows:
+        invalidate()
+    return rows
+
+
+# Idempotent loads: COPY into a per-session TEMP table, then merge into sensors on
+# (id, time). The unique index is part of the schema (solutions/_02 task.sql); it
+# is created here as well for databases set up before it was.
+ENSURE_UNIQUE_INDEX_SQL = (
+    'CREATE UNIQUE INDEX IF NOT EXISTS sensors_id_time_key ON sensors (id, "time")'
+)
+
+CREATE_MERGE_STAGING_SQL = """
+    CREATE TEMP TABLE IF NOT EXISTS sensors_merge_staging
+    (LIKE sensors INCLUDING DEFAULTS) ON COMMIT DELETE ROWS
+"""
+
+MERGE_COPY_SQL = {
+    fmt: f"COPY sensors_merge_staging (time, id, value) FROM STDIN WITH (FORMAT {fmt})"
+    for fmt in ("csv", "binary")
+}
+
+MERGE_SQL = {
+    # Keep what is stored: a reload inserts only the missing readings
+    "nothing": """
+        INSERT INTO sensors (time, id, value)
+        SELECT time, id, value FROM sensors_merge_staging
+        ON CONFLICT (id, time) DO NOTHING
+    """,
+    # Overwrite changed values. DO UPDATE must not see a key twice per statement,
+    # so duplicates within the staged rows are reduced to one of them first.
+    "update": """
+        INSERT INTO sensors (time, id, value)
+        SELECT DISTINCT ON (id, time) time, id, value FROM sensors_merge_staging
+        ORDER BY id, time
+        ON CONFLICT (id, time) DO UPDATE SET value = EXCLUDED.value
+        WHERE sensors.value IS DISTINCT FROM EXCLUDED.value
+    """,
+}